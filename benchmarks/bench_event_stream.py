@@ -0,0 +1,145 @@
+import argparse
+import selectors
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.feed_server import load_rates
+from benchmarks.load_test import free_port, run_level, start_server
+from benchmarks.synthetic import create_database, currencies_for_rates, fill_rates
+
+STREAM_CLIENTS: tuple[int, ...] = (0, 100, 1000)
+
+
+def proc_status(pid: int) -> dict[str, str]:
+    status = {}
+    with open(f"/proc/{pid}/status") as file:
+        for line in file:
+            key, _, value = line.partition(":")
+            status[key] = value.strip()
+    return status
+
+
+def open_streams(port: int, count: int) -> list[socket.socket]:
+    request = b"GET /exchangeRates/stream HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n"
+    streams = []
+    for _ in range(count):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.sendall(request)
+        streams.append(sock)
+
+    for sock in streams:
+        head = b""
+        while b"\r\n\r\n" not in head:
+            head += sock.recv(4096)
+        if not head.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(head.decode(errors="replace"))
+        sock.setblocking(False)
+    return streams
+
+
+class StreamReader(threading.Thread):
+    # Drains every stream on one thread and records how long after its
+    # publication each rate event arrived on the first `sampled` streams;
+    # parsing all of them would make this thread the bottleneck.
+
+    def __init__(self, streams: list[socket.socket], sampled: int = 20) -> None:
+        super().__init__(daemon=True)
+        self.latencies: list[float] = []
+        self.events: int = 0
+        self._done = threading.Event()
+        self._selector = selectors.DefaultSelector()
+        for index, sock in enumerate(streams):
+            self._selector.register(sock, selectors.EVENT_READ,
+                                    bytearray() if index < sampled else None)
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            for key, _ in self._selector.select(0.1):
+                received = time.time()
+                try:
+                    data = key.fileobj.recv(65536)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    self._selector.unregister(key.fileobj)
+                    continue
+
+                buffer: bytearray = key.data
+                if buffer is None:
+                    continue
+                buffer += data
+                *frames, rest = buffer.split(b"\n\n")
+                buffer[:] = rest
+                for frame in frames:
+                    for line in frame.split(b"\n"):
+                        if line.startswith(b"data: {\"base"):
+                            published = float(line[line.rindex(b'"time":') + 7:-1])
+                            self.events += 1
+                            self.latencies.append(received - published)
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Server threads, memory, fan-out latency and read throughput "
+                    "with idle /exchangeRates/stream connections open.")
+    parser.add_argument("--rates", type=int, default=1000)
+    parser.add_argument("--stream-clients", type=int, nargs="+", default=list(STREAM_CLIENTS))
+    parser.add_argument("--feed-rate", type=float, default=100,
+                        help="updates per second from the generated feed")
+    parser.add_argument("--sampled", type=int, default=20,
+                        help="streams whose events are timed")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        create_database(database, currencies_for_rates(args.rates))
+        fill_rates(database, args.rates)
+        base, target, _ = load_rates(database)[0]
+        path = f"/exchange?from={base}&to={target}&amount=100"
+
+        print(f"{args.rates} rates, {args.feed_rate:.0f} updates/s, "
+              f"GET {path} with {args.clients} clients")
+        print(f"{'streams':>8} {'threads':>8} {'rss MiB':>8} {'req/s':>10} "
+              f"{'sampled':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+        for count in args.stream_clients:
+            env = {"CURRENCIES_DB": str(database),
+                   "CURRENCIES_INGEST_SOURCE": "generated",
+                   "CURRENCIES_INGEST_GENERATED_RATE": str(args.feed_rate),
+                   "CURRENCIES_INGEST_POLL_INTERVAL": "0.05",
+                   "CURRENCIES_INGEST_FLUSH_INTERVAL": "0.05"}
+            port = free_port()
+            server = start_server(port, workers=16, env=env)
+            streams = []
+            try:
+                streams = open_streams(port, count)
+                reader = StreamReader(streams, args.sampled)
+                reader.start()
+                rps, _ = run_level("127.0.0.1", port, path, args.clients, args.duration)
+                reader.stop()
+                status = proc_status(server.pid)
+            finally:
+                for sock in streams:
+                    sock.close()
+                server.terminate()
+                server.wait()
+
+            latencies = sorted(reader.latencies) or [0.0]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            rss = int(status["VmRSS"].split()[0]) / 1024
+            print(f"{count:>8} {status['Threads']:>8} {rss:>8.1f} {rps:>10.1f} "
+                  f"{reader.events:>9} {statistics.median(latencies) * 1e3:>8.1f} {p99 * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
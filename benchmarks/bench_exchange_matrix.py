@@ -0,0 +1,59 @@
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import create_database, fill_rates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Every cross rate at once: N squared ExchangeService.get calls "
+                    "vs building the exchange matrix and indexing it.")
+    parser.add_argument("--currencies", type=int, default=100)
+    parser.add_argument("--rates", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        create_database(database, args.currencies)
+        fill_rates(database, args.rates)
+        os.environ["CURRENCIES_DB"] = str(database)
+
+        # Imported here so settings pick up the benchmark database.
+        from src.services.currencies_service import CurrenciesService
+        from src.services.exchange_matrix_service import ExchangeMatrixService
+        from src.services.exchange_service import ExchangeService
+        from src.utils.exceptions import RequestException
+
+        codes = [currency.code for currency in CurrenciesService().get_all().currencies]
+        pairs = [(base, target) for base in codes for target in codes if base != target]
+        exchange_service = ExchangeService()
+        matrix_service = ExchangeMatrixService()
+        print(f"{len(codes)} currencies, {args.rates} rates, {len(pairs)} pairs")
+
+        for label in ("get cold", "get warm"):
+            if label == "get cold":
+                exchange_service.rates_reset()
+            started = time.perf_counter()
+            for base, target in pairs:
+                try:
+                    exchange_service.get(base, target, 1)
+                except RequestException:
+                    pass
+            print(f"{label:>14}: {time.perf_counter() - started:8.3f}s")
+
+        matrix_service.rates_reset()
+        started = time.perf_counter()
+        matrix_service.get_matrix()
+        print(f"{'matrix build':>14}: {time.perf_counter() - started:8.3f}s")
+
+        started = time.perf_counter()
+        for base, target in pairs:
+            matrix_service.get_rate(base, target)
+        print(f"{'matrix lookups':>14}: {time.perf_counter() - started:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import http.client
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.load_test import free_port, start_server
+from benchmarks.synthetic import create_database, currencies_for_rates, fill_rates
+
+SIZES: tuple[int, ...] = (10, 100, 1_000, 10_000, 100_000)
+
+
+def measure(port: int, path: str, repeat: int) -> tuple[list[float], int]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    timings: list[float] = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = response.read()
+        timings.append(time.perf_counter() - started)
+        size = len(body)
+    connection.close()
+    return timings, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure /exchangeRates latency as the ExchangeRates table grows.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--path", default="/exchangeRates")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        create_database(database, currencies_for_rates(max(args.sizes)))
+
+        port = free_port()
+        server = start_server(port, workers=1, env={"CURRENCIES_DB": str(database)})
+        try:
+            print(f"GET {args.path}")
+            print(f"{'rates':>8} {'median ms':>10} {'min ms':>8} {'KiB':>8}")
+            for rates in sorted(args.sizes):
+                fill_rates(database, rates)
+                timings, size = measure(port, args.path, args.repeat)
+                print(f"{rates:>8} {statistics.median(timings) * 1e3:>10.1f} "
+                      f"{min(timings) * 1e3:>8.1f} {size / 1024:>8.0f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
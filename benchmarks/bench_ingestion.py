@@ -0,0 +1,71 @@
+import argparse
+import json
+import tempfile
+import urllib.request
+from pathlib import Path
+
+from benchmarks.feed_server import load_rates, start_feed
+from benchmarks.load_test import free_port, run_level, start_server
+from benchmarks.synthetic import create_database, currencies_for_rates, fill_rates
+
+FEED_RATES: tuple[float, ...] = (0, 1_000, 10_000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Read throughput while rates are ingested in the background, "
+                    "with the worker's lag and throughput.")
+    parser.add_argument("--rates", type=int, default=10_000)
+    parser.add_argument("--feed-rates", type=float, nargs="+", default=list(FEED_RATES),
+                        help="updates per second sent by the feed")
+    parser.add_argument("--source", choices=("generated", "http"), default="generated")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        create_database(database, currencies_for_rates(args.rates))
+        fill_rates(database, args.rates)
+        base, target, _ = load_rates(database)[0]
+        path = f"/exchange?from={base}&to={target}&amount=100"
+
+        print(f"{args.rates} rates, {args.source} feed, GET {path} with {args.clients} clients")
+        print(f"{'feed/s':>8} {'req/s':>10} {'applied/s':>10} {'batches':>8} "
+              f"{'batch ms':>9} {'lag ms':>8}")
+
+        for feed_rate in args.feed_rates:
+            env = {"CURRENCIES_DB": str(database)}
+            feed = None
+            if feed_rate:
+                env["CURRENCIES_INGEST_SOURCE"] = args.source
+                env["CURRENCIES_INGEST_POLL_INTERVAL"] = "0.1"
+                if args.source == "http":
+                    feed_port = free_port()
+                    feed = start_feed(database, feed_port, feed_rate)
+                    env["CURRENCIES_INGEST_URL"] = f"http://127.0.0.1:{feed_port}/rates"
+                else:
+                    env["CURRENCIES_INGEST_GENERATED_RATE"] = str(feed_rate)
+
+            port = free_port()
+            server = start_server(port, workers=16, env=env)
+            try:
+                rps, _ = run_level("127.0.0.1", port, path, args.clients, args.duration)
+                stats = {}
+                if feed_rate:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/admin/ingestion") as response:
+                        stats = json.loads(response.read())
+            finally:
+                server.terminate()
+                server.wait()
+                if feed is not None:
+                    feed.shutdown()
+                    feed.server_close()
+
+            print(f"{feed_rate:>8.0f} {rps:>10.1f} {stats.get('updatesPerSecond', 0):>10.0f} "
+                  f"{stats.get('batches', 0):>8} {stats.get('lastBatchSeconds', 0) * 1e3:>9.1f} "
+                  f"{stats.get('lastLagSeconds', 0) * 1e3:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
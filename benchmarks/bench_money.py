@@ -0,0 +1,61 @@
+import argparse
+import time
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+
+from src.utils import money
+
+
+def best_of(function, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Converting arrays of amounts: float multiply, per-item Decimal, "
+                    "per-item fixed-point and the vectorized fixed-point path, "
+                    "with each one's drift from the exact result.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--rate", type=float, default=0.912345678)
+    args = parser.parse_args()
+
+    conversion = money.Conversion(args.rate, 2, 2)
+    rate = Decimal(conversion.rate_fixed).scaleb(-conversion.rate_scale)
+    cent = Decimal("0.01")
+
+    print(f"rate {conversion.rate}, {conversion.rounding} rounding, amounts in cents")
+    print(f"{'size':>9} {'method':<12} {'seconds':>9} {'Mamounts/s':>11} {'off by a cent':>14}")
+
+    for size in args.sizes:
+        minor = np.random.default_rng(0).integers(1, 10**10, size)
+        amounts = [Decimal(int(value)).scaleb(-2) for value in minor]
+        exact = np.array([int((amount * rate).quantize(cent, ROUND_HALF_EVEN).scaleb(2))
+                          for amount in amounts], dtype=np.int64)
+
+        methods = {
+            "float": lambda: np.round(minor / 100 * conversion.rate, 2),
+            "decimal": lambda: [(amount * rate).quantize(cent, ROUND_HALF_EVEN) for amount in amounts],
+            "fixed": lambda: [conversion.apply(value) for value in minor.tolist()],
+            "fixed array": lambda: conversion.apply_array(minor),
+        }
+        results = {
+            "float": np.rint(methods["float"]() * 100).astype(np.int64),
+            "decimal": exact,
+            "fixed": np.array(methods["fixed"](), dtype=np.int64),
+            "fixed array": methods["fixed array"](),
+        }
+
+        for name, function in methods.items():
+            seconds = best_of(function, repeat=1 if size > 100_000 and name in ("decimal", "fixed") else 5)
+            off = int(np.count_nonzero(results[name] != exact))
+            print(f"{size:>9} {name:<12} {seconds:>9.4f} {size / seconds / 1e6:>11.2f} {off:>14}")
+
+
+if __name__ == "__main__":
+    main()
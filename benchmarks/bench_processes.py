@@ -0,0 +1,82 @@
+import argparse
+import json
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from benchmarks.bench_event_stream import proc_status
+from benchmarks.feed_server import load_rates
+from benchmarks.load_test import free_port, run_level, start_server
+from benchmarks.synthetic import create_database, currencies_for_rates, fill_rates
+
+PROCESSES: tuple[int, ...] = (1, 2, 4)
+
+
+def wait_for_workers(port: int, processes: int, timeout: float = 30.0) -> list[dict]:
+    # The port answers as soon as one worker is up; wait for all of them.
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/admin/workers") as response:
+            workers = json.load(response)
+        if sum(worker["state"] == "ready" for worker in workers) >= processes:
+            return workers
+        time.sleep(0.2)
+    raise RuntimeError(f"{processes} workers did not start")
+
+
+def workers_rss(port: int) -> float:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/admin/workers") as response:
+        return sum(worker["rssKb"] for worker in json.load(response)) / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Throughput of one server process against several sharing the "
+                    "port and the rate snapshot, for a few request paths.")
+    parser.add_argument("--rates", type=int, default=1000)
+    parser.add_argument("--processes", type=int, nargs="+", default=list(PROCESSES))
+    parser.add_argument("--workers", type=int, default=16, help="request threads per process")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        create_database(database, currencies_for_rates(args.rates))
+        fill_rates(database, args.rates)
+        base, target, _ = load_rates(database)[0]
+        paths = [f"/currency/{base}",
+                 f"/exchangeRate/{base}{target}",
+                 f"/exchange?from={base}&to={target}&amount=100",
+                 "/exchangeRates"]
+
+        # Warm caches would answer every request without the snapshot or
+        # SQLite; cold ones show what reading them costs.
+        for warm in (True, False):
+            print(f"{args.rates} rates, {args.clients} clients, caches {'warm' if warm else 'off'}, req/s")
+            print(f"{'processes':>9} {'rss MiB':>8} " + " ".join(f"{path[:24]:>24}" for path in paths))
+            for processes in args.processes:
+                env = {"CURRENCIES_DB": str(database),
+                       "CURRENCIES_WARM_CACHES": "1" if warm else "0"}
+                if not warm:
+                    env["CURRENCIES_CACHE_TTL"] = "0"
+                port = free_port()
+                server = start_server(port, args.workers, env=env, processes=processes)
+                try:
+                    if processes > 1:
+                        wait_for_workers(port, processes)
+                    results = [run_level("127.0.0.1", port, path, args.clients, args.duration)[0]
+                               for path in paths]
+                    rss = workers_rss(port) if processes > 1 \
+                        else int(proc_status(server.pid)["VmRSS"].split()[0]) / 1024
+                finally:
+                    server.terminate()
+                    server.wait()
+
+                print(f"{processes:>9} {rss:>8.1f} " + " ".join(f"{rps:>24.1f}" for rps in results))
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import create_database, currencies_for_rates, currency_pairs, fill_rates
+
+DAY = 86_400
+START = 1_262_304_000  # 2010-01-01
+
+AS_OF = """
+    select Rate rate from ExchangeRateHistory
+    where BaseCurrencyID = ? and TargetCurrencyID = ? and ValidFrom <= ?
+    order by ValidFrom desc
+    limit 1
+    """
+
+
+def fill_history(path: Path, pairs: list[tuple[int, int]], days: int) -> None:
+    connection = sqlite3.connect(path)
+    rng = random.Random(0)
+    for base, target in pairs:
+        rate = rng.uniform(0.01, 100)
+        rows = []
+        for day in range(days):
+            rate *= rng.uniform(0.99, 1.01)
+            rows.append((base, target, START + day * DAY, rate))
+        connection.executemany("insert or replace into ExchangeRateHistory values (?, ?, ?, ?)", rows)
+    connection.commit()
+    connection.close()
+
+
+def percentiles(timings: list[float]) -> str:
+    timings = sorted(timings)
+    return (f"median {statistics.median(timings) * 1e6:8.1f}us, "
+            f"p99 {timings[int(len(timings) * 0.99) - 1] * 1e6:8.1f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Point-in-time rate lookups over daily history: per-lookup SQL "
+                    "vs bisect over in-memory arrays, and /exchange?at= conversions.")
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    days = args.years * 365
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        currencies = currencies_for_rates(args.pairs)
+        create_database(database, currencies)
+        os.environ["CURRENCIES_DB"] = str(database)
+
+        # Imported here so settings pick up the benchmark database; starting
+        # DBManager applies the migrations that create the history table.
+        from src.model.dbmanager import DBManager
+        from src.services.currencies_service import CurrenciesService
+        from src.services.exchange_service import ExchangeService
+        from src.services.rate_history_service import RateHistoryService
+        from src.utils.exceptions import RequestException
+        DBManager()
+
+        # The current rates, on the same pairs as the history.
+        fill_rates(database, args.pairs)
+        pairs = currency_pairs(currencies, limit=args.pairs)
+        fill_history(database, pairs, days)
+
+        rng = random.Random(1)
+        lookups = [(*rng.choice(pairs), START + rng.randrange(days * DAY)) for _ in range(args.lookups)]
+        print(f"{args.pairs} pairs x {days} daily rates, {args.lookups} random lookups")
+
+        connection = sqlite3.connect(database)
+        timings = []
+        for lookup in lookups:
+            started = time.perf_counter()
+            connection.execute(AS_OF, lookup).fetchone()
+            timings.append(time.perf_counter() - started)
+        connection.close()
+        print(f"{'sql':>12}: {percentiles(timings)}")
+
+        service = RateHistoryService()
+        for label in ("bisect cold", "bisect warm"):
+            if label == "bisect cold":
+                service.invalidate()
+            timings = []
+            for base, target, at in lookups:
+                started = time.perf_counter()
+                service.get_series(base, target).at(at)
+                timings.append(time.perf_counter() - started)
+            print(f"{label:>12}: {percentiles(timings)}")
+
+        started = time.perf_counter()
+        service.invalidate()
+        for base, target in pairs:
+            service.get_series(base, target)
+        print(f"{'load':>12}: {(time.perf_counter() - started) / len(pairs) * 1e3:.2f}ms per pair")
+
+        # /exchange?at= between any two currencies, routed over the current
+        # graph with the rates of the time, the series loaded as at startup.
+        codes = {currency.id: currency.code for currency in CurrenciesService().get_all().currencies}
+        conversions = [(codes[rng.randint(1, currencies)], codes[rng.randint(1, currencies)], at)
+                       for _, _, at in lookups]
+        exchange_service = ExchangeService()
+        service.warm_up()
+        timings = []
+        for base, target, at in conversions:
+            started = time.perf_counter()
+            try:
+                exchange_service.get(base, target, 100, at)
+            except RequestException:
+                pass
+            timings.append(time.perf_counter() - started)
+        print(f"{'exchange at':>12}: {percentiles(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import create_database, currencies_for_rates, fill_rates
+from src.db.config_loader import load_migrations
+from src.model.dao import SELECT_EXCHANGE_RATES
+from src.model.dbmanager import apply_migrations
+
+LOOKUP = f"""
+    {SELECT_EXCHANGE_RATES}
+    where BaseCurrencyID = ? and TargetCurrencyID = ?
+    """
+
+
+def query_plan(connection: sqlite3.Connection) -> str:
+    rows = connection.execute(f"explain query plan {LOOKUP}", [1, 2]).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+
+def measure(connection: sqlite3.Connection, pairs: list[tuple[int, int]]) -> list[float]:
+    timings: list[float] = []
+    for pair in pairs:
+        started = time.perf_counter()
+        connection.execute(LOOKUP, pair).fetchone()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="ExchangeRates pair lookup plan and latency before and after migrations.")
+    parser.add_argument("--rates", type=int, default=120_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "bench.db"
+        currencies = currencies_for_rates(args.rates)
+        create_database(database, currencies)
+        fill_rates(database, args.rates)
+
+        rng = random.Random(0)
+        pairs = [(rng.randint(1, currencies), rng.randint(1, currencies)) for _ in range(args.lookups)]
+
+        connection = sqlite3.connect(database)
+        print(f"{args.rates} rates, {args.lookups} random pair lookups")
+
+        for label in ("before", "after"):
+            if label == "after":
+                apply_migrations(connection, load_migrations())
+
+            timings = measure(connection, pairs)
+            print(f"{label:>7}: {query_plan(connection)}")
+            print(f"{'':>7}  median {statistics.median(timings) * 1e6:.1f}us, "
+                  f"p99 {sorted(timings)[int(len(timings) * 0.99) - 1] * 1e6:.1f}us")
+
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
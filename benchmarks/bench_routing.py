@@ -0,0 +1,65 @@
+import argparse
+import timeit
+from typing import Callable
+
+from src.utils.fpath import FPath
+from src.utils.router import Router
+
+ROUTE_COUNTS: tuple[int, ...] = (9, 50, 200, 1000)
+
+
+def build_patterns(count: int) -> list[tuple[str, str]]:
+    # (fnmatch pattern, router pattern); the last one is the route being hit.
+    patterns = [(f"/resource{i}/*", f"/resource{i}/{{code}}") for i in range(count - 1)]
+    patterns.append(("/exchangeRate/*", "/exchangeRate/{pair}"))
+    return patterns
+
+
+def fpath_dispatcher(patterns: list[tuple[str, str]]) -> Callable[[str], str]:
+    fnmatch_patterns = [pattern for pattern, _ in patterns]
+
+    def dispatch(path: str) -> str:
+        fpath = FPath(path)
+        for pattern in fnmatch_patterns:
+            if fpath.match(pattern):
+                return pattern
+        raise LookupError(path)
+
+    return dispatch
+
+
+def router_dispatcher(patterns: list[tuple[str, str]]) -> Callable[[str], str]:
+    router = Router()
+    for _, pattern in patterns:
+        router.add("GET", pattern, pattern)
+
+    def dispatch(path: str) -> str:
+        route, _ = router.resolve("GET", path)
+        return route.handler
+
+    return dispatch
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-request dispatch cost of linear FPath matching vs the compiled Router.")
+    parser.add_argument("--routes", type=int, nargs="+", default=list(ROUTE_COUNTS))
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--path", default="/exchangeRate/USDRUB")
+    args = parser.parse_args()
+
+    print(f"GET {args.path} (matches the last registered route)")
+    print(f"{'routes':>7} {'fpath us':>10} {'router us':>10} {'speedup':>8}")
+    for count in args.routes:
+        patterns = build_patterns(count)
+        timings = []
+        for make_dispatcher in (fpath_dispatcher, router_dispatcher):
+            dispatch = make_dispatcher(patterns)
+            dispatch(args.path)
+            seconds = min(timeit.repeat(lambda: dispatch(args.path), number=args.number, repeat=5))
+            timings.append(seconds / args.number * 1e6)
+        print(f"{count:>7} {timings[0]:>10.2f} {timings[1]:>10.2f} {timings[0] / timings[1]:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
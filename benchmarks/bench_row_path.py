@@ -0,0 +1,83 @@
+import argparse
+import timeit
+import tracemalloc
+from typing import Callable
+
+try:
+    import pandas as pd
+    from adaptix import Retort
+except ImportError:
+    pd = None
+
+from src.dto.currencies import CurrencyDTO
+from src.model.dbmanager import DBManager
+from src.services.currencies_service import CurrenciesService
+
+SELECT_CURRENCY = """
+    select ID id , FullName name, Code code, Sign sign
+    from currencies
+    where code = ?
+    """
+
+_retort = Retort() if pd is not None else None
+
+
+def dataframe_lookup(code: str) -> CurrencyDTO:
+    # The read path as it was before rows were returned as plain dicts:
+    # cursor -> DataFrame -> records -> Retort.
+    if pd is None:
+        raise ImportError("pandas and adaptix are required for the DataFrame path")
+
+    with DBManager()._pool.connection() as connection:
+        result = connection.execute(SELECT_CURRENCY, [code])
+        rows = tuple(result.fetchall())
+        col_names = tuple(str(i[0]).lower() for i in result.description)
+
+    currency_data = pd.DataFrame(data=rows, columns=col_names)
+    currency_dict = currency_data.to_dict(orient="records")[0]
+    return _retort.load(currency_dict, CurrencyDTO)
+
+
+def row_lookup(code: str) -> CurrencyDTO:
+    return CurrenciesService().get_one(currency_code=code)
+
+
+def measure(lookup: Callable[[str], CurrencyDTO], code: str, number: int) -> tuple[float, int, int]:
+    lookup(code)
+
+    seconds = min(timeit.repeat(lambda: lookup(code), number=number, repeat=5))
+    per_lookup_us = seconds / number * 1e6
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    lookup(code)
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    allocated_blocks = sum(stat.count_diff
+                           for stat in snapshot_after.compare_to(snapshot_before, "filename")
+                           if stat.count_diff > 0)
+
+    return per_lookup_us, peak, allocated_blocks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare single-currency lookup cost of the DataFrame and row read paths.")
+    parser.add_argument("--code", default="USD")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'path':>10} {'us/lookup':>10} {'peak KiB':>9} {'blocks':>7}")
+    for name, lookup in (("dataframe", dataframe_lookup), ("rows", row_lookup)):
+        try:
+            per_lookup_us, peak, blocks = measure(lookup, args.code, args.number)
+        except ImportError as err:
+            print(f"{name:>10} skipped: {err}")
+            continue
+        print(f"{name:>10} {per_lookup_us:>10.1f} {peak / 1024:>9.1f} {blocks:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import statistics
+import time
+from typing import Callable
+
+from benchmarks.synthetic import currency_codes, currency_pairs, currencies_for_rates
+from src.dto.currencies import CurrencyDTO
+from src.dto.exchange_rates import ExchangeRateDTO, ExchangeRatesDTO
+from src.utils.serializer import SERIALIZERS, Serializer
+
+
+def make_rates(count: int) -> ExchangeRatesDTO:
+    # Fresh CurrencyDTOs on every call, so their encoded cache starts empty.
+    currency_count = currencies_for_rates(count)
+    currencies = [CurrencyDTO(id=index, name=f"Currency {code}", code=code, sign="¤")
+                  for index, code in enumerate(currency_codes(currency_count), start=1)]
+
+    return ExchangeRatesDTO([
+        ExchangeRateDTO(id=index,
+                        baseCurrency=currencies[base - 1],
+                        targetCurrency=currencies[target - 1],
+                        rate=1 + index / 7)
+        for index, (base, target) in enumerate(currency_pairs(currency_count)[:count], start=1)
+    ])
+
+
+def dicts_and_json_dumps(exchange_rates: ExchangeRatesDTO) -> bytes:
+    # What responses did before: build nested dicts, json.dumps each item.
+    return ("[" + ", ".join(json.dumps(item) for item in exchange_rates.iter_json()) + "]").encode("utf-8")
+
+
+def encoded_with(serializer: Serializer) -> Callable[[ExchangeRatesDTO], bytes]:
+    def encode(exchange_rates: ExchangeRatesDTO) -> bytes:
+        return b"[" + b",".join(exchange_rates.iter_encoded(serializer)) + b"]"
+    return encode
+
+
+def measure(encode: Callable[[ExchangeRatesDTO], bytes], count: int,
+            repeat: int, warm: bool) -> tuple[float, int]:
+    timings: list[float] = []
+    size = 0
+    exchange_rates = make_rates(count)
+    for _ in range(repeat):
+        if not warm:
+            exchange_rates = make_rates(count)
+        started = time.perf_counter()
+        size = len(encode(exchange_rates))
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serialization throughput of an exchange rates payload per JSON backend.")
+    parser.add_argument("--rates", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    candidates: dict[str, Callable[[ExchangeRatesDTO], bytes]] = {
+        "tojson + json.dumps": dicts_and_json_dumps,
+    }
+    for name, serializer_class in SERIALIZERS.items():
+        try:
+            candidates[name] = encoded_with(serializer_class())
+        except ImportError:
+            print(f"{name}: not installed, skipped")
+
+    print(f"{args.rates} exchange rates, median of {args.repeat}")
+    print(f"{'backend':>20} {'cache':>6} {'ms':>8} {'rates/s':>10} {'MB/s':>7}")
+    for name, encode in candidates.items():
+        for warm in (False, True):
+            seconds, size = measure(encode, args.rates, args.repeat, warm)
+            print(f"{name:>20} {'warm' if warm else 'cold':>6} {seconds * 1e3:>8.2f} "
+                  f"{args.rates / seconds:>10.0f} {size / seconds / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
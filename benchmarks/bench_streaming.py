@@ -0,0 +1,79 @@
+import argparse
+import http.client
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.load_test import free_port, start_server
+from benchmarks.synthetic import create_database, currencies_for_rates, fill_rates
+
+SIZES: tuple[int, ...] = (1_000, 10_000, 100_000)
+
+MODES: dict[str, dict[str, str]] = {
+    # One chunk larger than any payload behaves like the old fully
+    # materialized response.
+    "buffered": {"CURRENCIES_STREAM_CHUNK_SIZE": str(1 << 40)},
+    "streamed": {},
+}
+
+
+def peak_rss_kib(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def fetch(port: int, path: str) -> tuple[float, float, int]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+    started = time.perf_counter()
+    connection.request("GET", path)
+    response = connection.getresponse()
+    response.read(1)
+    first_byte = time.perf_counter() - started
+    size = 1 + len(response.read())
+    total = time.perf_counter() - started
+    connection.close()
+    return first_byte, total, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Time-to-first-byte and server peak RSS for /exchangeRates, "
+                    "buffered vs streamed.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--path", default="/exchangeRates")
+    args = parser.parse_args()
+
+    print(f"GET {args.path}")
+    print(f"{'mode':>9} {'rates':>8} {'ttfb ms':>9} {'total ms':>9} {'KiB':>7} {'peak RSS KiB':>13}")
+
+    for mode, env in MODES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / "bench.db"
+            create_database(database, currencies_for_rates(max(args.sizes)))
+
+            port = free_port()
+            server = start_server(port, workers=1, env={"CURRENCIES_DB": str(database),
+                                                        "CURRENCIES_WARM_CACHES": "0",
+                                                        "CURRENCIES_CACHE_COLLECTION_MAX_ROWS": "0",
+                                                        **env})
+            try:
+                for rates in sorted(args.sizes):
+                    fill_rates(database, rates)
+                    first_byte, total, size = fetch(port, args.path)
+                    peak = peak_rss_kib(server.pid)
+                    print(f"{mode:>9} {rates:>8} {first_byte * 1e3:>9.1f} {total * 1e3:>9.1f} "
+                          f"{size / 1024:>7.0f} {peak if peak is not None else '-':>13}")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
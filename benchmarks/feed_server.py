@@ -0,0 +1,94 @@
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    # Every poll returns the rates that moved since the previous one, at
+    # server.updates_per_second, as a JSON array.
+    server: "FeedServer"
+
+    def do_GET(self) -> None:
+        body = json.dumps(self.server.take_updates()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{self.server.polls}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class FeedServer(ThreadingHTTPServer):
+    # A local stand-in for a rate provider, walking the rates of a database.
+    daemon_threads = True
+
+    def __init__(self, address, rates: list[tuple[str, str, float]],
+                 updates_per_second: float, seed: int = 0) -> None:
+        super().__init__(address, FeedHandler)
+        self.rates = [list(rate) for rate in rates]
+        self.updates_per_second = updates_per_second
+        self.polls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._last_poll = time.monotonic()
+
+    def take_updates(self) -> list[dict]:
+        with self._lock:
+            now = time.monotonic()
+            count = int((now - self._last_poll) * self.updates_per_second)
+            self._last_poll = now
+            self.polls += 1
+
+            updates = []
+            for _ in range(count):
+                rate = self._random.choice(self.rates)
+                rate[2] *= self._random.uniform(0.999, 1.001)
+                updates.append({"base": rate[0], "target": rate[1], "rate": rate[2], "at": int(time.time())})
+            return updates
+
+
+def load_rates(database: Path) -> list[tuple[str, str, float]]:
+    connection = sqlite3.connect(database)
+    rates = connection.execute("""
+        select b.Code, t.Code, cast(er.Rate as real)
+        from ExchangeRates er
+        join Currencies b on b.ID = er.BaseCurrencyID
+        join Currencies t on t.ID = er.TargetCurrencyID
+        """).fetchall()
+    connection.close()
+    return rates
+
+
+def start_feed(database: Path, port: int, updates_per_second: float) -> FeedServer:
+    server = FeedServer(("127.0.0.1", port), load_rates(database), updates_per_second)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve random-walk updates of a database's rates for the http rate source.")
+    parser.add_argument("database", type=Path)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--updates-per-second", type=float, default=100)
+    args = parser.parse_args()
+
+    server = FeedServer(("127.0.0.1", args.port), load_rates(args.database), args.updates_per_second)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CONCURRENCY_LEVELS: tuple[int, ...] = (1, 8, 64)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_server(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on {host}:{port} did not start")
+
+
+def start_server(port: int, workers: int,
+                 env: Optional[dict[str, str]] = None, processes: int = 1) -> subprocess.Popen:
+    env = dict(os.environ, CURRENCIES_ACCESS_LOG="0", **(env or {}))
+    process = subprocess.Popen([sys.executable, "-m", "src.controller.server",
+                                "--host", "127.0.0.1",
+                                "--port", str(port),
+                                "--workers", str(workers),
+                                "--processes", str(processes)],
+                               cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL)
+    _wait_for_server("127.0.0.1", port)
+    return process
+
+
+def _client(host: str, port: int, path: str, stop: threading.Event,
+            counts: list[int], errors: list[int], index: int) -> None:
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    while not stop.is_set():
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.will_close:
+                connection.close()
+            counts[index] += 1
+        except (OSError, http.client.HTTPException):
+            errors[index] += 1
+            connection.close()
+    connection.close()
+
+
+def run_level(host: str, port: int, path: str,
+              clients: int, duration: float) -> tuple[float, int]:
+    stop = threading.Event()
+    counts = [0] * clients
+    errors = [0] * clients
+    threads = [threading.Thread(target=_client,
+                                args=(host, port, path, stop, counts, errors, i),
+                                daemon=True)
+               for i in range(clients)]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return sum(counts) / elapsed, sum(errors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure requests/sec at several client concurrency levels. "
+                    "Starts a local server unless --url is given.")
+    parser.add_argument("--url", help="target an already running server, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/exchangeRates")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, nargs="+", default=list(CONCURRENCY_LEVELS))
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        target = urlparse(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        server = start_server(port, args.workers)
+
+    try:
+        print(f"GET {args.path}  duration={args.duration}s")
+        print(f"{'clients':>8} {'req/s':>10} {'errors':>8}")
+        for clients in args.clients:
+            rps, errors = run_level(host, port, args.path, clients, args.duration)
+            print(f"{clients:>8} {rps:>10.1f} {errors:>8}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
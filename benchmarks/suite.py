@@ -0,0 +1,405 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from benchmarks.load_test import ROOT, free_port, run_level, start_server
+from benchmarks.synthetic import MAX_CURRENCIES, create_database, fill_rates
+
+SIZES: tuple[int, ...] = (10, 1_000, 100_000)
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+Result = dict[str, Any]
+
+
+@dataclass
+class Benchmark:
+    group: str
+    name: str
+    func: Callable[[], Any]
+    # Run untimed before every round, e.g. to drop caches for a cold run.
+    setup: Optional[Callable[[], Any]] = None
+
+
+def time_benchmark(benchmark: Benchmark, min_time: float,
+                   min_rounds: int = 3, max_rounds: int = 100_000) -> Result:
+    timings: list[float] = []
+    budget_started = time.perf_counter()
+
+    while len(timings) < max_rounds and (len(timings) < min_rounds or
+                                         time.perf_counter() - budget_started < min_time):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        started = time.perf_counter()
+        benchmark.func()
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return {"group" : benchmark.group,
+            "name" : benchmark.name,
+            "rounds" : len(timings),
+            "min" : timings[0],
+            "median" : statistics.median(timings),
+            "mean" : statistics.fmean(timings),
+            "stdev" : statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "p95" : timings[max(0, int(len(timings) * 0.95) - 1)]}
+
+
+def consume(iterator) -> int:
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def build_database(path: Path, size: int) -> None:
+    # "size" currencies (as many as three-letter codes allow) and size rates.
+    create_database(path, max(2, min(size, MAX_CURRENCIES)))
+    fill_rates(path, size)
+
+
+# In-process benchmarks. They run in a worker subprocess per database,
+# because DBManager and the services are singletons bound to one database.
+
+def _find_pairs(app) -> dict[str, tuple[str, str]]:
+    from src.utils.exceptions import RequestException
+
+    db_manager = app.db_manager
+    pairs: dict[str, tuple[str, str]] = {}
+    join = """
+        from ExchangeRates er
+        join Currencies b on b.ID = er.BaseCurrencyID
+        join Currencies t on t.ID = er.TargetCurrencyID
+        """
+
+    direct = db_manager.execute_query_one(f"select b.Code base, t.Code target {join} order by er.ID")
+    if direct is not None:
+        pairs["direct"] = (direct["base"], direct["target"])
+
+    inverse = db_manager.execute_query_one(f"""
+        select b.Code base, t.Code target {join}
+        where not exists (select 1 from ExchangeRates r
+                          where r.BaseCurrencyID = er.TargetCurrencyID
+                          and r.TargetCurrencyID = er.BaseCurrencyID)
+        order by er.ID
+        """)
+    if inverse is not None:
+        pairs["inverse"] = (inverse["target"], inverse["base"])
+
+    codes = [row["code"] for row in db_manager.execute_query("select Code code from Currencies")]
+    linked = {(row["base"], row["target"])
+              for row in db_manager.execute_query(f"select b.Code base, t.Code target {join}")}
+    rng = random.Random(0)
+    for _ in range(500):
+        base, target = rng.sample(codes, 2)
+        if (base, target) in linked or (target, base) in linked:
+            continue
+        try:
+            app.exchange_service.get(base, target, 1.0)
+        except RequestException:
+            continue
+        pairs["cross"] = (base, target)
+        break
+
+    return pairs
+
+
+def in_process_benchmarks(app) -> list[Benchmark]:
+    import numpy as np
+
+    from src.model.dao import (CurrenciesDAO, ExchangeRatesDAO, SELECT_CURRENCIES,
+                               SELECT_EXCHANGE_RATES)
+    from src.model.snapshot import RateSnapshot, write_snapshot
+    from src.utils import settings
+
+    db_manager = app.db_manager
+    currencies_dao, exchange_rates_dao = CurrenciesDAO(), ExchangeRatesDAO()
+    currencies_service = app.currencies_service
+    exchange_rates_service = app.exchange_rates_service
+    exchange_service = app.exchange_service
+    matrix_service = app.exchange_matrix_service
+    controller = app.controller
+
+    pairs = _find_pairs(app)
+    base_code, target_code = pairs["direct"]
+    bulk_amounts = np.random.default_rng(0).integers(1, 10**9, 100_000)
+    base = currencies_service.get_one(currency_code=base_code)
+    target = currencies_service.get_one(currency_code=target_code)
+
+    # Written next to the database, which lives in the run's temporary
+    # directory; not published, so the DAOs above keep reading SQLite.
+    snapshot_path = settings.DB_PATH.with_suffix(".snapshot")
+    currency_rows, rate_rows = currencies_dao.get_all(), exchange_rates_dao.get_all()
+    write_snapshot(snapshot_path, 1, currency_rows, rate_rows)
+    snapshot = RateSnapshot(snapshot_path)
+
+    def drop_caches() -> None:
+        currencies_service.invalidate()
+        exchange_rates_service.invalidate()
+
+    benchmarks = [
+        Benchmark("db", "DBManager.execute_query currencies",
+                  lambda: db_manager.execute_query(SELECT_CURRENCIES)),
+        Benchmark("db", "DBManager.execute_query exchange rates",
+                  lambda: db_manager.execute_query(SELECT_EXCHANGE_RATES)),
+        Benchmark("db", "DBManager.execute_query_one currency",
+                  lambda: db_manager.execute_query_one(f"{SELECT_CURRENCIES} where Code = ?", [base_code])),
+
+        Benchmark("dao", "CurrenciesDAO.get_all", currencies_dao.get_all),
+        Benchmark("dao", "CurrenciesDAO.get_one", lambda: currencies_dao.get_one(code=base_code)),
+        Benchmark("dao", "CurrenciesDAO.iter_all prefix",
+                  lambda: consume(currencies_dao.iter_all(code_prefix=base_code[:2]))),
+        Benchmark("dao", "CurrenciesDAO.iter_all page",
+                  lambda: consume(currencies_dao.iter_all(limit=100))),
+        Benchmark("dao", "ExchangeRatesDAO.get_all", exchange_rates_dao.get_all),
+        Benchmark("dao", "ExchangeRatesDAO.get_one",
+                  lambda: exchange_rates_dao.get_one(base.id, target.id)),
+        Benchmark("dao", "ExchangeRatesDAO.iter_all_with_currencies",
+                  lambda: consume(exchange_rates_dao.iter_all_with_currencies())),
+        Benchmark("dao", "ExchangeRatesDAO.iter_all_with_currencies base",
+                  lambda: consume(exchange_rates_dao.iter_all_with_currencies(base_currency_id=base.id))),
+        Benchmark("dao", "ExchangeRatesDAO.iter_all_with_currencies page",
+                  lambda: consume(exchange_rates_dao.iter_all_with_currencies(limit=100))),
+
+        Benchmark("snapshot", "write_snapshot",
+                  lambda: write_snapshot(snapshot_path.with_suffix(".bench"), 1, currency_rows, rate_rows)),
+        Benchmark("snapshot", "RateSnapshot.currency", lambda: snapshot.currency(code=base_code)),
+        Benchmark("snapshot", "RateSnapshot.rate", lambda: snapshot.rate(base.id, target.id)),
+        Benchmark("snapshot", "RateSnapshot.rates_with_currencies", snapshot.rates_with_currencies),
+
+        Benchmark("service", "CurrenciesService.get_one cold",
+                  lambda: currencies_service.get_one(currency_code=base_code), drop_caches),
+        Benchmark("service", "CurrenciesService.get_one warm",
+                  lambda: currencies_service.get_one(currency_code=base_code)),
+        Benchmark("service", "CurrenciesService.get_all cold", currencies_service.get_all, drop_caches),
+        Benchmark("service", "CurrenciesService.get_all warm", currencies_service.get_all),
+        Benchmark("service", "CurrenciesService.get_page",
+                  lambda: currencies_service.get_page(100)),
+        Benchmark("service", "ExchangeRatesService.get_one cold",
+                  lambda: exchange_rates_service.get_one(base_code, target_code), drop_caches),
+        Benchmark("service", "ExchangeRatesService.get_one warm",
+                  lambda: exchange_rates_service.get_one(base_code, target_code)),
+        Benchmark("service", "ExchangeRatesService.get_all cold",
+                  exchange_rates_service.get_all, drop_caches),
+        Benchmark("service", "ExchangeRatesService.get_all warm", exchange_rates_service.get_all),
+        Benchmark("service", "ExchangeRatesService.get_page",
+                  lambda: exchange_rates_service.get_page(100)),
+        Benchmark("service", "ExchangeRatesService.iter_all base",
+                  lambda: consume(exchange_rates_service.iter_all(base_currency_code=base_code))),
+    ]
+
+    for kind, (from_code, to_code) in pairs.items():
+        benchmarks.append(Benchmark("exchange", f"ExchangeService.get {kind}",
+                                    lambda f=from_code, t=to_code: exchange_service.get(f, t, 100.0)))
+    benchmarks += [
+        Benchmark("exchange", "ExchangeService.get direct cold graph",
+                  lambda: exchange_service.get(base_code, target_code, 100.0),
+                  exchange_service.rates_reset),
+        Benchmark("exchange", "ExchangeService.get direct at",
+                  lambda: exchange_service.get(base_code, target_code, 100.0, at=int(time.time()))),
+        Benchmark("exchange", "ExchangeService.get_batch 1000",
+                  lambda: exchange_service.get_batch(
+                      [{"from": f, "to": t, "amount": 1.5}
+                       for f, t in list(pairs.values()) * (1000 // len(pairs))])),
+        Benchmark("exchange", "ExchangeService.convert_many 100000",
+                  lambda: exchange_service.convert_many(base_code, target_code, bulk_amounts)),
+
+        Benchmark("controller", "perform GET /currency/{code}",
+                  lambda: controller.perform("GET", f"/currency/{base_code}")),
+        Benchmark("controller", "perform GET /exchangeRates?limit=100",
+                  lambda: consume(controller.perform("GET", "/exchangeRates?limit=100").body or ())),
+        Benchmark("controller", "perform GET /exchangeRates",
+                  lambda: consume(controller.perform("GET", "/exchangeRates").body or ())),
+    ]
+
+    currencies = len(currencies_dao.get_all())
+    if currencies <= settings.EXCHANGE_MATRIX_MAX_CURRENCIES:
+        benchmarks += [
+            Benchmark("exchange", "ExchangeMatrixService.get_matrix cold",
+                      matrix_service.get_matrix, matrix_service.rates_reset),
+            Benchmark("exchange", "ExchangeMatrixService.get_matrix warm", matrix_service.get_matrix),
+        ]
+
+    return benchmarks
+
+
+def run_worker(size: int, min_time: float, output: Path, pairs_output: Path) -> None:
+    from src.controller.application import Application
+
+    app = Application()
+    app.startup()
+
+    benchmarks = in_process_benchmarks(app)
+    results: list[Result] = []
+    for benchmark in benchmarks:
+        result = time_benchmark(benchmark, min_time)
+        result["size"] = size
+        results.append(result)
+        print(f"  {result['group']:>10} {result['name']:<52} "
+              f"{result['median'] * 1e6:>12.1f}us  ({result['rounds']} rounds)", file=sys.stderr)
+
+    output.write_text(json.dumps(results), encoding="utf-8")
+    pairs_output.write_text(json.dumps(_find_pairs(app)), encoding="utf-8")
+    app.shutdown()
+
+
+# End-to-end HTTP benchmarks against a locally started server.
+
+def http_benchmarks(database: Path, size: int, pairs: dict[str, list[str]],
+                    clients: list[int], duration: float, workers: int) -> list[Result]:
+    base_code, target_code = pairs["direct"]
+    paths = ["/currencies",
+             f"/currency/{base_code}",
+             "/exchangeRates?limit=100",
+             "/exchangeRates",
+             f"/exchangeRate/{base_code}{target_code}"]
+    paths += [f"/exchange?from={f}&to={t}&amount=100" for f, t in pairs.values()]
+
+    results: list[Result] = []
+    port = free_port()
+    server = start_server(port, workers, env={"CURRENCIES_DB": str(database)})
+    try:
+        for path in paths:
+            for level in clients:
+                rps, errors = run_level("127.0.0.1", port, path, level, duration)
+                results.append({"size" : size, "group" : "http", "name" : f"GET {path}",
+                                "clients" : level, "rps" : rps, "errors" : errors})
+                print(f"  {'http':>10} {'GET ' + path:<52} {level:>3} clients "
+                      f"{rps:>10.1f} req/s", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return results
+
+
+def git_revision() -> dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    try:
+        return {"commit" : git("rev-parse", "HEAD"),
+                "dirty" : bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit" : None, "dirty" : None}
+
+
+def run_suite(args: argparse.Namespace) -> Path:
+    revision = git_revision()
+    results: list[Result] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            database = Path(tmp) / f"bench-{size}.db"
+            print(f"size {size}: building database", file=sys.stderr)
+            build_database(database, size)
+
+            output, pairs_output = Path(tmp) / f"results-{size}.json", Path(tmp) / f"pairs-{size}.json"
+            subprocess.run([sys.executable, "-m", "benchmarks.suite", "--worker",
+                            "--size", str(size), "--min-time", str(args.min_time),
+                            "--worker-output", str(output), "--worker-pairs", str(pairs_output)],
+                           cwd=ROOT, env=dict(os.environ, CURRENCIES_DB=str(database)),
+                           stdout=subprocess.DEVNULL, check=True)
+            results += json.loads(output.read_text(encoding="utf-8"))
+
+            if not args.skip_http:
+                pairs = json.loads(pairs_output.read_text(encoding="utf-8"))
+                results += http_benchmarks(database, size, pairs, args.clients,
+                                           args.http_duration, args.workers)
+
+    report = {"meta" : {**revision,
+                        "timestamp" : datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                        "python" : platform.python_version(),
+                        "platform" : platform.platform(),
+                        "sizes" : args.sizes,
+                        "min_time" : args.min_time},
+              "results" : results}
+
+    output = args.output
+    if output is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{(revision['commit'] or 'unknown')[:10]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=1), encoding="utf-8")
+
+    return output
+
+
+def _key(result: Result) -> tuple:
+    return result["size"], result["group"], result["name"], result.get("clients")
+
+
+def compare(baseline_path: Path, current_path: Path, threshold: float) -> int:
+    # Medians for in-process timings, req/s for HTTP; a change worse than
+    # the threshold is flagged and makes the exit status non-zero.
+    baseline = {_key(result): result for result in json.loads(baseline_path.read_text())["results"]}
+    current = json.loads(current_path.read_text())["results"]
+
+    regressions = 0
+    print(f"{'size':>7} {'benchmark':<70} {'before':>15} {'after':>15} {'change':>8}")
+    for result in current:
+        before = baseline.get(_key(result))
+        if before is None:
+            continue
+
+        name = result["name"] + (f" x{result['clients']}" if result.get("clients") else "")
+        if "rps" in result:
+            old, new, unit = before["rps"], result["rps"], "req/s"
+            change = old / new - 1 if new else float("inf")
+        else:
+            old, new, unit = before["median"] * 1e6, result["median"] * 1e6, "us"
+            change = new / old - 1 if old else float("inf")
+
+        flag = " !" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"{result['size']:>7} {name:<70} {old:>9.1f} {unit:<5} {new:>9.1f} {unit:<5} "
+              f"{change:>+7.0%}{flag}")
+
+    print(f"{regressions} regression(s) worse than {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark every layer, from DBManager to HTTP, on synthetic databases "
+                    "and save the results as JSON.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="currencies (capped at three-letter codes) and rates per database")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="seconds to spend per in-process benchmark")
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--http-duration", type=float, default=2.0)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-pairs", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    if args.worker:
+        run_worker(args.size, args.min_time, args.worker_output, args.worker_pairs)
+        return
+
+    print(f"results saved to {run_suite(args)}")
+
+
+if __name__ == "__main__":
+    main()
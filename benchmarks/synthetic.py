@@ -0,0 +1,88 @@
+import itertools
+import random
+import sqlite3
+import string
+from pathlib import Path
+from typing import Optional
+
+from src.db.config_loader import load_tables_config
+
+SEED = 20250128
+
+# Every three-letter code; more currencies than this cannot be addressed.
+MAX_CURRENCIES = 26 ** 3
+# Up to this many possible pairs all of them are shuffled; beyond it pairs
+# are sampled instead, so large currency counts stay cheap.
+SHUFFLE_MAX_PAIRS = 200_000
+
+
+def currency_codes(count: int) -> list[str]:
+    codes = ("".join(letters) for letters in itertools.product(string.ascii_uppercase, repeat=3))
+    return list(itertools.islice(codes, count))
+
+
+def currency_pairs(currencies: int, seed: int = SEED,
+                   limit: Optional[int] = None) -> list[tuple[int, int]]:
+    # Deterministic for a given seed: a shorter limit yields a prefix of a
+    # longer one, which fill_rates relies on to grow a table in steps.
+    total = currencies * (currencies - 1)
+    rng = random.Random(seed)
+
+    if total <= SHUFFLE_MAX_PAIRS:
+        pairs = [(base, target)
+                 for base in range(1, currencies + 1)
+                 for target in range(1, currencies + 1)
+                 if base != target]
+        rng.shuffle(pairs)
+        return pairs[:limit] if limit is not None else pairs
+
+    if limit is None or limit > total:
+        raise ValueError(f"{currencies} currencies need a limit of at most {total} pairs")
+
+    seen: set[tuple[int, int]] = set()
+    pairs = []
+    while len(pairs) < limit:
+        pair = (rng.randint(1, currencies), rng.randint(1, currencies))
+        if pair[0] != pair[1] and pair not in seen:
+            seen.add(pair)
+            pairs.append(pair)
+    return pairs
+
+
+def currencies_for_rates(rates: int) -> int:
+    currencies = 2
+    while currencies * (currencies - 1) < rates:
+        currencies += 1
+    return currencies
+
+
+def create_database(path: Path, currencies: int) -> None:
+    path = Path(path)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+    connection = sqlite3.connect(path)
+    for table_config in load_tables_config():
+        connection.execute(f"create table {table_config.name} ({table_config.columns_data})")
+
+    connection.executemany("insert into Currencies (Code, FullName, Sign) values (?, ?, ?)",
+                           [(code, f"Currency {code}", code[0]) for code in currency_codes(currencies)])
+    connection.commit()
+    connection.close()
+
+
+def fill_rates(path: Path, rates: int, seed: int = SEED) -> None:
+    connection = sqlite3.connect(path)
+    currencies: int = connection.execute("select count(*) from Currencies").fetchone()[0]
+    existing: int = connection.execute("select count(*) from ExchangeRates").fetchone()[0]
+
+    pairs = currency_pairs(currencies, seed, limit=min(rates, currencies * (currencies - 1)))[existing:rates]
+    if existing + len(pairs) < rates:
+        raise ValueError(f"{currencies} currencies allow at most {existing + len(pairs)} rates")
+
+    rng = random.Random(seed + existing)
+    connection.executemany("insert into ExchangeRates (BaseCurrencyID, TargetCurrencyID, Rate) "
+                           "values (?, ?, ?)",
+                           [(base, target, round(rng.uniform(0.01, 100), 6)) for base, target in pairs])
+    connection.commit()
+    connection.close()
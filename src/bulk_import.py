@@ -0,0 +1,34 @@
+import argparse
+from pathlib import Path
+
+from src.dto.imports import ImportReportDTO
+from src.services.import_service import ImportService
+from src.utils import settings
+
+
+def print_report(report: ImportReportDTO, max_errors: int) -> None:
+    print(f"{report.kind}: read {report.rows_read}, imported {report.rows_imported}, "
+          f"failed {len(report.errors)} in {report.seconds:.2f}s "
+          f"({report.rows_per_second:.0f} rows/s)")
+
+    for error in report.errors[:max_errors]:
+        print(f"  line {error.line}: {error.message}")
+    if len(report.errors) > max_errors:
+        print(f"  ... {len(report.errors) - max_errors} more errors")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import currencies, exchange rates "
+                                                 "or exchange rate history")
+    parser.add_argument("kind", choices=("currencies", "rates", "history"))
+    parser.add_argument("path", type=Path, help=".csv, .json or .ndjson file")
+    parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE)
+    parser.add_argument("--max-errors", type=int, default=50)
+    args = parser.parse_args()
+
+    report = ImportService().import_file(args.kind, args.path, args.chunk_size)
+    print_report(report, args.max_errors)
+
+
+if __name__ == "__main__":
+    main()
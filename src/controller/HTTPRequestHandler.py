@@ -1,33 +1,107 @@
-from http.server import SimpleHTTPRequestHandler, HTTPServer
-from urllib.parse import parse_qs, urlparse
+from http.server import SimpleHTTPRequestHandler
+from typing import Optional
 
 from src.controller.controller import Controller
-
 from src.dto.httpresponse import HTTPResponseData, HTTPHeaderDTO
-import json
+from src.utils import metrics, profiling, settings
+
 
 class HTTPRequestHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = settings.KEEP_ALIVE_TIMEOUT
+    disable_nagle_algorithm = True
+
     def __init__(self, *args, **kwargs) -> None:
-        self.controller = Controller()
+        self._requests_served: int = 0
         super().__init__(*args, **kwargs)
 
+    @property
+    def controller(self) -> Controller:
+        return self.server.app.controller
+
     def _send_http_response(self, response: HTTPResponseData) -> None:
+        if response.stream is not None:
+            self._start_event_stream(response)
+            return
+
+        self._requests_served += 1
+        self.server.count_request()
+        if self._requests_served >= settings.KEEP_ALIVE_MAX_REQUESTS or self.server.draining:
+            response.add_header("Connection", "close")
+
+        if response.body is not None:
+            self._send_streamed_response(response)
+            return
+
+        self.send_response(response.code)
+        self._send_headers(response.headers)
+        self.wfile.write(response.message)
+
+    def _start_event_stream(self, response: HTTPResponseData) -> None:
+        # Only the headers are written here. The socket then belongs to the
+        # event stream, and this worker goes back to the pool.
+        self.close_connection = True
+        self.send_response(response.code)
+        self._send_headers(response.headers)
+
+        stream = response.stream
+        self.server.detach(self.request)
+        self.server.app.event_stream.attach(self.request, stream.currencies, stream.last_event_id)
+
+    def _send_streamed_response(self, response: HTTPResponseData) -> None:
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            response.add_header("Transfer-Encoding", "chunked")
+        else:
+            response.add_header("Connection", "close")
 
         self.send_response(response.code)
         self._send_headers(response.headers)
-        self.wfile.write(response.message.encode('utf-8'))
+
+        try:
+            for chunk in response.body:
+                if not chunk:
+                    continue
+                if chunked:
+                    self.wfile.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+        except Exception:
+            # The status line is already out, so the only way to signal a
+            # failure mid-stream is to drop the connection.
+            self.close_connection = True
+            raise
+        finally:
+            close = getattr(response.body, "close", None)
+            if close is not None:
+                close()
+
+    def _handle(self, method: str, query: Optional[str] = None) -> None:
+        reason, path = profiling.profile_reason(self.headers, self.path)
+
+        with metrics.track_request(method) as stats, \
+                profiling.profile_request(method, path, reason) as capture:
+            response: HTTPResponseData = self.controller.perform(method, path, query,
+                                                                 headers=self.headers)
+            if stats is not None:
+                stats.status = response.code
+            if capture is not None:
+                capture.status = response.code
+                if capture.reason == profiling.REQUESTED:
+                    response.add_header("X-Profile-Id", str(capture.id))
+            self._send_http_response(response)
 
     def do_GET(self) -> None:
-        response: HTTPResponseData = self.controller.perform("GET", self.path)
-        self._send_http_response(response)
+        self._handle("GET")
 
     def do_POST(self) -> None:
         content_len = int(self.headers["Content-Length"])
         query = self.rfile.read(content_len).decode('UTF-8')
 
-        response: HTTPResponseData = self.controller.perform("POST",
-                                                             self.path, query)
-        self._send_http_response(response)
+        self._handle("POST", query)
 
 
     def _send_headers(self, headers: list[HTTPHeaderDTO]):
@@ -35,14 +109,11 @@ class HTTPRequestHandler(SimpleHTTPRequestHandler):
             self.send_header(header.keyword, header.value)
         self.end_headers()
 
+    def log_message(self, format: str, *args) -> None:
+        if settings.ACCESS_LOG:
+            super().log_message(format, *args)
 
 
-
-
-
-
-
-
-
-httpd = HTTPServer(('',8000), HTTPRequestHandler)
-httpd.serve_forever()
\ No newline at end of file
+if __name__ == "__main__":
+    from src.controller.server import main
+    main()
@@ -0,0 +1,62 @@
+from src.controller.controller import Controller
+from src.controller.event_stream import EventStream
+from src.model.dbmanager import DBManager
+from src.services.database_watch_service import DatabaseWatchService
+from src.services.ingestion_service import create_source
+from src.services.snapshot_service import SnapshotService
+from src.utils import settings
+
+
+class Application:
+    # Everything a request needs, built once at server start and shared by
+    # reference with every handler.
+
+    def __init__(self) -> None:
+        self.db_manager: DBManager = DBManager()
+        self.controller: Controller = Controller()
+
+        service_client = self.controller.dto_factory.service_client
+        self.currencies_service = service_client.currencies_service
+        self.exchange_rates_service = service_client.exchange_rates_service
+        self.exchange_service = service_client.exchange_service
+        self.exchange_matrix_service = service_client.exchange_matrix_service
+        self.rate_history_service = service_client.rate_history_service
+        self.ingestion_service = service_client.ingestion_service
+        self.event_stream: EventStream = EventStream(service_client.rate_stream_service)
+        self.snapshot_service: SnapshotService = SnapshotService()
+        self.database_watch_service: DatabaseWatchService = DatabaseWatchService()
+
+        self.started: bool = False
+
+    def startup(self, primary: bool = True) -> None:
+        # A worker of a multi-process server reads the shared snapshot from
+        # the start, and only the primary one (index 0) ingests rates.
+        if settings.RUN_DIR is not None and settings.SNAPSHOT:
+            self.snapshot_service.start(settings.RUN_DIR / "snapshots", watch_database=primary)
+        elif settings.DB_WATCH_INTERVAL > 0:
+            # Without snapshots every process sees the others' writes here.
+            self.database_watch_service.start()
+
+        if settings.WARM_CACHES:
+            self.currencies_service.get_all()
+            self.exchange_rates_service.get_all()
+            self.exchange_service.warm_up()
+            self.exchange_matrix_service.warm_up()
+            self.rate_history_service.warm_up()
+
+        self.event_stream.start()
+        if settings.INGEST_SOURCE and primary:
+            self.ingestion_service.start(create_source(settings.INGEST_SOURCE))
+
+        self.started = True
+
+    def shutdown(self) -> None:
+        self.started = False
+        if self.ingestion_service.running:
+            self.ingestion_service.stop()
+        self.event_stream.stop()
+        if self.snapshot_service.running:
+            self.snapshot_service.stop()
+        if self.database_watch_service.running:
+            self.database_watch_service.stop()
+        self.db_manager.close()
@@ -1,23 +1,74 @@
+import time
+from decimal import Decimal
 from functools import partial
-from urllib.parse import urlparse, parse_qs
-from typing import Optional, Callable
-import json
+from urllib.parse import urlparse, parse_qs, urlencode
+from typing import Any, Iterator, Mapping, Optional, Callable
 
+from src.dto.currencies import CurrenciesDTO
 from src.dto.exchange import ExchangeDTO
-from src.utils.exceptions import (RequestException,
+from src.dto.exchange_rates import ExchangeRatesDTO
+from src.utils.exceptions import (RequestException, NotFoundError,
                                   CurrencyCodeNotSpecifiedError,
                                   QueryFieldNotSpecifiedError,
                                   InvalidCurrencyCodeError,
-                                  InvalidPathError, InvalidAmountError)
+                                  InvalidPathError,
+                                  InvalidLimitError, InvalidCodePrefixError)
 from src.services.base_service import Service
 from src.services.currencies_service import CurrenciesService
 from src.services.exchange_service import ExchangeService
 from src.services.exchange_rates_service import ExchangeRatesService
-from src.dto.httpresponse import HTTPResponseData
-from src.dto.basedto import DTO
-from src.utils.parse import parse_query
+from src.services.exchange_matrix_service import ExchangeMatrixService
+from src.services.rate_history_service import RateHistoryService
+from src.services.ingestion_service import IngestionService
+from src.services.rate_stream_service import RateStreamService
+from src.services.snapshot_service import SnapshotService
+from src.dto.httpresponse import HTTPResponseData, HTTPHeaderDTO
+from src.dto.basedto import DTO, CollectionDTO
+from src.dto.metrics import MetricsDTO
+from src.dto.profiles import ProfileCapturesDTO
+from src.dto.rate_events import EventStreamDTO
+from src.dto.workers import WorkersDTO
+from src.controller.workers import WorkerTable
+from src.model.dbmanager import DBManager
+from src.model.snapshot import SnapshotStore
+from src.utils.parse import parse_query, parse_batch, parse_timestamp
 from src.utils.singleton import Singleton
-from src.utils.fpath import FPath
+from src.utils.router import Route, Router
+from src.utils.serializer import Serializer, get_serializer
+from src.utils.cache import Cache, NOT_CACHED
+from src.utils.compression import Codec, available_codecs, negotiate
+from src.utils import metrics, money, profiling, settings
+
+
+def parse_currency_pair(currencies_codes: str) -> tuple[str, str]:
+    if len(currencies_codes) != 6:
+        raise InvalidCurrencyCodeError
+
+    return currencies_codes[:3], currencies_codes[3:]
+
+
+def parse_limit(query: dict[str, str]) -> Optional[int]:
+    # None means the collection is not paginated at all.
+    if "limit" not in query:
+        return settings.PAGE_DEFAULT_LIMIT if "after" in query else None
+
+    try:
+        limit = int(query["limit"])
+    except ValueError:
+        raise InvalidLimitError
+
+    if not 0 < limit <= settings.PAGE_MAX_LIMIT:
+        raise InvalidLimitError
+
+    return limit
+
+
+def parse_currency_code(query: dict[str, str], field: str) -> Optional[str]:
+    code = query.get(field)
+    if code is not None and len(code) != 3:
+        raise InvalidCurrencyCodeError
+
+    return code
 
 
 class ServiceClient(Singleton):
@@ -25,124 +76,414 @@ class ServiceClient(Singleton):
         self.currencies_service = CurrenciesService()
         self.exchange_rates_service = ExchangeRatesService()
         self.exchange_service = ExchangeService()
-
-    def get(self, urlpath: str) -> DTO:
+        self.exchange_matrix_service = ExchangeMatrixService()
+        self.rate_history_service = RateHistoryService()
+        self.ingestion_service = IngestionService()
+        self.rate_stream_service = RateStreamService()
+
+    def init(self):
+        router = Router(converters={"pair": parse_currency_pair})
+
+        router.add("GET", "/currencies", self._get_currencies)
+        router.add("GET", "/currency/{code}", self._get_currency)
+        router.add("GET", "/currency", self._get_currency_without_code)
+        router.add("GET", "/exchangeRates", self._get_exchange_rates)
+        router.add("GET", "/exchangeRates/stream", self._get_exchange_rates_stream, cacheable=False)
+        router.add("GET", "/exchangeRate/{pair:pair}", self._get_exchange_rate)
+        router.add("GET", "/exchange", self._get_exchange)
+        router.add("GET", "/exchangeMatrix", self._get_exchange_matrix)
+        router.add("GET", "/metrics", self._get_metrics, cacheable=False)
+        if settings.PROFILING:
+            router.add("GET", "/admin/profiles", self._get_profiles, cacheable=False)
+            router.add("GET", "/admin/profiles/{capture_id:int}", self._get_profile, cacheable=False)
+        if settings.INGEST_SOURCE:
+            router.add("GET", "/admin/ingestion", self._get_ingestion, cacheable=False)
+        if settings.RUN_DIR is not None:
+            router.add("GET", "/admin/workers", self._get_workers, cacheable=False)
+
+        router.add("POST", "/currencies", self._post_currency)
+        router.add("POST", "/exchange/batch", self._post_exchange_batch)
+
+        self.router = router
+
+    def resolve(self, method: str, urlpath: str) -> tuple[Route, dict[str, Any]]:
+        return self.router.resolve(method, urlparse(urlpath).path)
+
+    def get(self, urlpath: str, resolved: Optional[tuple[Route, dict[str, Any]]] = None) -> DTO:
         path = urlparse(urlpath)
-        fpath = FPath(path.path)
+        route, params = resolved if resolved is not None else self.router.resolve("GET", path.path)
         query = parse_query(path.query)
 
-        if fpath.match("/currencies"):
-            return self.currencies_service.get_all()
+        return route.handler(query, **params)
+
+    def post(self, path: str, query: str,
+             resolved: Optional[tuple[Route, dict[str, Any]]] = None):
+        path = urlparse(path)
+        route, params = resolved if resolved is not None else self.router.resolve("POST", path.path)
 
-        if fpath.match("/currency/*"):
-            currency_code = fpath[1]
-            return self.currencies_service.get_one(currency_code=currency_code)
+        return route.handler(query, **params)
 
+    def _get_currencies(self, query: dict[str, str]) -> DTO:
+        code_prefix: Optional[str] = query.get("prefix")
+        if code_prefix is not None and not 0 < len(code_prefix) <= 3:
+            raise InvalidCodePrefixError
 
-        if fpath.match("/exchangeRates"):
-            return self.exchange_rates_service.get_all()
+        limit = parse_limit(query)
+        if limit is not None:
+            return self.currencies_service.get_page(limit, query.get("after"), code_prefix)
 
-        if fpath.match("/exchangeRate/*"):
-            currencies_codes = fpath[1]
+        return CurrenciesDTO(self.currencies_service.iter_all(code_prefix))
 
-            if len(currencies_codes) != 6:
-                raise InvalidCurrencyCodeError
+    def _get_currency(self, query: dict[str, str], code: str) -> DTO:
+        return self.currencies_service.get_one(currency_code=code)
 
-            currency_code1, currency_code2 = currencies_codes[:3], currencies_codes[3:]
+    def _get_currency_without_code(self, query: dict[str, str]) -> DTO:
+        raise CurrencyCodeNotSpecifiedError
 
-            return self.exchange_rates_service.get_one(currency_code1, currency_code2)
+    def _get_exchange_rates(self, query: dict[str, str]) -> DTO:
+        base_currency_code = parse_currency_code(query, "base")
+        target_currency_code = parse_currency_code(query, "target")
 
-        if fpath.match("/exchange"):
-            if len(query) > 3:
-                raise InvalidPathError
-            try:
-                base_currency_code: str = query["from"]
-                target_currency_code: str = query["to"]
-                amount: str = query["amount"]
+        limit = parse_limit(query)
+        if limit is not None:
+            return self.exchange_rates_service.get_page(limit, query.get("after"),
+                                                        base_currency_code, target_currency_code)
 
-                try:
-                    amount: float = float(amount)
-                except ValueError:
-                    raise InvalidAmountError
+        return ExchangeRatesDTO(self.exchange_rates_service.iter_all(base_currency_code,
+                                                                     target_currency_code))
 
-                if len(base_currency_code) != 3 or len(target_currency_code)!= 3:
+    def _get_exchange_rates_stream(self, query: dict[str, str]) -> DTO:
+        currencies: Optional[frozenset[str]] = None
+        if query.get("currencies"):
+            currencies = frozenset(code.strip() for code in query["currencies"].split(",")
+                                   if code.strip())
+            for code in currencies:
+                if len(code) != 3:
                     raise InvalidCurrencyCodeError
+                # Unknown codes are a 404 now rather than a silent stream.
+                self.currencies_service.get_one(currency_code=code)
 
+        return EventStreamDTO(currencies)
 
-                exchange: ExchangeDTO = self.exchange_service.get(
-                                            base_currency_code,
-                                              target_currency_code,
-                                          amount)
-                return exchange
-            except KeyError:
-                raise QueryFieldNotSpecifiedError
+    def _get_exchange_rate(self, query: dict[str, str], pair: tuple[str, str]) -> DTO:
+        currency_code1, currency_code2 = pair
 
-        if fpath.match("/currency"):
-            raise CurrencyCodeNotSpecifiedError
+        if "at" in query:
+            return self.rate_history_service.get_one(currency_code1, currency_code2,
+                                                     parse_timestamp(query["at"]))
 
-        raise InvalidPathError
+        return self.exchange_rates_service.get_one(currency_code1, currency_code2)
 
-    def post(self, path: str, query: str):
-        path = urlparse(path)
-        fpath = FPath(path.path)
-        query = parse_query(query)
+    def _get_exchange(self, query: dict[str, str]) -> DTO:
+        if len(query) > (4 if "at" in query else 3):
+            raise InvalidPathError
+        try:
+            base_currency_code: str = query["from"]
+            target_currency_code: str = query["to"]
+            amount: str = query["amount"]
 
-        if fpath.match("/currencies"):
-            try:
-                name, code, sign = query["name"], query["code"], query["sign"]
-                return self.currencies_service.add(name, code, sign)
+            amount: Decimal = money.parse_amount(amount)
 
-            except KeyError:
-                raise QueryFieldNotSpecifiedError
+            if len(base_currency_code) != 3 or len(target_currency_code)!= 3:
+                raise InvalidCurrencyCodeError
+
+            at: Optional[int] = parse_timestamp(query["at"]) if "at" in query else None
+
+            exchange: ExchangeDTO = self.exchange_service.get(
+                                        base_currency_code,
+                                          target_currency_code,
+                                      amount,
+                                      at)
+            return exchange
+        except KeyError:
+            raise QueryFieldNotSpecifiedError
+
+    def _get_exchange_matrix(self, query: dict[str, str]) -> DTO:
+        base_currency_code: Optional[str] = query.get("base")
+
+        if base_currency_code is None:
+            return self.exchange_matrix_service.get_all()
+
+        if len(base_currency_code) != 3:
+            raise InvalidCurrencyCodeError
+
+        return self.exchange_matrix_service.get_for_base(base_currency_code)
+
+    def _get_metrics(self, query: dict[str, str]) -> DTO:
+        return MetricsDTO(metrics.render())
+
+    def _get_profiles(self, query: dict[str, str]) -> DTO:
+        return ProfileCapturesDTO(profiling.CAPTURES.recent())
+
+    def _get_profile(self, query: dict[str, str], capture_id: int) -> DTO:
+        capture = profiling.CAPTURES.get(capture_id)
+        if capture is None:
+            raise NotFoundError
+
+        return capture
+
+    def _get_ingestion(self, query: dict[str, str]) -> DTO:
+        return self.ingestion_service.stats()
+
+    def _get_workers(self, query: dict[str, str]) -> DTO:
+        table = WorkerTable.open(settings.RUN_DIR)
+        try:
+            return WorkersDTO(table.read_all())
+        finally:
+            table.close()
+
+    def _post_currency(self, body: str) -> DTO:
+        query = parse_query(body)
+        try:
+            name, code, sign = query["name"], query["code"], query["sign"]
+            return self.currencies_service.add(name, code, sign)
 
+        except KeyError:
+            raise QueryFieldNotSpecifiedError
 
-        raise InvalidPathError
+    def _post_exchange_batch(self, body: str) -> DTO:
+        return self.exchange_service.get_batch(parse_batch(body))
 
 class DTOFactory:
     def __init__(self):
         self.service_client = ServiceClient()
 
-    def get(self, request, urlpath: str, query: Optional[str] = None):
+    def get(self, request, urlpath: str, query: Optional[str] = None,
+            resolved: Optional[tuple[Route, dict[str, Any]]] = None):
         service_client = self.service_client
 
         match request:
             case "GET":
-                return service_client.get(urlpath)
+                return service_client.get(urlpath, resolved)
             case "POST":
-                return service_client.post(urlpath, query)
+                return service_client.post(urlpath, query, resolved)
 
 
 
+def json_stream(fragments: Iterator[bytes],
+                chunk_size: int = settings.STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    # Joins encoded items into a JSON array, yielding it in chunks of roughly
+    # chunk_size bytes instead of building the whole document first.
+    buffer = bytearray(b"[")
+    separator = b""
+
+    try:
+        for fragment in fragments:
+            buffer += separator
+            buffer += fragment
+            separator = b","
+
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+
+        buffer += b"]"
+        yield bytes(buffer)
+    finally:
+        close = getattr(fragments, "close", None)
+        if close is not None:
+            close()
+
+
+def prefetched(first: bytes, rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield first
+    yield from rest
+
+
+def next_page_link(urlpath: str, cursor: str) -> str:
+    path = urlparse(urlpath)
+    query = parse_qs(path.query)
+    query["after"] = [cursor]
+
+    return f"{path.path}?{urlencode(query, doseq=True)}"
+
+
+def etag_matches(if_none_match: str, etag: str, wildcard: bool = True) -> bool:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored. "*"
+    # matches only what exists, so callers that have not found the resource
+    # yet pass wildcard=False.
+    if if_none_match.strip() == "*":
+        return wildcard
+
+    return any(candidate.strip().removeprefix("W/") == etag
+               for candidate in if_none_match.split(","))
+
+
 class Controller:
+    # Compressed bodies of collection responses, keyed by path and encoding
+    # and tagged with the ETag they were built for; a data change makes
+    # every entry stale at once.
+    _compressed: Cache[tuple[str, str], tuple[str, list[HTTPHeaderDTO], bytes]] = Cache(
+        "compressed_bodies", max_entries=settings.COMPRESSION_CACHE_ENTRIES)
+
     def __init__(self):
         self.dto_factory = DTOFactory()
+        self.serializer: Serializer = get_serializer()
+        self.db_manager: DBManager = DBManager()
+        self.snapshots: SnapshotStore = SnapshotStore()
+        self.snapshot_service: SnapshotService = SnapshotService()
+        self.codecs: list[Codec] = available_codecs() if settings.COMPRESSION else []
+
+
+    def _add_cache_headers(self, response: HTTPResponseData, etag: str) -> None:
+        response.add_header("ETag", etag)
+        response.add_header("Cache-Control", settings.HTTP_CACHE_CONTROL)
+        if self.codecs:
+            response.add_header("Vary", "Accept-Encoding")
 
+    @staticmethod
+    def _not_modified(headers: Mapping[str, str], etag: str, wildcard: bool = True) -> bool:
+        if_none_match: Optional[str] = headers.get("If-None-Match")
+        return if_none_match is not None and etag_matches(if_none_match, etag, wildcard)
 
-    def perform(self, request_method: str, urlpath: str, query: Optional[str] = None):
+    def _not_modified_response(self, etag: str) -> HTTPResponseData:
         response: HTTPResponseData = HTTPResponseData()
+        response.code = 304
+        self._add_cache_headers(response, etag)
+        return response
+
+    def perform(self, request_method: str, urlpath: str, query: Optional[str] = None,
+                headers: Optional[Mapping[str, str]] = None):
+        headers = headers if headers is not None else {}
+        response: HTTPResponseData = HTTPResponseData()
+
+        # Resolved once, for the metrics label, the 304 check and the call.
+        resolved: Optional[tuple[Route, dict[str, Any]]] = None
+        unresolved: Optional[RequestException] = None
         try:
+            resolved = self.dto_factory.service_client.resolve(request_method, urlpath)
+        except RequestException as err:
+            unresolved = err
+        cacheable: bool = request_method == "GET" and resolved is not None and resolved[0].cacheable
+
+        if settings.METRICS:
+            metrics.set_route(resolved[0].pattern if resolved is not None else "unmatched")
+
+        # Every GET response is a function of the path and the data, so the
+        # data generation is a valid ETag for all of them. It is read before
+        # the response is built: a write racing with this request can only
+        # make the tag older than the body, never newer. With snapshots the
+        # tag is the published generation, which every worker shares.
+        generation: int = self.db_manager.generation
+        snapshot_generation: int = self.snapshots.generation
+        data_version: str = (self.snapshots.data_version if self.snapshots.enabled
+                             else self.db_manager.data_version)
+        codec: Optional[Codec] = None
+        etag: str = f'"{data_version}"'
+        # The tag of the same data sent with Content-Encoding: codec.
+        encoded_etag: Optional[str] = None
+
+        # Apply what other worker processes wrote before anything is read,
+        # so the caches do not predate the ETag above.
+        self.snapshots.poll()
+
+        if request_method == "GET":
+            codec = negotiate(headers.get("Accept-Encoding"), self.codecs)
+
+            # Only cacheable 200 responses are kept, so an entry for the
+            # current tag answers without calling the handler.
+            if codec is not None:
+                encoded_etag = f'"{data_version}-{codec.name}"'
+                cached = self._compressed.get((urlpath, codec.name))
+                if cached is not NOT_CACHED and cached[0] == encoded_etag:
+                    if self._not_modified(headers, encoded_etag):
+                        return self._not_modified_response(encoded_etag)
+                    response.code = 200
+                    response.headers = list(cached[1])
+                    response.message = cached[2]
+                    response.add_header("Content-Length", str(len(response.message)))
+                    return response
+
+            # A client holds a tag only for a path that answered with it, so
+            # a match needs neither the services nor the database. Unknown
+            # paths and responses that are not a function of the data are
+            # never 304. Small bodies go out uncompressed whatever was
+            # negotiated, so either tag may be the one the client holds.
+            if cacheable:
+                for candidate in (etag, encoded_etag):
+                    if candidate is not None and self._not_modified(headers, candidate, wildcard=False):
+                        return self._not_modified_response(candidate)
+
+        try:
+            if unresolved is not None:
+                raise unresolved
+
+            dto: DTO = self.dto_factory.get(request_method, urlpath, query, resolved)
 
-            dto: DTO = self.dto_factory.get(request_method, urlpath, query)
+            # "*" only once the handler found the resource.
+            if cacheable and self._not_modified(headers, etag):
+                return self._not_modified_response(etag)
 
             response.code = 200
-            response.add_header("Content-Type", "application/json")
-            response.message = json.dumps(dto.tojson())
+            response.add_header("Content-Type", dto.CONTENT_TYPE)
+
+            if isinstance(dto, EventStreamDTO):
+                # No body and no Content-Length: the handler sends the headers
+                # and passes the connection on to the event stream.
+                dto.last_event_id = headers.get("Last-Event-ID")
+                response.stream = dto
+                response.add_header("Cache-Control", "no-store")
+                response.add_header("Connection", "close")
+                response.add_header("X-Accel-Buffering", "no")
+                return response
+
+            if request_method == "GET" and not cacheable:
+                response.add_header("Cache-Control", "no-store")
+            elif request_method != "GET" and self.db_manager.generation != generation:
+                # Services drop their caches only after the DML commits, so a
+                # GET in between could tag stale cached data with the new
+                # generation; bumping once more retires that tag.
+                self.db_manager.bump_generation()
+                if self.snapshots.generation != snapshot_generation:
+                    # The shared tag moves only with a publish.
+                    self.snapshot_service.changed()
+
+            if isinstance(dto, CollectionDTO):
+                if dto.next_cursor is not None:
+                    response.add_header("X-Next-Cursor", dto.next_cursor)
+                    response.add_header("Link", f'<{next_page_link(urlpath, dto.next_cursor)}>; rel="next"')
+
+                # Pull the first chunk here, so a failure before anything is
+                # sent still becomes a regular error response.
+                body = metrics.timed_body(json_stream(dto.iter_encoded(self.serializer)))
+                first = next(body)
+
+                # A first chunk under the threshold is the whole body, since
+                # every chunk but the last fills STREAM_CHUNK_SIZE.
+                if codec is None or len(first) < min(settings.COMPRESSION_MIN_SIZE,
+                                                     settings.STREAM_CHUNK_SIZE):
+                    if cacheable:
+                        self._add_cache_headers(response, etag)
+                    response.body = prefetched(first, body)
+                    return response
+
+                # Compressed on the fly, so only the compressed body is ever
+                # held in memory, then kept until the data changes.
+                response.add_header("Content-Encoding", codec.name)
+                response.message = codec.compress(prefetched(first, body))
+                if cacheable:
+                    self._add_cache_headers(response, encoded_etag)
+                    self._compressed.set((urlpath, codec.name),
+                                         (encoded_etag, list(response.headers), response.message))
+            else:
+                started = time.perf_counter()
+                response.message = dto.encode(self.serializer)
+                metrics.record_serialization(time.perf_counter() - started)
+
+                compressed = codec is not None and len(response.message) >= settings.COMPRESSION_MIN_SIZE
+                if compressed:
+                    response.add_header("Content-Encoding", codec.name)
+                    response.message = codec.compress((response.message,))
+                if cacheable:
+                    self._add_cache_headers(response, encoded_etag if compressed else etag)
 
 
         except RequestException as err:
             response.code = err.RESPONSE_CODE
             response.add_header("Content-Type", "text/html")
-            response.message = json.dumps({"message" : err.MESSAGE})
+            response.message = self.serializer.dumps({"message" : err.MESSAGE})
 
         content_len = str(len(response.message))
-        response.add_header("Content_Length", content_len)
+        response.add_header("Content-Length", content_len)
 
         return response
-
-
-
-
-
-
-
-
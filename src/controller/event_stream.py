@@ -0,0 +1,283 @@
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from src.services.rate_stream_service import RateEvent, RateStreamService
+from src.utils import metrics, settings
+
+
+class StreamClient:
+    __slots__ = ("sock", "currencies", "buffer", "after_seq", "writing")
+
+    def __init__(self, sock: socket.socket, currencies: Optional[frozenset[str]], after_seq: int) -> None:
+        self.sock: socket.socket = sock
+        self.currencies: Optional[frozenset[str]] = currencies
+        self.buffer = bytearray()
+        # Events up to this one were already sent as part of a replay.
+        self.after_seq: int = after_seq
+        self.writing: bool = False
+
+
+class EventStream:
+    # Owns every /exchangeRates/stream connection on a single selector
+    # thread, so idle clients cost a socket and a buffer rather than a
+    # thread. Request handlers write the response headers, then attach the
+    # socket here and go back to the pool. Events from RateStreamService
+    # are queued to this thread, appended to the buffers of the clients
+    # whose filter matches, and written as the sockets accept them. A client
+    # whose buffer would grow past STREAM_CLIENT_BUFFER is disconnected; it
+    # can reconnect with Last-Event-ID and catch up from the replay ring.
+
+    def __init__(self, rate_stream_service: RateStreamService,
+                 buffer_size: int = settings.STREAM_CLIENT_BUFFER,
+                 heartbeat: float = settings.STREAM_HEARTBEAT) -> None:
+        self._service: RateStreamService = rate_stream_service
+        self._buffer_size: int = buffer_size
+        self._heartbeat: float = heartbeat
+
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._wakeup_writer.setblocking(False)
+        self._wakeup_pending: bool = False
+
+        # Filled by other threads, drained by the selector thread only.
+        self._inbox: deque[tuple[str, Any]] = deque()
+
+        self._clients: set[StreamClient] = set()
+        self._unfiltered: set[StreamClient] = set()
+        self._by_currency: dict[str, set[StreamClient]] = {}
+        self._dirty: set[StreamClient] = set()
+
+        self._stopping: bool = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def start(self) -> None:
+        self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        self._service.subscribe(self._on_events)
+        self._thread = threading.Thread(target=self._run, name="event-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._service.unsubscribe(self._on_events)
+        self._stopping = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def attach(self, sock: socket.socket, currencies: Optional[frozenset[str]],
+               last_event_id: Optional[str] = None) -> None:
+        self._inbox.append(("attach", (sock, currencies, last_event_id)))
+        self._wake()
+
+    def _on_events(self, events: list[RateEvent]) -> None:
+        # Runs on the publishing thread: only queue.
+        self._inbox.append(("events", events))
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup_pending:
+            return
+        self._wakeup_pending = True
+        try:
+            self._wakeup_writer.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self) -> None:
+        next_heartbeat = time.monotonic() + self._heartbeat
+        try:
+            while not self._stopping:
+                timeout = max(0.0, next_heartbeat - time.monotonic())
+                for key, mask in self._selector.select(timeout):
+                    if key.fileobj is self._wakeup_reader:
+                        self._drain_wakeup()
+                        continue
+
+                    client: StreamClient = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(client)
+                    if mask & selectors.EVENT_WRITE and client in self._clients:
+                        self._write(client)
+
+                self._process_inbox()
+
+                if time.monotonic() >= next_heartbeat:
+                    # Keeps proxies from timing out idle streams and finds
+                    # dead peers.
+                    for client in list(self._clients):
+                        self._queue(client, b": ping\n\n")
+                    next_heartbeat = time.monotonic() + self._heartbeat
+
+                dirty, self._dirty = self._dirty, set()
+                for client in dirty:
+                    if client in self._clients:
+                        self._write(client)
+        finally:
+            for client in list(self._clients):
+                self._drop(client, "shutdown")
+            self._selector.close()
+            self._wakeup_reader.close()
+            self._wakeup_writer.close()
+
+    def _drain_wakeup(self) -> None:
+        # Drain first, then clear: a _wake() in between would otherwise send
+        # a byte drained here and leave the flag set for good, silencing
+        # every later wakeup. Anything queued before the flag is cleared is
+        # picked up by the _process_inbox() that follows.
+        try:
+            while self._wakeup_reader.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self._wakeup_pending = False
+
+    def _process_inbox(self) -> None:
+        while self._inbox:
+            kind, item = self._inbox.popleft()
+            if kind == "attach":
+                self._add(*item)
+            else:
+                self._dispatch(item)
+
+    def _add(self, sock: socket.socket, currencies: Optional[frozenset[str]],
+             last_event_id: Optional[str]) -> None:
+        replay: Optional[list[RateEvent]] = []
+        if last_event_id:
+            replay = self._service.events_after(last_event_id)
+
+        # Events published while the replay was read are also on their way
+        # through the inbox; after_seq keeps them from being sent twice.
+        client = StreamClient(sock, currencies, replay[-1].seq if replay else 0)
+        try:
+            sock.setblocking(False)
+            self._selector.register(sock, selectors.EVENT_READ, client)
+        except (OSError, ValueError):
+            sock.close()
+            return
+
+        self._clients.add(client)
+        if currencies is None:
+            self._unfiltered.add(client)
+        else:
+            for code in currencies:
+                self._by_currency.setdefault(code, set()).add(client)
+        metrics.STREAM_CLIENTS.set(len(self._clients))
+
+        self._queue(client, b"retry: %d\n\n" % settings.STREAM_RETRY_MS)
+        if replay is None:
+            self._queue(client, self._service.reset_frame())
+        else:
+            for event in replay:
+                if self._wants(client, event):
+                    self._queue(client, event.frame)
+
+    @staticmethod
+    def _wants(client: StreamClient, event: RateEvent) -> bool:
+        return (client.currencies is None or not event.currencies
+                or not client.currencies.isdisjoint(event.currencies))
+
+    def _dispatch(self, events: list[RateEvent]) -> None:
+        # One append per client and batch: unfiltered clients share a
+        # single joined buffer, filtered ones get their matching frames.
+        first_seq = events[0].seq
+        shared = b"".join(event.frame for event in events)
+        for client in list(self._unfiltered):
+            if client.after_seq < first_seq:
+                self._queue(client, shared)
+            else:
+                self._queue_after(client, events)
+
+        if len(self._unfiltered) == len(self._clients):
+            return
+
+        matched: dict[StreamClient, list[bytes]] = {}
+        for event in events:
+            if event.currencies:
+                recipients = set().union(*(self._by_currency.get(code, ())
+                                           for code in event.currencies))
+            else:
+                recipients = self._clients.difference(self._unfiltered)
+            for client in recipients:
+                if event.seq > client.after_seq:
+                    matched.setdefault(client, []).append(event.frame)
+
+        for client, frames in matched.items():
+            self._queue(client, b"".join(frames))
+
+    def _queue_after(self, client: StreamClient, events: list[RateEvent]) -> None:
+        frames = [event.frame for event in events if event.seq > client.after_seq]
+        if frames:
+            self._queue(client, b"".join(frames))
+
+    def _queue(self, client: StreamClient, frame: bytes) -> None:
+        if client not in self._clients:
+            return
+        if len(client.buffer) + len(frame) > self._buffer_size:
+            self._drop(client, "slow")
+            return
+        client.buffer += frame
+        self._dirty.add(client)
+
+    def _write(self, client: StreamClient) -> None:
+        try:
+            sent = client.sock.send(client.buffer)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._drop(client, "closed")
+            return
+        del client.buffer[:sent]
+
+        writing = bool(client.buffer)
+        if writing != client.writing:
+            client.writing = writing
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+            self._selector.modify(client.sock, events, client)
+
+    def _read(self, client: StreamClient) -> None:
+        # Stream clients send nothing after the request; a read means they
+        # went away.
+        try:
+            data = client.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client, "closed")
+
+    def _drop(self, client: StreamClient, reason: str) -> None:
+        if client not in self._clients:
+            return
+
+        self._clients.discard(client)
+        self._unfiltered.discard(client)
+        self._dirty.discard(client)
+        for code in client.currencies or ():
+            subscribers = self._by_currency.get(code)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._by_currency[code]
+
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        client.sock.close()
+
+        metrics.STREAM_CLIENTS.set(len(self._clients))
+        metrics.STREAM_DISCONNECTS.inc((reason,))
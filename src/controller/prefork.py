@@ -0,0 +1,213 @@
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from src.controller.workers import WorkerTable
+from src.dto.workers import READY, STARTING, WorkerDTO
+from src.utils import settings
+from src.utils.paths import SRC
+
+# A worker that dies sooner than this after starting is restarted with a
+# growing delay, so a broken build does not spin.
+_CRASH_WINDOW = 5.0
+_MAX_RESTART_DELAY = 30.0
+
+
+@dataclass
+class Worker:
+    index: int
+    slot: int
+    process: subprocess.Popen
+    started_at: float
+    stopping_since: Optional[float] = None
+
+
+class Supervisor:
+    # Runs `processes` copies of the server on one port. Each worker is a
+    # fresh interpreter (python -m src.controller.server) that binds with
+    # SO_REUSEPORT, so the kernel spreads connections over them, and that
+    # reads currencies and rates from the shared snapshot in the run
+    # directory. The supervisor serves nothing itself: it restarts workers
+    # that exit or stop sending heartbeats, and on SIGHUP replaces them one
+    # at a time, each only after its replacement is ready, so new code is
+    # picked up without refusing connections. SIGTERM or SIGINT stops all.
+
+    def __init__(self, processes: int, host: str = settings.HOST, port: int = settings.PORT,
+                 workers: int = settings.WORKERS, run_dir: Optional[Path] = None) -> None:
+        self.processes: int = processes
+        self.host: str = host
+        self.port: int = port
+        self.workers: int = workers
+        self._temporary_run_dir: bool = run_dir is None
+        self.run_dir: Path = run_dir if run_dir is not None else Path(tempfile.mkdtemp(prefix="currencies-"))
+
+        self._table: Optional[WorkerTable] = None
+        self._active: dict[int, Worker] = {}
+        self._retiring: list[Worker] = []
+        self._restart_delay: dict[int, float] = {}
+        self._restart_at: dict[int, float] = {}
+
+        self._reload_queue: list[int] = []
+        self._replacement: Optional[Worker] = None
+
+        self._reload_requested: bool = False
+        self._stop_requested: bool = False
+
+    def run(self) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        # During a reload old workers still draining, their replacements and
+        # the rest run side by side.
+        self._table = WorkerTable.create(self.run_dir, 3 * self.processes)
+
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+
+        try:
+            for index in range(self.processes):
+                self._active[index] = self._spawn(index)
+
+            while not self._stop_requested:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._reload_queue = sorted(self._active)
+                self._check()
+                time.sleep(0.1)
+        finally:
+            self._stop_all()
+            self._table.close()
+            if self._temporary_run_dir:
+                shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def _on_reload(self, signum, frame) -> None:
+        self._reload_requested = True
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stop_requested = True
+
+    def _free_slot(self) -> int:
+        used = {worker.slot for worker in self._workers()}
+        return min(slot for slot in range(self._table.slots) if slot not in used)
+
+    def _workers(self) -> list[Worker]:
+        workers = list(self._active.values()) + self._retiring
+        if self._replacement is not None:
+            workers.append(self._replacement)
+        return workers
+
+    def _spawn(self, index: int) -> Worker:
+        slot = self._free_slot()
+        env = dict(os.environ,
+                   CURRENCIES_PROCESSES="1",
+                   CURRENCIES_RUN_DIR=str(self.run_dir),
+                   CURRENCIES_WORKER_SLOT=str(slot),
+                   CURRENCIES_WORKER_INDEX=str(index))
+        process = subprocess.Popen([sys.executable, "-m", "src.controller.server",
+                                    "--host", self.host,
+                                    "--port", str(self.port),
+                                    "--workers", str(self.workers)],
+                                   cwd=SRC.parent, env=env)
+
+        now = time.time()
+        self._table.write(WorkerDTO(slot, process.pid, index, STARTING, now, now, 0, 0, 0, 0))
+        return Worker(index, slot, process, time.monotonic())
+
+    def _check(self) -> None:
+        now = time.monotonic()
+
+        for index, worker in list(self._active.items()):
+            if worker.process.poll() is not None:
+                self._exited(worker)
+                del self._active[index]
+            elif not self._healthy(worker, now):
+                worker.process.kill()
+
+        for index in range(self.processes):
+            if index not in self._active and now >= self._restart_at.get(index, 0.0):
+                self._active[index] = self._spawn(index)
+
+        for worker in list(self._retiring):
+            if worker.process.poll() is not None:
+                self._table.clear(worker.slot)
+                self._retiring.remove(worker)
+            elif now - worker.stopping_since > settings.WORKER_SHUTDOWN_TIMEOUT:
+                worker.process.kill()
+
+        self._step_reload(now)
+
+    def _healthy(self, worker: Worker, now: float) -> bool:
+        health = self._table.read(worker.slot)
+        if health.state != READY:
+            return now - worker.started_at < settings.WORKER_START_TIMEOUT
+        return time.time() - health.heartbeat_at < settings.WORKER_TIMEOUT
+
+    def _exited(self, worker: Worker) -> None:
+        self._table.clear(worker.slot)
+        lived = time.monotonic() - worker.started_at
+        delay = 0.0
+        if lived < _CRASH_WINDOW:
+            delay = min(_MAX_RESTART_DELAY, max(0.5, 2 * self._restart_delay.get(worker.index, 0.0)))
+        self._restart_delay[worker.index] = delay
+        self._restart_at[worker.index] = time.monotonic() + delay
+        print(f"worker {worker.index} (pid {worker.process.pid}) exited with "
+              f"{worker.process.returncode}; restarting in {delay:.1f}s", file=sys.stderr)
+
+    def _step_reload(self, now: float) -> None:
+        replacement = self._replacement
+        if replacement is None:
+            while self._reload_queue and self._replacement is None \
+                    and len(self._workers()) < self._table.slots:
+                index = self._reload_queue.pop(0)
+                if index in self._active:
+                    self._replacement = self._spawn(index)
+            return
+
+        if replacement.process.poll() is not None or not self._healthy(replacement, now):
+            # The new code does not come up: keep the old workers.
+            replacement.process.kill()
+            replacement.process.wait()
+            self._table.clear(replacement.slot)
+            self._replacement = None
+            self._reload_queue = []
+            print(f"reload aborted: replacement for worker {replacement.index} did not start",
+                  file=sys.stderr)
+            return
+
+        if self._table.read(replacement.slot).state != READY:
+            return
+
+        old = self._active.get(replacement.index)
+        self._active[replacement.index] = replacement
+        self._replacement = None
+        if old is not None:
+            self._retire(old)
+
+    def _retire(self, worker: Worker) -> None:
+        worker.stopping_since = time.monotonic()
+        worker.process.terminate()
+        self._retiring.append(worker)
+
+    def _stop_all(self) -> None:
+        for worker in self._workers():
+            if worker.process.poll() is None:
+                worker.process.terminate()
+
+        deadline = time.monotonic() + settings.WORKER_SHUTDOWN_TIMEOUT
+        for worker in self._workers():
+            try:
+                worker.process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+                worker.process.wait()
+            self._table.clear(worker.slot)
+
+        self._active.clear()
+        self._retiring.clear()
+        self._replacement = None
@@ -0,0 +1,158 @@
+import argparse
+import itertools
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+from pathlib import Path
+
+from src.controller.HTTPRequestHandler import HTTPRequestHandler
+from src.controller.application import Application
+from src.controller.prefork import Supervisor
+from src.controller.workers import HealthReporter, WorkerTable
+from src.dto.workers import READY, STOPPING
+from src.utils import settings
+
+
+class PooledHTTPServer(HTTPServer):
+    # Connections are handed to a fixed pool of worker threads. When every
+    # worker is busy the accept loop blocks, so pending clients wait in the
+    # listen backlog instead of spawning unbounded threads.
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, app: Application,
+                 workers: int = settings.WORKERS, reuse_port: bool = False) -> None:
+        # Workers of a multi-process server all bind the same port.
+        self.allow_reuse_port = reuse_port
+        super().__init__(server_address, handler_class)
+        self.app: Application = app
+        self.workers: int = workers
+        self._slots = threading.BoundedSemaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="http-worker")
+        # Sockets handed over to the event stream, which closes them itself.
+        self._detached: set = set()
+        self._detached_lock = threading.Lock()
+        self._request_count = itertools.count(1)
+        self.requests_handled: int = 0
+        # Set once the server stops accepting; keep-alive connections are
+        # closed after their current request.
+        self.draining: bool = False
+
+    def count_request(self) -> None:
+        self.requests_handled = next(self._request_count)
+
+    def process_request(self, request, client_address) -> None:
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def detach(self, request) -> None:
+        with self._detached_lock:
+            self._detached.add(request)
+
+    def shutdown_request(self, request) -> None:
+        with self._detached_lock:
+            if request in self._detached:
+                self._detached.discard(request)
+                return
+        super().shutdown_request(request)
+
+    def drain(self) -> None:
+        # After serve_forever() returns: serve the connections still waiting
+        # in this socket's accept queue, which closing it would reset.
+        self.draining = True
+        self.socket.setblocking(False)
+        while True:
+            try:
+                request, client_address = self.get_request()
+            except OSError:
+                break
+            request.setblocking(True)
+            if self.verify_request(request, client_address):
+                self.process_request(request, client_address)
+            else:
+                self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def run_server(host: str = settings.HOST,
+               port: int = settings.PORT,
+               workers: int = settings.WORKERS) -> None:
+    # Started by a Supervisor when RUN_DIR is set: one of several workers.
+    worker = settings.RUN_DIR is not None
+    if worker:
+        # Ctrl-C reaches the whole process group; the supervisor decides.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    app = Application()
+    app.startup(primary=not worker or settings.WORKER_INDEX == 0)
+
+    httpd = PooledHTTPServer((host, port), HTTPRequestHandler, app, workers=workers, reuse_port=worker)
+    reporter = None
+    if worker:
+        # SIGTERM: stop accepting, finish what was accepted, then exit.
+        # shutdown() waits for serve_forever(), so not from the handler.
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=httpd.shutdown).start())
+
+        supervisor = os.getppid()
+        reporter = HealthReporter(WorkerTable.open(settings.RUN_DIR), settings.WORKER_SLOT,
+                                  settings.WORKER_INDEX, settings.WORKER_HEARTBEAT,
+                                  requests=lambda: httpd.requests_handled,
+                                  snapshot_generation=lambda: app.snapshot_service.generation,
+                                  stream_clients=lambda: app.event_stream.client_count,
+                                  orphaned=lambda: os.getppid() != supervisor,
+                                  on_orphaned=lambda: threading.Thread(target=httpd.shutdown).start())
+        reporter.start()
+        reporter.set_state(READY)
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if reporter is not None:
+            reporter.set_state(STOPPING)
+            httpd.drain()
+        httpd.server_close()
+        app.shutdown()
+        if reporter is not None:
+            reporter.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Currencies HTTP server")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS,
+                        help="request threads per process")
+    parser.add_argument("--processes", type=int, default=settings.PROCESSES,
+                        help="worker processes sharing the port")
+    parser.add_argument("--run-dir", type=Path, default=None,
+                        help="shared snapshot and health files (default: a temporary directory)")
+    args = parser.parse_args()
+
+    if args.processes > 1 and settings.RUN_DIR is None:
+        Supervisor(args.processes, args.host, args.port, args.workers, args.run_dir).run()
+    else:
+        run_server(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
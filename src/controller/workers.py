@@ -0,0 +1,125 @@
+import mmap
+import os
+import resource
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.dto.workers import EMPTY, STARTING, WorkerDTO
+
+# pid, index, state, started at, heartbeat at, requests, snapshot generation,
+# stream clients, resident set size in KiB
+_SLOT = struct.Struct("<qqqddqqqq")
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * mmap.PAGESIZE // 1024
+    except OSError:
+        # Not Linux: the peak instead.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class WorkerTable:
+    # One fixed-size slot per worker in a memory-mapped file of the run
+    # directory. Each worker writes only its own slot; the supervisor and
+    # GET /admin/workers read all of them. A slot is rewritten whole, so a
+    # reader may at worst see a heartbeat mixed with the previous one.
+
+    FILENAME = "workers"
+
+    def __init__(self, path: Path) -> None:
+        fd = os.open(path, os.O_RDWR)
+        try:
+            self._map = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+        self.slots: int = len(self._map) // _SLOT.size
+
+    @classmethod
+    def create(cls, directory: Path, slots: int) -> "WorkerTable":
+        path = directory / cls.FILENAME
+        with open(path, "wb") as file:
+            file.truncate(slots * _SLOT.size)
+        return cls(path)
+
+    @classmethod
+    def open(cls, directory: Path) -> "WorkerTable":
+        return cls(directory / cls.FILENAME)
+
+    def write(self, worker: WorkerDTO) -> None:
+        offset = worker.slot * _SLOT.size
+        self._map[offset:offset + _SLOT.size] = _SLOT.pack(
+            worker.pid, worker.index, worker.state, worker.started_at, worker.heartbeat_at,
+            worker.requests, worker.snapshot_generation, worker.stream_clients, worker.rss_kb)
+
+    def read(self, slot: int) -> WorkerDTO:
+        return WorkerDTO(slot, *_SLOT.unpack_from(self._map, slot * _SLOT.size))
+
+    def clear(self, slot: int) -> None:
+        self.write(WorkerDTO(slot, 0, 0, EMPTY, 0.0, 0.0, 0, 0, 0, 0))
+
+    def read_all(self) -> list[WorkerDTO]:
+        return [worker for worker in map(self.read, range(self.slots)) if worker.state != EMPTY]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class HealthReporter:
+    # Runs in a worker and refreshes its slot every WORKER_HEARTBEAT seconds.
+    # The heartbeat is written by its own thread, so it stops when the
+    # process hangs as a whole but not when every request thread is busy;
+    # a worker too busy to answer still shows its request count moving.
+
+    def __init__(self, table: WorkerTable, slot: int, index: int, interval: float,
+                 requests: Callable[[], int], snapshot_generation: Callable[[], int],
+                 stream_clients: Callable[[], int],
+                 orphaned: Optional[Callable[[], bool]] = None,
+                 on_orphaned: Optional[Callable[[], None]] = None) -> None:
+        self._table: WorkerTable = table
+        self._interval: float = interval
+        self._requests = requests
+        self._snapshot_generation = snapshot_generation
+        self._stream_clients = stream_clients
+        # A worker whose supervisor died shuts itself down.
+        self._orphaned = orphaned
+        self._on_orphaned = on_orphaned
+        self._worker = WorkerDTO(slot, os.getpid(), index, STARTING, time.time(), time.time(),
+                                    0, 0, 0, 0)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.report()
+        self._thread = threading.Thread(target=self._run, name="health-reporter", daemon=True)
+        self._thread.start()
+
+    def set_state(self, state: int) -> None:
+        self._worker.state = state
+        self.report()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def report(self) -> None:
+        worker = self._worker
+        worker.heartbeat_at = time.time()
+        worker.requests = self._requests()
+        worker.snapshot_generation = self._snapshot_generation()
+        worker.stream_clients = self._stream_clients()
+        worker.rss_kb = _rss_kb()
+        self._table.write(worker)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self._interval):
+            self.report()
+            if self._orphaned is not None and self._orphaned():
+                self._on_orphaned()
+                return
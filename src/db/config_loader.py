@@ -3,8 +3,8 @@ import json
 
 from adaptix import Retort
 
-from src.db.table_config import TableConfig
-from src.utils.paths import TABLES_CONFIG
+from src.db.table_config import TableConfig, Migration
+from src.utils.paths import TABLES_CONFIG, MIGRATIONS
 
 retort = Retort()
 
@@ -15,3 +15,11 @@ def load_tables_config():
         tables_config = retort.load(json.load(file), list[TableConfig])
 
     return tables_config
+
+def load_migrations():
+    migrations: list[Migration]
+
+    with open(MIGRATIONS, "r") as file:
+        migrations = retort.load(json.load(file), list[Migration])
+
+    return sorted(migrations, key=lambda migration: migration.version)
@@ -10,3 +10,9 @@ class TableConfig:
     name: str
     columns_data: str
     fill_data: TableFillData
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    statements: list[str]
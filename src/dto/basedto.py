@@ -1,6 +1,29 @@
 from abc import ABC, abstractmethod
+from typing import Any, Iterator, Optional
+
+from src.utils.serializer import Serializer
 
 class DTO(ABC):
+    CONTENT_TYPE: str = "application/json"
+
     @abstractmethod
     def tojson(self):
         pass
+
+    def encode(self, serializer: Serializer) -> bytes:
+        return serializer.dumps(self.tojson())
+
+class CollectionDTO(DTO):
+    # Set on a page of a paginated collection when more items follow.
+    next_cursor: Optional[str] = None
+
+    @abstractmethod
+    def iter_json(self) -> Iterator[Any]:
+        pass
+
+    def iter_encoded(self, serializer: Serializer) -> Iterator[bytes]:
+        for item in self.iter_json():
+            yield serializer.dumps(item)
+
+    def tojson(self) -> list:
+        return list(self.iter_json())
@@ -1,15 +1,19 @@
-import json
-from typing import Any
-from dataclasses import dataclass
-from src.dto.basedto import DTO
+from typing import Any, Iterable, Iterator, Optional
+from dataclasses import dataclass, field
+from src.dto.basedto import DTO, CollectionDTO
+from src.utils.serializer import Serializer
 
 
-@dataclass
+@dataclass(frozen=True)
 class CurrencyDTO(DTO):
     id: int
     name: str
     code: str
     sign: str
+    # (serializer name, bytes): a currency is embedded in every rate that
+    # references it, so it is encoded once and reused.
+    _encoded: Optional[tuple[str, bytes]] = field(default=None, init=False,
+                                                  repr=False, compare=False)
 
     def tojson(self) -> str:
         data_table: dict[str, Any] = {
@@ -20,15 +24,23 @@ class CurrencyDTO(DTO):
         }
         return data_table
 
-@dataclass
-class CurrenciesDTO(DTO):
-    currencies: list[CurrencyDTO]
+    def encode(self, serializer: Serializer) -> bytes:
+        encoded = self._encoded
+        if encoded is None or encoded[0] != serializer.name:
+            encoded = (serializer.name, serializer.dumps(self.tojson()))
+            object.__setattr__(self, "_encoded", encoded)
+        return encoded[1]
 
-    def tojson(self) -> str:
-        currencies_jsons: list[str] = []
+@dataclass
+class CurrenciesDTO(CollectionDTO):
+    currencies: Iterable[CurrencyDTO]
+    next_cursor: Optional[str] = None
 
+    def iter_json(self) -> Iterator[dict[str, Any]]:
         for currency_dto in self.currencies:
-            currencies_jsons.append(currency_dto.tojson())
+            yield currency_dto.tojson()
 
-        return currencies_jsons
+    def iter_encoded(self, serializer: Serializer) -> Iterator[bytes]:
+        for currency_dto in self.currencies:
+            yield currency_dto.encode(serializer)
 
@@ -1,13 +1,17 @@
 from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterator
 from src.dto.currencies import CurrencyDTO
-from src.dto.basedto import DTO
+from src.dto.basedto import DTO, CollectionDTO
+from src.utils.exceptions import RequestException
+from src.utils.serializer import Serializer
 @dataclass
 class ExchangeDTO(DTO):
     base_currency: CurrencyDTO
     target_currency: CurrencyDTO
     rate: float
-    amount: float
-    converted_amount: float
+    amount: Decimal
+    converted_amount: Decimal
 
     def tojson(self):
         data_table = {
@@ -19,3 +23,30 @@ class ExchangeDTO(DTO):
         }
         return data_table
 
+    def encode(self, serializer: Serializer) -> bytes:
+        return (b'{"baseCurrency":%b,"targetCurrency":%b,"rate":%b,"amount":%b,"convertedAmount":%b}'
+                % (self.base_currency.encode(serializer),
+                   self.target_currency.encode(serializer),
+                   serializer.dumps(self.rate),
+                   serializer.dumps_decimal(self.amount),
+                   serializer.dumps_decimal(self.converted_amount)))
+
+
+
+@dataclass
+class ExchangeBatchDTO(CollectionDTO):
+    results: list[ExchangeDTO | RequestException]
+
+    def iter_json(self) -> Iterator[dict]:
+        for result in self.results:
+            if isinstance(result, RequestException):
+                yield {"message" : result.MESSAGE}
+            else:
+                yield result.tojson()
+
+    def iter_encoded(self, serializer: Serializer) -> Iterator[bytes]:
+        for result in self.results:
+            if isinstance(result, RequestException):
+                yield serializer.dumps({"message" : result.MESSAGE})
+            else:
+                yield result.encode(serializer)
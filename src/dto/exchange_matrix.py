@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from src.dto.currencies import CurrencyDTO
+from src.dto.basedto import DTO
+
+
+@dataclass
+class CrossRateDTO(DTO):
+    target_currency: CurrencyDTO
+    rate: float
+
+    def tojson(self) -> dict:
+        data_table = {
+            "targetCurrency" : self.target_currency.tojson(),
+            "rate" : self.rate
+        }
+        return data_table
+
+
+@dataclass
+class BaseCrossRatesDTO(DTO):
+    base_currency: CurrencyDTO
+    rates: list[CrossRateDTO]
+
+    def tojson(self) -> dict:
+        data_table = {
+            "baseCurrency" : self.base_currency.tojson(),
+            "rates" : [cross_rate.tojson() for cross_rate in self.rates]
+        }
+        return data_table
+
+
+@dataclass
+class ExchangeMatrixDTO(DTO):
+    currencies: list[str]
+    rates: list[list[Optional[float]]]
+
+    def tojson(self) -> dict:
+        data_table = {
+            "currencies" : self.currencies,
+            "rates" : self.rates
+        }
+        return data_table
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
-import json
+from typing import Iterable, Iterator, Optional
 
 from src.dto.currencies import CurrencyDTO
-from src.dto.basedto import DTO
+from src.dto.basedto import DTO, CollectionDTO
+from src.utils.serializer import Serializer
 
 @dataclass
 class ExchangeRateDTO(DTO):
@@ -20,17 +21,31 @@ class ExchangeRateDTO(DTO):
         }
         return data_table
 
-class ExchangeRatesDTO(DTO):
-    def __init__(self) -> None:
-        self.__exchange_rates: list[ExchangeRateDTO] = []
+    def encode(self, serializer: Serializer) -> bytes:
+        # Spliced from the cached currency encodings instead of dumping the
+        # nested dicts tojson() builds.
+        return b'{"id":%b,"baseCurrency":%b,"targetCurrency":%b,"rate":%b}' % (
+            serializer.dumps(self.id),
+            self.baseCurrency.encode(serializer),
+            self.targetCurrency.encode(serializer),
+            serializer.dumps(self.rate))
+
+class ExchangeRatesDTO(CollectionDTO):
+    def __init__(self, exchange_rates: Optional[Iterable[ExchangeRateDTO]] = None,
+                 next_cursor: Optional[str] = None) -> None:
+        self.__exchange_rates: Iterable[ExchangeRateDTO] = exchange_rates if exchange_rates is not None else []
+        self.next_cursor: Optional[str] = next_cursor
 
     def append(self, exchange_rate: ExchangeRateDTO) -> None:
         self.__exchange_rates.append(exchange_rate)
 
-    def tojson(self) -> list:
-        exchange_rates_jsons = []
+    def __iter__(self) -> Iterator[ExchangeRateDTO]:
+        return iter(self.__exchange_rates)
 
+    def iter_json(self) -> Iterator[dict]:
         for exchange_rate in self.__exchange_rates:
-            exchange_rates_jsons.append(exchange_rate.tojson())
+            yield exchange_rate.tojson()
 
-        return exchange_rates_jsons
+    def iter_encoded(self, serializer: Serializer) -> Iterator[bytes]:
+        for exchange_rate in self.__exchange_rates:
+            yield exchange_rate.encode(serializer)
@@ -1,4 +1,7 @@
 from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from src.dto.rate_events import EventStreamDTO
 
 
 @dataclass
@@ -11,7 +14,10 @@ class HTTPResponseData:
     def __init__(self):
         self.code: int = 500
         self.headers: list[HTTPHeaderDTO] = []
-        self.message: str = ""
+        self.message: bytes = b""
+        self.body: Optional[Iterable[bytes]] = None
+        # Set for event streams: the connection is handed over after the headers.
+        self.stream: Optional[EventStreamDTO] = None
 
     def add_header(self, keyword: str, value: str) -> None:
         self.headers.append(HTTPHeaderDTO(keyword, value))
@@ -0,0 +1,40 @@
+from dataclasses import dataclass, field
+
+from src.dto.basedto import DTO
+
+
+@dataclass
+class ImportRowErrorDTO(DTO):
+    line: int
+    message: str
+
+    def tojson(self) -> dict:
+        data_table = {
+            "line" : self.line,
+            "message" : self.message
+        }
+        return data_table
+
+
+@dataclass
+class ImportReportDTO(DTO):
+    kind: str
+    rows_read: int = 0
+    rows_imported: int = 0
+    seconds: float = 0.0
+    errors: list[ImportRowErrorDTO] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+    def tojson(self) -> dict:
+        data_table = {
+            "kind" : self.kind,
+            "rowsRead" : self.rows_read,
+            "rowsImported" : self.rows_imported,
+            "seconds" : self.seconds,
+            "rowsPerSecond" : self.rows_per_second,
+            "errors" : [error.tojson() for error in self.errors]
+        }
+        return data_table
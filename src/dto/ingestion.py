@@ -0,0 +1,38 @@
+from dataclasses import dataclass
+
+from src.dto.basedto import DTO
+
+
+@dataclass
+class IngestionStatsDTO(DTO):
+    source: str
+    running: bool
+    received: int
+    coalesced: int
+    rejected: int
+    applied: int
+    failed: int
+    batches: int
+    pending: int
+    last_batch_size: int
+    last_batch_seconds: float
+    last_lag_seconds: float
+    updates_per_second: float
+
+    def tojson(self) -> dict:
+        data_table = {
+            "source" : self.source,
+            "running" : self.running,
+            "received" : self.received,
+            "coalesced" : self.coalesced,
+            "rejected" : self.rejected,
+            "applied" : self.applied,
+            "failed" : self.failed,
+            "batches" : self.batches,
+            "pending" : self.pending,
+            "lastBatchSize" : self.last_batch_size,
+            "lastBatchSeconds" : self.last_batch_seconds,
+            "lastLagSeconds" : self.last_lag_seconds,
+            "updatesPerSecond" : self.updates_per_second
+        }
+        return data_table
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+from src.dto.basedto import DTO
+from src.utils.serializer import Serializer
+
+
+@dataclass
+class MetricsDTO(DTO):
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    text: str
+
+    def tojson(self) -> str:
+        return self.text
+
+    def encode(self, serializer: Serializer) -> bytes:
+        return self.text.encode("utf-8")
@@ -0,0 +1,64 @@
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from src.dto.basedto import DTO, CollectionDTO
+
+
+@dataclass
+class StatementDTO(DTO):
+    sql: str
+    params: list[Any]
+    seconds: float
+
+    def tojson(self) -> dict:
+        data_table = {
+            "sql" : self.sql,
+            "params" : self.params,
+            "seconds" : self.seconds
+        }
+        return data_table
+
+
+@dataclass
+class ProfileCaptureDTO(DTO):
+    id: int
+    started_at: float
+    method: str
+    path: str
+    reason: str
+    status: int = 0
+    seconds: float = 0.0
+    statements: list[StatementDTO] = field(default_factory=list)
+    call_tree: list[dict] = field(default_factory=list)
+    top_functions: list[dict] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        data_table = {
+            "id" : self.id,
+            "startedAt" : self.started_at,
+            "method" : self.method,
+            "path" : self.path,
+            "reason" : self.reason,
+            "status" : self.status,
+            "seconds" : self.seconds,
+            "sqlStatements" : len(self.statements)
+        }
+        return data_table
+
+    def tojson(self) -> dict:
+        data_table = self.summary()
+        data_table.update({
+            "statements" : [statement.tojson() for statement in self.statements],
+            "callTree" : self.call_tree,
+            "topFunctions" : self.top_functions
+        })
+        return data_table
+
+
+@dataclass
+class ProfileCapturesDTO(CollectionDTO):
+    captures: list[ProfileCaptureDTO]
+
+    def iter_json(self) -> Iterator[dict]:
+        for capture in self.captures:
+            yield capture.summary()
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from src.dto.basedto import DTO
+from src.dto.currencies import CurrencyDTO
+from src.utils.serializer import Serializer
+
+
+@dataclass
+class RateChangeDTO(DTO):
+    baseCurrency: CurrencyDTO
+    targetCurrency: CurrencyDTO
+    rate: float
+    # Unix time the change was published.
+    time: float
+
+    def tojson(self) -> dict:
+        data_table = {
+            "baseCurrency" : self.baseCurrency.tojson(),
+            "targetCurrency" : self.targetCurrency.tojson(),
+            "rate" : self.rate,
+            "time" : self.time
+        }
+        return data_table
+
+    def encode(self, serializer: Serializer) -> bytes:
+        return b'{"baseCurrency":%b,"targetCurrency":%b,"rate":%b,"time":%b}' % (
+            self.baseCurrency.encode(serializer),
+            self.targetCurrency.encode(serializer),
+            serializer.dumps(self.rate),
+            serializer.dumps(self.time))
+
+
+@dataclass
+class EventStreamDTO(DTO):
+    # Not a body of its own: the handler writes the headers and hands the
+    # connection to the event stream, which writes the events.
+    CONTENT_TYPE = "text/event-stream; charset=utf-8"
+
+    # Codes whose rate changes the client wants; None for all of them.
+    currencies: Optional[frozenset[str]] = None
+    last_event_id: Optional[str] = None
+
+    def tojson(self) -> dict:
+        return {}
+
+    def encode(self, serializer: Serializer) -> bytes:
+        return b""
@@ -0,0 +1,52 @@
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+from src.dto.basedto import DTO, CollectionDTO
+
+# Worker states, as reported in the health table.
+EMPTY = 0
+STARTING = 1
+READY = 2
+STOPPING = 3
+
+STATE_NAMES: dict[int, str] = {EMPTY: "empty", STARTING: "starting", READY: "ready", STOPPING: "stopping"}
+
+
+@dataclass
+class WorkerDTO(DTO):
+    slot: int
+    pid: int
+    index: int
+    state: int
+    started_at: float
+    heartbeat_at: float
+    requests: int
+    snapshot_generation: int
+    stream_clients: int
+    rss_kb: int
+
+    def tojson(self) -> dict:
+        data_table = {
+            "slot" : self.slot,
+            "pid" : self.pid,
+            "index" : self.index,
+            "state" : STATE_NAMES.get(self.state, str(self.state)),
+            "startedAt" : self.started_at,
+            "heartbeatAt" : self.heartbeat_at,
+            "heartbeatAge" : round(max(0.0, time.time() - self.heartbeat_at), 3),
+            "requests" : self.requests,
+            "snapshotGeneration" : self.snapshot_generation,
+            "streamClients" : self.stream_clients,
+            "rssKb" : self.rss_kb
+        }
+        return data_table
+
+
+@dataclass
+class WorkersDTO(CollectionDTO):
+    workers: list[WorkerDTO]
+
+    def iter_json(self) -> Iterator[dict]:
+        for worker in self.workers:
+            yield worker.tojson()
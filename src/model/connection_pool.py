@@ -0,0 +1,83 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from src.utils.exceptions import DatabaseBusyError
+
+
+class ConnectionPool:
+    def __init__(self, database: Path,
+                 size: int,
+                 timeout: float,
+                 journal_mode: str = "WAL") -> None:
+        self._database: Path = database
+        self._size: int = size
+        self._timeout: float = timeout
+        self._journal_mode: str = journal_mode
+
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._created: int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._database,
+                                     timeout=self._timeout,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute(f"PRAGMA journal_mode = {self._journal_mode}")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self._size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except BaseException:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self._timeout)
+        except queue.Empty:
+            raise DatabaseBusyError
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        if connection.in_transaction:
+            connection.rollback()
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            with self._lock:
+                self._created -= 1
@@ -1,9 +1,11 @@
+import json
 import sqlite3
 from abc import ABC, abstractmethod
-import pandas as pd
-from typing import Optional
+from typing import Iterator, Optional
 
-from src.model.dbmanager import DBManager
+from src.model.dbmanager import DBManager, Row
+from src.model.snapshot import RateSnapshot, SnapshotStore
+from src.utils import settings
 from src.utils.singleton import Singleton
 from src.utils.exceptions import ForeignKeyError
 
@@ -15,10 +17,28 @@ SELECT_EXCHANGE_RATES = """
     select ID id, 
     BaseCurrencyID base_currency_id, 
     TargetCurrencyID target_currency_id, 
-    Rate rate
+    cast(Rate as real) rate
     from ExchangeRates
     """
 
+SELECT_EXCHANGE_RATES_WITH_CURRENCIES = """
+    select er.ID id,
+    cast(er.Rate as real) rate,
+    b.ID base_id, b.FullName base_name, b.Code base_code, b.Sign base_sign,
+    t.ID target_id, t.FullName target_name, t.Code target_code, t.Sign target_sign
+    from ExchangeRates er
+    join Currencies b on b.ID = er.BaseCurrencyID
+    join Currencies t on t.ID = er.TargetCurrencyID
+    """
+
+SELECT_EXCHANGE_RATE_HISTORY = """
+    select BaseCurrencyID base_currency_id,
+    TargetCurrencyID target_currency_id,
+    ValidFrom valid_from,
+    Rate rate
+    from ExchangeRateHistory
+    """
+
 INSERT_CURRENCY = """
     insert into Currencies (fullname, code, sign)
     values (?, ?, ?)
@@ -29,22 +49,98 @@ INSERT_EXCHANGE_RATE = """
     values (?, ?, ?)
     """
 
+UPSERT_CURRENCY = """
+    insert into Currencies (fullname, code, sign)
+    values (?, ?, ?)
+    on conflict (code) do update set fullname = excluded.fullname, sign = excluded.sign
+    """
+
+UPSERT_EXCHANGE_RATE = """
+    insert into exchangeRates (baseCurrencyId, targetCurrencyId, rate)
+    values (?, ?, ?)
+    on conflict (baseCurrencyId, targetCurrencyId) do update set rate = excluded.rate
+    """
+
+# The whole batch is one JSON parameter, so SQLite runs it in a single step
+# instead of one per row; under load every step has to win the GIL back.
+UPSERT_EXCHANGE_RATES_JSON = """
+    insert into exchangeRates (baseCurrencyId, targetCurrencyId, rate)
+    select json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]')
+    from json_each(?)
+    where true
+    on conflict (baseCurrencyId, targetCurrencyId) do update set rate = excluded.rate
+    """
+
+INSERT_EXCHANGE_RATE_HISTORY = """
+    insert or replace into ExchangeRateHistory (BaseCurrencyID, TargetCurrencyID, ValidFrom, Rate)
+    values (?, ?, ?, ?)
+    """
+
+
+def _where(conditions: list[str]) -> str:
+    return f"where {' and '.join(conditions)}" if conditions else ""
+
+
 class DAO(ABC, Singleton):
 
     def __init__(self) -> None:
         self._db_manager = DBManager()
+        self._snapshots = SnapshotStore()
+
+    def _snapshot(self) -> Optional[RateSnapshot]:
+        # The shared snapshot when the server runs as several processes;
+        # reads it can answer skip SQLite.
+        return self._snapshots.current()
 
-    def _execute_query(self, query, params: Optional[list[str]] = None) -> pd.DataFrame:
+    def _execute_query(self, query, params: Optional[list[str]] = None) -> list[Row]:
         return self._db_manager.execute_query(query, params)
 
+    def _iter_by_id(self, select: str, conditions: list[str], params: list,
+                    id_column: str, after_id: Optional[int] = None,
+                    limit: Optional[int] = None) -> Iterator[Row]:
+        # Rows in id order, read DB_FETCH_SIZE at a time with a seek past the
+        # last id. Each page takes a pooled connection only while it is read,
+        # so a consumer that is slow between rows, like a chunked response
+        # to a slow client, holds no connection or read transaction; rows
+        # written meanwhile may or may not show up, none twice.
+        while limit is None or limit > 0:
+            page_size = settings.DB_FETCH_SIZE if limit is None else min(limit, settings.DB_FETCH_SIZE)
+            page_conditions, page_params = list(conditions), list(params)
+            if after_id is not None:
+                page_conditions.append(f"{id_column} > ?")
+                page_params.append(after_id)
+
+            rows = self._execute_query(f"""
+                {select}
+                {_where(page_conditions)}
+                order by {id_column}
+                limit ?
+                """, page_params + [page_size])
+
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1]["id"]
+            if limit is not None:
+                limit -= len(rows)
+
+    def _execute_query_one(self, query, params: Optional[list[str]] = None) -> Optional[Row]:
+        return self._db_manager.execute_query_one(query, params)
+
     def _execute_dml(self, statement, params: Optional[list[str]] = None):
         try:
             self._db_manager.execute_dml(statement, params)
         except sqlite3.IntegrityError:
             raise ForeignKeyError
 
+    def _execute_many(self, statement, rows: list[list]) -> int:
+        try:
+            return self._db_manager.execute_many(statement, rows)
+        except sqlite3.IntegrityError:
+            raise ForeignKeyError
+
     @abstractmethod
-    def get_all(self) -> pd.DataFrame:
+    def get_all(self) -> list[Row]:
         pass
 
     @abstractmethod
@@ -53,14 +149,37 @@ class DAO(ABC, Singleton):
 
 
 class CurrenciesDAO(DAO):
-    def get_all(self) -> pd.DataFrame:
-        currencies_data: pd.DataFrame = self._execute_query(SELECT_CURRENCIES)
+    def get_all(self, snapshot: bool = True) -> list[Row]:
+        current = self._snapshot() if snapshot else None
+        if current is not None:
+            return current.currencies()
+
+        currencies_data: list[Row] = self._execute_query(SELECT_CURRENCIES)
 
         return currencies_data
 
-    def get_one(self, id: Optional[int] = None, code: Optional[str] = None):
+    def iter_all(self, code_prefix: Optional[str] = None,
+                 after_id: Optional[int] = None,
+                 limit: Optional[int] = None) -> Iterator[Row]:
+        current = self._snapshot()
+        if current is not None and code_prefix is None and after_id is None and limit is None:
+            return iter(current.currencies())
+
+        conditions, params = [], []
+        if code_prefix:
+            # A range instead of "like" so the unique index on Code is used.
+            conditions.append("Code >= ? and Code < ?")
+            params += [code_prefix, code_prefix[:-1] + chr(ord(code_prefix[-1]) + 1)]
+
+        return self._iter_by_id(SELECT_CURRENCIES, conditions, params, "ID", after_id, limit)
+
+    def get_one(self, id: Optional[int] = None, code: Optional[str] = None) -> Optional[Row]:
+        current = self._snapshot()
+        if current is not None:
+            return current.currency(id, code)
+
         params = [p for p in (id, code) if p]
-        currency_data: pd.DataFrame = self._execute_query(f"""
+        currency_data: Optional[Row] = self._execute_query_one(f"""
             {SELECT_CURRENCIES}
             where {"id = ? " if id else "1=1"} and
                   {"code = ? " if code else "1=1"}
@@ -71,25 +190,86 @@ class CurrenciesDAO(DAO):
     def insert(self, name: str, code: str, sign: str) -> None:
         self._execute_dml(INSERT_CURRENCY, [name, code, sign])
 
+    def upsert_many(self, rows: list[list]) -> int:
+        return self._execute_many(UPSERT_CURRENCY, rows)
+
 
 class ExchangeRatesDAO(DAO):
-    def get_all(self) -> pd.DataFrame:
-        exchange_rates_data: pd.DataFrame = self._execute_query(SELECT_EXCHANGE_RATES)
+    def get_all(self, snapshot: bool = True) -> list[Row]:
+        current = self._snapshot() if snapshot else None
+        if current is not None:
+            return current.rates()
+
+        exchange_rates_data: list[Row] = self._execute_query(SELECT_EXCHANGE_RATES)
 
         return exchange_rates_data
 
-    def get_one(self, base_currency_id, target_currency_id) -> pd.DataFrame:
-        exchange_rate_data: pd.DataFrame = self._execute_query(f"""
+    def get_one(self, base_currency_id, target_currency_id) -> Optional[Row]:
+        current = self._snapshot()
+        if current is not None:
+            return current.rate(base_currency_id, target_currency_id)
+
+        exchange_rate_data: Optional[Row] = self._execute_query_one(f"""
             {SELECT_EXCHANGE_RATES}
             where BaseCurrencyID = ? and TargetCurrencyID = ?
             """, [base_currency_id, target_currency_id])
 
         return exchange_rate_data
 
+    def iter_all_with_currencies(self, base_currency_id: Optional[int] = None,
+                                 target_currency_id: Optional[int] = None,
+                                 after_id: Optional[int] = None,
+                                 limit: Optional[int] = None) -> Iterator[Row]:
+        # Served by ExchangeRatesBase / ExchangeRatesTarget / ExchangeRatesPair,
+        # whose entries are ordered by ID within a currency, so "after" is a seek.
+        current = self._snapshot()
+        if current is not None and base_currency_id is None and target_currency_id is None \
+                and after_id is None and limit is None:
+            return iter(current.rates_with_currencies())
+
+        conditions, params = [], []
+        if base_currency_id is not None:
+            conditions.append("er.BaseCurrencyID = ?")
+            params.append(base_currency_id)
+        if target_currency_id is not None:
+            conditions.append("er.TargetCurrencyID = ?")
+            params.append(target_currency_id)
+
+        return self._iter_by_id(SELECT_EXCHANGE_RATES_WITH_CURRENCIES, conditions, params,
+                                "er.ID", after_id, limit)
+
     def insert(self, base_currency_id, target_currency_id, rate) -> None:
         self._execute_dml(INSERT_EXCHANGE_RATE,
                           [base_currency_id, target_currency_id, rate])
 
+    def upsert_many(self, rows: list[list]) -> int:
+        return self._execute_many(UPSERT_EXCHANGE_RATE, rows)
+
+    def upsert_batch(self, rows: list[list]) -> None:
+        self._execute_dml(UPSERT_EXCHANGE_RATES_JSON, [json.dumps(rows)])
+
+
+class ExchangeRateHistoryDAO(DAO):
+    # ExchangeRateHistory is written by triggers on ExchangeRates; rows are
+    # only ever appended, or replaced when two land on the same second.
+    def get_all(self) -> list[Row]:
+        return self._execute_query(SELECT_EXCHANGE_RATE_HISTORY)
+
+    def get_pair(self, base_currency_id: int, target_currency_id: int) -> list[Row]:
+        # A range scan of the clustered primary key, already in time order.
+        return self._execute_query(f"""
+            {SELECT_EXCHANGE_RATE_HISTORY}
+            where BaseCurrencyID = ? and TargetCurrencyID = ?
+            order by ValidFrom
+            """, [base_currency_id, target_currency_id])
+
+    def insert(self, base_currency_id, target_currency_id, valid_from, rate) -> None:
+        self._execute_dml(INSERT_EXCHANGE_RATE_HISTORY,
+                          [base_currency_id, target_currency_id, valid_from, rate])
+
+    def insert_many(self, rows: list[list]) -> int:
+        return self._execute_many(INSERT_EXCHANGE_RATE_HISTORY, rows)
+
 
 # class CurrencyDAO(DAO):
 #     def get(self, currency_code) -> DataTable:
@@ -1,119 +1,210 @@
 import sqlite3
-import pandas as pd
+import sys
+import threading
+import time
 from pathlib import Path
-from typing import Optional, TypeVar, Generic
+from typing import Any, Callable, Optional, TypeVar, Generic
 
+from src.model.connection_pool import ConnectionPool
+from src.utils import metrics, profiling, settings
 from src.utils.singleton import Singleton
-from src.utils.paths import DB
-from src.db.table_config import TableConfig
-from src.db.config_loader import load_tables_config
+from src.db.table_config import TableConfig, Migration
+from src.db.config_loader import load_tables_config, load_migrations
 
 T = TypeVar('T')
 
+Row = dict[str, Any]
+
 class SupportsLenAndGetItem(Generic[T]):
     pass
 
-def manage_connection(func):
+def apply_migrations(connection: sqlite3.Connection, migrations: list[Migration]) -> list[int]:
+    # Each migration runs in its own write transaction together with the
+    # user_version bump, so a failed migration leaves the schema untouched
+    # and concurrent starters apply it only once.
+    applied: list[int] = []
 
-    def wrapper(self, *args, **kwargs):
+    for migration in migrations:
+        connection.execute("begin immediate")
+        try:
+            version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+            if migration.version <= version:
+                connection.rollback()
+                continue
+
+            for statement in migration.statements:
+                cursor = connection.execute(statement)
+                if statement.lstrip().lower().startswith("delete") and cursor.rowcount > 0:
+                    # Data a migration throws away is never silent.
+                    print(f"migration {migration.version} ({migration.description}): "
+                          f"deleted {cursor.rowcount} rows", file=sys.stderr)
+            connection.execute(f"PRAGMA user_version = {int(migration.version)}")
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+
+        applied.append(migration.version)
+
+    return applied
 
-        already_connected = self.is_connected()
+class DBManager(Singleton):
+    __DB: Path = settings.DB_PATH
+
+    def init(self) -> None:
+        # Data generation: bumped by every committed DML, so callers can tell
+        # whether anything changed without querying. The epoch keeps versions
+        # from before a restart from matching the new ones.
+        self._epoch: int = time.time_ns()
+        self._generation: int = 0
+        self._generation_lock = threading.Lock()
+        # Called after every committed DML, on the committing thread.
+        self._commit_listeners: list[Callable[[], None]] = []
 
-        if not already_connected:
-            self._open_connection()
+        creation_required: bool = False
+        if not self.__DB.exists():
+            creation_required = True
 
-        result = func(self,*args, **kwargs)
+        self._pool: ConnectionPool = ConnectionPool(self.__DB,
+                                                    size=settings.DB_POOL_SIZE,
+                                                    timeout=settings.DB_POOL_TIMEOUT,
+                                                    journal_mode=settings.DB_JOURNAL_MODE)
 
-        if not already_connected:
-            self._close_connection()
+        if creation_required:
+            self.__create_database(load_tables_config())
 
-        return result
-    return wrapper
+        self.migrate()
 
-class DBManager(Singleton):
-    __DB: Path = DB
+    def migrate(self) -> list[int]:
+        with self._pool.connection() as connection:
+            return apply_migrations(connection, load_migrations())
 
-    def __init__(self) -> None:
+    @property
+    def generation(self) -> int:
+        return self._generation
 
-        creation_required: bool = False
-        if not self.__DB.exists():
-            creation_required = True
+    @property
+    def data_version(self) -> str:
+        return f"{self._epoch:x}-{self._generation}"
 
-        self._connection: sqlite3.Connection = sqlite3.Connection(self.__DB)
-        self._cursor: sqlite3.Cursor = self._connection.cursor()
+    def bump_generation(self) -> int:
+        with self._generation_lock:
+            self._generation += 1
+            return self._generation
 
-        self._close_connection()
+    def watch(self) -> sqlite3.Connection:
+        # A connection of its own for PRAGMA data_version, which changes
+        # only with commits made on other connections, this process's
+        # pooled ones and other processes' alike.
+        return sqlite3.connect(self.__DB, timeout=settings.DB_POOL_TIMEOUT, check_same_thread=False)
 
-        if creation_required:
-            self.__create_database(load_tables_config())
+    def add_commit_listener(self, listener: Callable[[], None]) -> None:
+        if listener not in self._commit_listeners:
+            self._commit_listeners.append(listener)
+
+    def _committed(self) -> None:
+        self.bump_generation()
+        for listener in self._commit_listeners:
+            listener()
 
-    @manage_connection
-    def _execute(self, statement, params: Optional[list[str]] = None) -> None:
-        self._cursor.execute("PRAGMA foreign_keys = ON")
+    def schema_version(self) -> int:
+        with self._pool.connection() as connection:
+            return connection.execute("PRAGMA user_version").fetchone()[0]
+
+    @staticmethod
+    def _execute(cursor: sqlite3.Cursor, statement, params: Optional[list[str]] = None) -> None:
         if params:
-            self._cursor.execute(statement, params)
+            cursor.execute(statement, params)
         else:
-            self._cursor.execute(statement)
+            cursor.execute(statement)
+
+    @staticmethod
+    def _col_names(cursor: sqlite3.Cursor) -> tuple[str, ...]:
+        return tuple(str(i[0]).lower() for i in cursor.description)
+
+    def execute_query(self, query: str, params: Optional[list[str]] = None) -> list[Row]:
+        with self._pool.connection() as connection:
+            started = time.perf_counter()
+            result: sqlite3.Cursor = connection.cursor()
+            self._execute(result, query, params)
 
-    @manage_connection
-    def execute_query(self, query: str, params: Optional[list[str]] = None) -> pd.DataFrame:
-        self._execute(query, params)
+            rows: list[tuple] = result.fetchall()
+            col_names: tuple[str, ...] = self._col_names(result)
+            result.close()
+            elapsed = time.perf_counter() - started
+            metrics.record_sql("query", elapsed)
+            profiling.record_statement(query, params, elapsed)
 
-        result: sqlite3.Cursor = self._cursor
+        return [dict(zip(col_names, row)) for row in rows]
 
-        rows: tuple[tuple, ...] = tuple(result.fetchall())
-        col_names: tuple[str, ...] = tuple(str(i[0]).lower() for i in result.description)
+    def execute_query_one(self, query: str, params: Optional[list[str]] = None) -> Optional[Row]:
+        with self._pool.connection() as connection:
+            started = time.perf_counter()
+            result: sqlite3.Cursor = connection.cursor()
+            self._execute(result, query, params)
 
-        return pd.DataFrame(data=rows, columns=col_names)
+            row: Optional[tuple] = result.fetchone()
+            col_names: tuple[str, ...] = self._col_names(result)
+            result.close()
+            elapsed = time.perf_counter() - started
+            metrics.record_sql("query", elapsed)
+            profiling.record_statement(query, params, elapsed)
+
+        if row is None:
+            return None
+
+        return dict(zip(col_names, row))
 
-    @manage_connection
     def execute_dml(self, statement: str, params: Optional[list[str]] = None) -> None:
-        self._execute(statement, params)
-        self._connection.commit()
+        with self._pool.connection() as connection:
+            started = time.perf_counter()
+            self._execute(connection.cursor(), statement, params)
+            connection.commit()
+            elapsed = time.perf_counter() - started
+            metrics.record_sql("dml", elapsed)
+            profiling.record_statement(statement, params, elapsed)
+        self._committed()
+
+    def execute_many(self, statement: str, rows: list[list]) -> int:
+        with self._pool.connection() as connection:
+            started = time.perf_counter()
+            cursor = connection.executemany(statement, rows)
+            connection.commit()
+            elapsed = time.perf_counter() - started
+            metrics.record_sql("dml", elapsed)
+            profiling.record_statement(statement, [f"{len(rows)} rows"], elapsed)
+        self._committed()
+        return cursor.rowcount
 
-    @manage_connection
     def execute_ddl(self, statement: str, params: Optional[list[str]] = None) -> None:
-        self._execute(statement, params)
+        with self._pool.connection() as connection:
+            self._execute(connection.cursor(), statement, params)
+
+    def close(self) -> None:
+        self._pool.close()
 
-    @manage_connection
     def __create_database(self, tables_config):
+        with self._pool.connection() as connection:
+            cursor = connection.cursor()
 
-        for table_config in tables_config:
-            self.__create_table(table_config)
-            self.__fill_table(table_config)
+            for table_config in tables_config:
+                self.__create_table(cursor, table_config)
+                self.__fill_table(cursor, table_config)
 
-        self._connection.commit()
+            connection.commit()
 
-    @manage_connection
-    def __create_table(self, table_config: TableConfig):
-        self.execute_ddl(f"""
+    def __create_table(self, cursor: sqlite3.Cursor, table_config: TableConfig):
+        self._execute(cursor, f"""
             create table {table_config.name}
             ({table_config.columns_data})
             """)
 
-    @manage_connection
-    def __fill_table(self, table_config: TableConfig):
+    def __fill_table(self, cursor: sqlite3.Cursor, table_config: TableConfig):
         rows = table_config.fill_data.rows
         columns = table_config.fill_data.columns
-        for row in rows:
-            self.execute_dml(f"""
-                insert into {table_config.name} 
-                {tuple(columns)}
-                values {tuple(row)}
-                """)
-
-    def _open_connection(self) -> None:
-        self._connection = sqlite3.connect(self.__DB)
-        self._cursor = self._connection.cursor()
-
-    def _close_connection(self) -> None:
-        self._cursor.close()
-        self._connection.close()
-
-    def is_connected(self):
-        try:
-            self._connection.cursor()
-            return True
-        except sqlite3.ProgrammingError:
-            return False
-
+        placeholders = ", ".join("?" * len(columns))
+        cursor.executemany(f"""
+            insert into {table_config.name}
+            ({", ".join(columns)})
+            values ({placeholders})
+            """, rows)
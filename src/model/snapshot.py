@@ -0,0 +1,378 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from src.model.dbmanager import Row
+from src.utils.singleton import Singleton
+
+# A read-only image of the currencies and exchange rates, shared by every
+# worker process of one server through memory-mapped files. Each published
+# generation is a separate file, written whole and then announced by bumping
+# the generation in a small control file, so a reader never sees a file in
+# the middle of being written. Lookups are binary searches over arrays that
+# live in the mapping; nothing is copied into a process until a row is asked
+# for.
+
+MAGIC = b"CURSNAP1"
+CONTROL_MAGIC = b"CURCTRL1"
+
+# magic, generation, published at, currencies, rates, string bytes, code width
+_HEADER = struct.Struct("<8sQdQQQQ")
+# magic, generation, published at, created at (ns)
+_CONTROL = struct.Struct("<8sQdQ")
+_GENERATION_OFFSET = 8
+_CREATED_OFFSET = 24
+
+_RATE = np.dtype([("id", "<i8"), ("base", "<i8"), ("target", "<i8"), ("rate", "<f8")])
+
+
+def _currency_dtype(code_width: int) -> np.dtype:
+    return np.dtype([("id", "<i8"), ("code", f"<U{code_width}"),
+                     ("name_start", "<u4"), ("name_end", "<u4"),
+                     ("sign_start", "<u4"), ("sign_end", "<u4")])
+
+# Snapshots older than this many generations are deleted after a publish;
+# a reader that still maps one keeps its pages until it lets go.
+_KEEP_GENERATIONS = 2
+
+
+def _pair_keys(base: np.ndarray, target: np.ndarray) -> np.ndarray:
+    return (base.astype(np.int64) << 32) | target.astype(np.int64)
+
+
+def _pad(length: int) -> int:
+    return -length % 8
+
+
+def _sections(currencies: int, rates: int, strings: int,
+              code_width: int) -> list[tuple[str, np.dtype, int]]:
+    return [("rates", _RATE, rates),
+            ("pair_keys", np.dtype("<i8"), rates),
+            ("pair_index", np.dtype("<i4"), rates),
+            ("currencies", _currency_dtype(code_width), currencies),
+            ("codes", np.dtype(f"<U{code_width}"), currencies),
+            ("code_index", np.dtype("<i4"), currencies),
+            ("strings", np.dtype("u1"), strings)]
+
+
+def snapshot_path(directory: Path, generation: int) -> Path:
+    return directory / f"snapshot-{generation}.bin"
+
+
+def write_snapshot(path: Path, generation: int,
+                   currencies: Iterable[Row], rates: Iterable[Row]) -> None:
+    # Rows are in the shapes CurrenciesDAO.get_all and ExchangeRatesDAO.get_all
+    # return; both come out ordered by id, as the queries return them.
+    currencies = sorted(currencies, key=lambda row: row["id"])
+    rates = sorted(rates, key=lambda row: row["id"])
+
+    strings = bytearray()
+    code_width = max((len(row["code"]) for row in currencies), default=1)
+    currency_array = np.zeros(len(currencies), dtype=_currency_dtype(code_width))
+    for i, row in enumerate(currencies):
+        name, sign = row["name"].encode(), row["sign"].encode()
+        name_start = len(strings)
+        strings += name
+        sign_start = len(strings)
+        strings += sign
+        currency_array[i] = (row["id"], row["code"], name_start, sign_start,
+                             sign_start, len(strings))
+
+    rate_array = np.array([(row["id"], row["base_currency_id"], row["target_currency_id"], row["rate"])
+                           for row in rates], dtype=_RATE)
+    keys = _pair_keys(rate_array["base"], rate_array["target"])
+    pair_index = np.argsort(keys, kind="stable").astype(np.int32)
+    code_index = np.argsort(currency_array["code"], kind="stable").astype(np.int32)
+
+    arrays = {"rates": rate_array,
+              "pair_keys": keys[pair_index],
+              "pair_index": pair_index,
+              "currencies": currency_array,
+              "codes": currency_array["code"][code_index],
+              "code_index": code_index,
+              "strings": np.frombuffer(bytes(strings), dtype="u1")}
+
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "wb") as file:
+        header = _HEADER.pack(MAGIC, generation, time.time(),
+                              len(currencies), len(rates), len(strings), code_width)
+        file.write(header + b"\0" * _pad(len(header)))
+        for name, dtype, _ in _sections(len(currencies), len(rates), len(strings), code_width):
+            data = np.ascontiguousarray(arrays[name], dtype=dtype).tobytes()
+            file.write(data + b"\0" * _pad(len(data)))
+    os.replace(temporary, path)
+
+
+class RateSnapshot:
+    # One mapped generation. Rows come back in the same shapes as the DAO
+    # queries, so callers cannot tell them apart.
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.generation, self.published_at, currencies, rates, strings, code_width = \
+            _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a rate snapshot")
+
+        offset = _HEADER.size + _pad(_HEADER.size)
+        views = {}
+        for name, dtype, count in _sections(currencies, rates, strings, code_width):
+            views[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+            size = dtype.itemsize * count
+            offset += size + _pad(size)
+
+        self._rates: np.ndarray = views["rates"]
+        self._pair_keys: np.ndarray = views["pair_keys"]
+        self._pair_index: np.ndarray = views["pair_index"]
+        self._currencies: np.ndarray = views["currencies"]
+        self._codes: np.ndarray = views["codes"]
+        self._code_index: np.ndarray = views["code_index"]
+        self._strings: np.ndarray = views["strings"]
+
+    @property
+    def currency_count(self) -> int:
+        return len(self._currencies)
+
+    @property
+    def rate_count(self) -> int:
+        return len(self._rates)
+
+    def _currency_row(self, index: int) -> Row:
+        currency_id, code, name_start, name_end, sign_start, sign_end = self._currencies[index].tolist()
+        return {"id": currency_id,
+                "name": self._strings[name_start:name_end].tobytes().decode(),
+                "code": code,
+                "sign": self._strings[sign_start:sign_end].tobytes().decode()}
+
+    def _currency_index(self, currency_id: Optional[int] = None,
+                        code: Optional[str] = None) -> Optional[int]:
+        if currency_id:
+            index = int(np.searchsorted(self._currencies["id"], currency_id))
+            if index == len(self._currencies) or self._currencies["id"][index] != currency_id:
+                return None
+            if code and self._currencies["code"][index] != code:
+                return None
+            return index
+
+        if code:
+            position = int(np.searchsorted(self._codes, code))
+            if position == len(self._codes) or self._codes[position] != code:
+                return None
+            return int(self._code_index[position])
+
+        return 0 if len(self._currencies) else None
+
+    def currency(self, currency_id: Optional[int] = None, code: Optional[str] = None) -> Optional[Row]:
+        index = self._currency_index(currency_id, code)
+        return None if index is None else self._currency_row(index)
+
+    def currencies(self) -> list[Row]:
+        return [self._currency_row(index) for index in range(len(self._currencies))]
+
+    def rate(self, base_currency_id: int, target_currency_id: int) -> Optional[Row]:
+        key = (base_currency_id << 32) | target_currency_id
+        position = int(np.searchsorted(self._pair_keys, key))
+        if position == len(self._pair_keys) or self._pair_keys[position] != key:
+            return None
+
+        rate_id, base, target, rate = self._rates[self._pair_index[position]].tolist()
+        return {"id": rate_id, "base_currency_id": base, "target_currency_id": target, "rate": rate}
+
+    def rates(self) -> list[Row]:
+        return [{"id": rate_id, "base_currency_id": base, "target_currency_id": target, "rate": rate}
+                for rate_id, base, target, rate in self._rates.tolist()]
+
+    def rates_with_currencies(self) -> list[Row]:
+        # The shape of ExchangeRatesDAO.iter_all_with_currencies, in id order.
+        currencies = {row["id"]: row for row in self.currencies()}
+        rows = []
+        for rate_id, base, target, rate in self._rates.tolist():
+            base_row, target_row = currencies[base], currencies[target]
+            rows.append({"id": rate_id, "rate": rate,
+                         "base_id": base, "base_name": base_row["name"],
+                         "base_code": base_row["code"], "base_sign": base_row["sign"],
+                         "target_id": target, "target_name": target_row["name"],
+                         "target_code": target_row["code"], "target_sign": target_row["sign"]})
+        return rows
+
+    def changed_rates(self, previous: "RateSnapshot") -> Optional[list[tuple[int, int, float]]]:
+        # The rates that were added or differ since an earlier snapshot, or
+        # None when more than rates changed (currencies, or pairs removed)
+        # and everything derived from the old one has to be dropped.
+        if (not np.array_equal(self._currencies, previous._currencies)
+                or not np.array_equal(self._strings, previous._strings)):
+            return None
+
+        positions = np.searchsorted(self._pair_keys, previous._pair_keys)
+        if (positions >= len(self._pair_keys)).any() \
+                or not np.array_equal(self._pair_keys[positions], previous._pair_keys):
+            return None
+
+        current = self._rates[self._pair_index]
+        changed = np.ones(len(current), dtype=bool)
+        changed[positions] = current["rate"][positions] != previous._rates[previous._pair_index]["rate"]
+        return [(base, target, rate) for _, base, target, rate in current[changed].tolist()]
+
+
+SnapshotListener = Callable[[Optional[RateSnapshot], RateSnapshot], None]
+
+
+class SnapshotStore(Singleton):
+    # The snapshots of one run directory, as seen by this process. Disabled
+    # (current() is None) until open() is called, so a single-process server
+    # keeps reading SQLite.
+
+    def init(self) -> None:
+        self._directory: Optional[Path] = None
+        self._control: Optional[mmap.mmap] = None
+        self._control_fd: Optional[int] = None
+        self._created: int = 0
+        self._current: Optional[RateSnapshot] = None
+        # The last snapshot the listeners were told about.
+        self._notified: Optional[RateSnapshot] = None
+        self._lock = threading.Lock()
+        self._notify_lock = threading.Lock()
+        self._listeners: list[SnapshotListener] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self._control is not None
+
+    @property
+    def generation(self) -> int:
+        # The latest published generation, not necessarily the mapped one.
+        if self._control is None:
+            return 0
+        return struct.unpack_from("<Q", self._control, _GENERATION_OFFSET)[0]
+
+    @property
+    def data_version(self) -> str:
+        # The same in every process of the run directory. The creation time
+        # keeps generations of an earlier directory from matching these.
+        return f"{self._created:x}-s{self.generation}"
+
+    def open(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(directory / "control", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < mmap.PAGESIZE:
+                os.ftruncate(fd, mmap.PAGESIZE)
+                os.pwrite(fd, _CONTROL.pack(CONTROL_MAGIC, 0, 0.0, time.time_ns()), 0)
+            created, = struct.unpack("<Q", os.pread(fd, 8, _CREATED_OFFSET))
+            if created == 0:
+                # Written before the creation time was kept.
+                created = time.time_ns()
+                os.pwrite(fd, struct.pack("<Q", created), _CREATED_OFFSET)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+        self._directory = directory
+        self._created = created
+        self._control_fd = fd
+        self._control = mmap.mmap(fd, mmap.PAGESIZE)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._control is not None:
+                self._control.close()
+                os.close(self._control_fd)
+            self._control = self._control_fd = None
+            self._current = self._notified = None
+
+    def subscribe(self, listener: SnapshotListener) -> None:
+        # Called by poll() with the previous (None at first) and the new
+        # snapshot whenever another process published a newer one.
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def current(self) -> Optional[RateSnapshot]:
+        # The latest published snapshot, mapped on first use. Never calls the
+        # listeners, so it is safe to use from inside them and under locks.
+        if self._control is None:
+            return None
+
+        snapshot = self._current
+        generation = self.generation
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+
+        while generation:
+            try:
+                snapshot = RateSnapshot(snapshot_path(self._directory, generation))
+                break
+            except FileNotFoundError:
+                # Replaced and deleted between reading the generation and
+                # opening the file: read the generation again.
+                generation = self.generation
+        else:
+            return None
+
+        with self._lock:
+            if self._current is None or self._current.generation < snapshot.generation:
+                self._current = snapshot
+            return self._current
+
+    def poll(self) -> None:
+        # Tells the listeners about snapshots published by other processes
+        # since the last call, as one change from the last snapshot they saw.
+        notified = self._notified
+        if self._control is None or (notified is not None and notified.generation == self.generation):
+            return
+
+        with self._notify_lock:
+            previous = self._notified
+            snapshot = self.current()
+            if snapshot is None or (previous is not None and previous.generation >= snapshot.generation):
+                return
+            for listener in self._listeners:
+                listener(previous, snapshot)
+            self._notified = snapshot
+
+    def publish(self, load: Callable[[], tuple[list[Row], list[Row]]],
+                if_changed: bool = False) -> Optional[int]:
+        # load() returns the rows to publish. It runs under the lock, so
+        # generations go out in the order their data was read and one writer
+        # cannot overwrite another's newer rows with older ones. With
+        # if_changed, rows equal to the current snapshot's publish nothing
+        # and return None.
+        fcntl.flock(self._control_fd, fcntl.LOCK_EX)
+        try:
+            self.poll()
+            currencies, rates = load()
+            current = self.current()
+            if if_changed and current is not None \
+                    and current.currencies() == currencies and current.rates() == rates:
+                return None
+            generation = self.generation + 1
+            path = snapshot_path(self._directory, generation)
+            write_snapshot(path, generation, currencies, rates)
+
+            # Mapped and marked as seen before it is announced, so this
+            # process does not take its own write for someone else's.
+            snapshot = RateSnapshot(path)
+            with self._notify_lock:
+                with self._lock:
+                    self._current = snapshot
+                self._notified = snapshot
+                self._control[:_CONTROL.size] = _CONTROL.pack(CONTROL_MAGIC, generation, time.time(),
+                                                             self._created)
+
+            for old in range(generation - _KEEP_GENERATIONS, 0, -1):
+                try:
+                    snapshot_path(self._directory, old).unlink()
+                except FileNotFoundError:
+                    break
+        finally:
+            fcntl.flock(self._control_fd, fcntl.LOCK_UN)
+
+        return generation
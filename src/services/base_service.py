@@ -25,3 +25,20 @@ class DAOService(Service):
     @abstractmethod
     def add(self, *args, **kwargs) -> DTO:
         pass
+
+
+class ExchangeRatesListener(ABC):
+
+    @abstractmethod
+    def rate_changed(self, base_currency_id: int, target_currency_id: int, rate: float) -> None:
+        pass
+
+    @abstractmethod
+    def rates_reset(self) -> None:
+        pass
+
+    def rates_changed(self, rates: list[tuple[int, int, float]]) -> None:
+        # A batch of (base id, target id, rate); listeners that can apply it
+        # in one go override this.
+        for base_currency_id, target_currency_id, rate in rates:
+            self.rate_changed(base_currency_id, target_currency_id, rate)
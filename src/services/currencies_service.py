@@ -1,46 +1,117 @@
-from typing import Any, Optional
-
-import pandas as pd
-from adaptix import Retort
+from typing import Any, Iterator, Optional
 
 from src.dto.currencies import CurrencyDTO, CurrenciesDTO
 from src.model.dao import CurrenciesDAO
 from src.services.base_service import DAOService
+from src.utils import settings
+from src.utils.cache import Cache, NOT_CACHED
+from src.utils.cursor import decode_cursor, take_page
 from src.utils.exceptions import CurrencyNotFoundError
 
 
-retort = Retort()
-
-
 class CurrenciesService(DAOService):
     _DAO = CurrenciesDAO()
+    _by_id: Cache[int, CurrencyDTO] = Cache("currencies_by_id", settings.CACHE_TTL)
+    _by_code: Cache[str, CurrencyDTO] = Cache("currencies_by_code", settings.CACHE_TTL)
+    _all: Cache[str, CurrenciesDTO] = Cache("currencies_all", settings.CACHE_TTL)
+
+    @property
+    def version(self) -> int:
+        # Changes whenever the set of currencies may have changed.
+        return self._all.version
 
     @staticmethod
     def get_currency_dto(currency_dict: dict[str, Any]) -> CurrencyDTO:
-        return retort.load(currency_dict, CurrencyDTO)
+        return CurrencyDTO(**currency_dict)
+
+    def _get_cached(self, currency_id: Optional[int],
+                    currency_code: Optional[str]) -> Optional[CurrencyDTO]:
+        if currency_id:
+            currency = self._by_id.get(currency_id)
+            if currency is not NOT_CACHED and (not currency_code or currency.code == currency_code):
+                return currency
+        elif currency_code:
+            currency = self._by_code.get(currency_code)
+            if currency is not NOT_CACHED:
+                return currency
+
+        return None
+
+    def _versions(self) -> tuple[int, int]:
+        # Taken before reading the database, see Cache.set.
+        return self._by_id.version, self._by_code.version
+
+    def _cache(self, currency: CurrencyDTO, versions: tuple[int, int]) -> None:
+        self._by_id.set(currency.id, currency, versions[0])
+        self._by_code.set(currency.code, currency, versions[1])
 
     def get_one(self, currency_id: Optional[int] = None,
                 currency_code: Optional[str] = None) -> CurrencyDTO:
-        currency_data: pd.DataFrame = self._DAO.get_one(id=currency_id, code=currency_code)
+        currency: Optional[CurrencyDTO] = self._get_cached(currency_id, currency_code)
+        if currency is not None:
+            return currency
 
-        if currency_data.empty:
-            raise CurrencyNotFoundError
+        versions = self._versions()
+        currency_dict: Optional[dict[str, Any]] = self._DAO.get_one(id=currency_id, code=currency_code)
 
-        currency_dict: dict[str, any] = currency_data.to_dict(orient='records')[0]
+        if currency_dict is None:
+            raise CurrencyNotFoundError
 
-        currency: CurrencyDTO = retort.load(currency_dict, CurrencyDTO)
+        currency = self.get_currency_dto(currency_dict)
+        self._cache(currency, versions)
 
         return currency
 
     def get_all(self) -> CurrenciesDTO:
-        currencies_data: pd.DataFrame = self._DAO.get_all()
-        currencies_list: list[dict[str, Any]] = currencies_data.to_dict(orient='records')
+        currencies: CurrenciesDTO = self._all.get("all")
+        if currencies is not NOT_CACHED:
+            return currencies
+
+        versions = self._versions()
+        all_version = self._all.version
+        currencies_list: list[dict[str, Any]] = self._DAO.get_all()
 
-        currencies: CurrenciesDTO = retort.load({"currencies": currencies_list}, CurrenciesDTO)
+        currencies = CurrenciesDTO([self.get_currency_dto(currency_dict)
+                                    for currency_dict in currencies_list])
+
+        for currency in currencies.currencies:
+            self._cache(currency, versions)
+        self._all.set("all", currencies, all_version)
 
         return currencies
 
+    def iter_all(self, code_prefix: Optional[str] = None,
+                 after_id: Optional[int] = None,
+                 limit: Optional[int] = None) -> Iterator[CurrencyDTO]:
+        if code_prefix is None and after_id is None and limit is None:
+            # Three-letter codes bound the list, so it is loaded whole and
+            # cached rather than streamed.
+            return iter(self.get_all().currencies)
+
+        return (self.get_currency_dto(currency_dict)
+                for currency_dict in self._DAO.iter_all(code_prefix, after_id, limit))
+
+    def get_page(self, limit: int, cursor: Optional[str] = None,
+                 code_prefix: Optional[str] = None) -> CurrenciesDTO:
+        after_id = decode_cursor(cursor) if cursor else None
+        currencies, next_cursor = take_page(self.iter_all(code_prefix, after_id, limit + 1),
+                                            limit, key=lambda currency: currency.id)
+
+        return CurrenciesDTO(currencies, next_cursor)
+
     def add(self, name: str, code: str, sign: str) -> CurrencyDTO:
         self._DAO.insert(name, code, sign)
+        self.invalidate(currency_code=code)
 
         return self.get_one(currency_code=code)
+
+    def invalidate(self, currency_id: Optional[int] = None,
+                   currency_code: Optional[str] = None) -> None:
+        if currency_id is None and currency_code is None:
+            self._by_id.invalidate()
+            self._by_code.invalidate()
+        if currency_id is not None:
+            self._by_id.invalidate(currency_id)
+        if currency_code is not None:
+            self._by_code.invalidate(currency_code)
+        self._all.invalidate()
@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+from typing import Optional
+
+from src.model.dbmanager import DBManager
+from src.services.base_service import Service
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.rate_history_service import RateHistoryService
+from src.utils import settings
+
+
+class DatabaseWatchService(Service):
+    # Notices commits other processes make to SQLite, such as a
+    # src.bulk_import run, when no snapshot publisher does: every
+    # DB_WATCH_INTERVAL seconds it compares PRAGMA data_version and, when
+    # something else wrote, drops the caches as a full reload would and
+    # retires the ETags. This process's own commits move data_version too;
+    # they are taken in right after they commit, so only a foreign commit
+    # landing in that instant goes unnoticed until the next one.
+    _currencies_service = CurrenciesService()
+    _exchange_rates_service = ExchangeRatesService()
+    _rate_history_service = RateHistoryService()
+
+    def init(self) -> None:
+        self._db_manager = DBManager()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._watch: Optional[sqlite3.Connection] = None
+        self._data_version: int = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError("the database watch is already running")
+
+        self._watch = self._db_manager.watch()
+        self._data_version = self._read_data_version()
+        self._db_manager.add_commit_listener(self._committed)
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="database-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._watch.close()
+            self._watch = None
+
+    def check(self) -> bool:
+        # True when another process committed since the last check.
+        with self._lock:
+            if self._watch is None:
+                return False
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+
+        self._currencies_service.invalidate()
+        self._exchange_rates_service.invalidate()
+        self._rate_history_service.invalidate()
+        self._db_manager.bump_generation()
+        return True
+
+    def _committed(self) -> None:
+        # Commit listener: the services handle their own writes.
+        with self._lock:
+            if self._watch is not None:
+                self._data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def _run(self) -> None:
+        while not self._stopping.wait(settings.DB_WATCH_INTERVAL):
+            try:
+                self.check()
+            except sqlite3.Error:
+                # Busy or briefly unavailable: the next round asks again.
+                pass
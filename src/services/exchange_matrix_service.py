@@ -0,0 +1,136 @@
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from src.dto.currencies import CurrencyDTO
+from src.dto.exchange_matrix import BaseCrossRatesDTO, CrossRateDTO, ExchangeMatrixDTO
+from src.model.dao import ExchangeRatesDAO
+from src.services.base_service import Service, ExchangeRatesListener
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.rate_graph import RateGraph
+from src.utils import settings
+from src.utils.exceptions import CurrencyNotFoundError, ExchangeMatrixTooLargeError
+
+
+@dataclass
+class CrossRateMatrix:
+    currencies: list[CurrencyDTO]
+    index: dict[str, int]
+    rates: np.ndarray
+    # CurrenciesService.version the matrix was built at.
+    version: int
+
+    def rate(self, base_currency_code: str, target_currency_code: str) -> Optional[float]:
+        try:
+            rate = self.rates[self.index[base_currency_code], self.index[target_currency_code]]
+        except KeyError:
+            return None
+        return None if np.isnan(rate) else float(rate)
+
+
+class ExchangeMatrixService(Service, ExchangeRatesListener):
+    _cross_currency = "USD"
+    _currencies_service = CurrenciesService()
+    _exchange_rates_service = ExchangeRatesService()
+    _rates_DAO = ExchangeRatesDAO()
+
+    def init(self) -> None:
+        self._lock = threading.Lock()
+        self._matrix: Optional[CrossRateMatrix] = None
+        # CurrenciesService.version when there were found to be more than
+        # EXCHANGE_MATRIX_MAX_CURRENCIES currencies; until it changes the
+        # matrix endpoints fail without counting them again.
+        self._too_large_at: Optional[int] = None
+        self._exchange_rates_service.subscribe(self)
+
+    def get_matrix(self) -> CrossRateMatrix:
+        # Rebuilt after a rate write and after a currency is added, which
+        # gets a row and a column.
+        version = self._currencies_service.version
+        matrix = self._matrix
+        if matrix is not None and matrix.version == version:
+            return matrix
+
+        with self._lock:
+            if self._matrix is None or self._matrix.version != version:
+                if self._too_large_at == self._currencies_service.version:
+                    raise ExchangeMatrixTooLargeError
+                self._matrix = self._build()
+            return self._matrix
+
+    def warm_up(self) -> None:
+        try:
+            self.get_matrix()
+        except ExchangeMatrixTooLargeError:
+            pass
+
+    def get_rate(self, base_currency_code: str, target_currency_code: str) -> Optional[float]:
+        return self.get_matrix().rate(base_currency_code, target_currency_code)
+
+    def get_all(self) -> ExchangeMatrixDTO:
+        matrix = self.get_matrix()
+        rates = np.where(np.isnan(matrix.rates), None, matrix.rates).tolist()
+
+        return ExchangeMatrixDTO([currency.code for currency in matrix.currencies], rates)
+
+    def get_for_base(self, base_currency_code: str) -> BaseCrossRatesDTO:
+        matrix = self.get_matrix()
+        base_index = matrix.index.get(base_currency_code)
+        if base_index is None:
+            raise CurrencyNotFoundError
+
+        row = matrix.rates[base_index]
+        cross_rates = [CrossRateDTO(currency, float(row[i]))
+                       for i, currency in enumerate(matrix.currencies)
+                       if i != base_index and not np.isnan(row[i])]
+
+        return BaseCrossRatesDTO(matrix.currencies[base_index], cross_rates)
+
+    def _build(self) -> CrossRateMatrix:
+        version = self._currencies_service.version
+        currencies: list[CurrencyDTO] = list(self._currencies_service.get_all().currencies)
+        if len(currencies) > settings.EXCHANGE_MATRIX_MAX_CURRENCIES:
+            self._too_large_at = version
+            raise ExchangeMatrixTooLargeError
+        self._too_large_at = None
+
+        index: dict[str, int] = {currency.code: i for i, currency in enumerate(currencies)}
+        position: dict[int, int] = {currency.id: i for i, currency in enumerate(currencies)}
+
+        # The same graph rules as ExchangeService, so /exchangeMatrix quotes
+        # what /exchange converts with: routes of at most EXCHANGE_MAX_HOPS,
+        # chosen by EXCHANGE_STRATEGY, preferring the cross currency.
+        # Rows are filled one search per currency rather than by array
+        # products: a max-product closure in NumPy picks other routes on
+        # ties and rounds differently, so its rates would disagree with
+        # /exchange. N searches still replace N squared get() calls; see
+        # benchmarks.bench_exchange_matrix.
+        graph = RateGraph(max_hops=settings.EXCHANGE_MAX_HOPS, strategy=settings.EXCHANGE_STRATEGY)
+        graph.load(((er_dict["base_currency_id"], er_dict["target_currency_id"], er_dict["rate"])
+                    for er_dict in self._rates_DAO.get_all()),
+                   [currency.id for currency in currencies if currency.code == self._cross_currency])
+
+        size = len(currencies)
+        rates = np.full((size, size), np.nan)
+
+        for i, currency in enumerate(currencies):
+            reached = [(position[target_id], rate)
+                       for target_id, rate in graph.rates_from(currency.id).items()
+                       if target_id in position]
+            targets, values = zip(*reached)
+            rates[i, list(targets)] = values
+
+        return CrossRateMatrix(currencies, index, rates, version)
+
+    def rate_changed(self, base_currency_id: int, target_currency_id: int, rate: float) -> None:
+        self.rates_reset()
+
+    def rates_changed(self, rates: list[tuple[int, int, float]]) -> None:
+        self.rates_reset()
+
+    def rates_reset(self) -> None:
+        with self._lock:
+            self._matrix = None
@@ -1,12 +1,13 @@
-from typing import Any
-
-import pandas as pd
+from typing import Any, Iterator, Optional
 
 from src.dto.currencies import CurrencyDTO
 from src.dto.exchange_rates import ExchangeRateDTO, ExchangeRatesDTO
 from src.model.dao import ExchangeRatesDAO
 from src.services.currencies_service import CurrenciesService
-from src.services.base_service import DAOService
+from src.services.base_service import DAOService, ExchangeRatesListener
+from src.utils import settings
+from src.utils.cache import Cache, NOT_CACHED
+from src.utils.cursor import decode_cursor, take_page
 from src.utils.exceptions import (CurrencyNotFoundError,
                                   ExchangeRateNotFoundError,
                                   ExchangeRateAlreadyExistsError)
@@ -16,51 +17,150 @@ from src.utils.exceptions import (CurrencyNotFoundError,
 class ExchangeRatesService(DAOService):
     _DAO = ExchangeRatesDAO()
     _currencies_service = CurrenciesService()
+    # Pairs without a rate are cached as None, so repeated misses from
+    # ExchangeService do not go back to the database either.
+    _by_pair: Cache[tuple[int, int], Optional[ExchangeRateDTO]] = Cache("exchange_rates_by_pair",
+                                                                        settings.CACHE_TTL)
+    _all: Cache[str, ExchangeRatesDTO] = Cache("exchange_rates_all", settings.CACHE_TTL)
+    _listeners: list[ExchangeRatesListener] = []
+
+    def subscribe(self, listener: ExchangeRatesListener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ExchangeRatesListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @staticmethod
+    def _get_currency_dto(exchange_rate_dict: dict[str, Any], prefix: str) -> CurrencyDTO:
+        return CurrencyDTO(id=exchange_rate_dict[f"{prefix}_id"],
+                           name=exchange_rate_dict[f"{prefix}_name"],
+                           code=exchange_rate_dict[f"{prefix}_code"],
+                           sign=exchange_rate_dict[f"{prefix}_sign"])
 
     def get_one(self, base_currency_code, target_currency_code) -> ExchangeRateDTO:
         try:
             base_currency = self._currencies_service.get_one(currency_code=base_currency_code)
             target_currency = self._currencies_service.get_one(currency_code=target_currency_code)
+        except CurrencyNotFoundError:
+            raise ExchangeRateNotFoundError
 
-            exchange_rate_data = self._DAO.get_one(base_currency.id, target_currency.id)
+        exchange_rate_dto = self._get_by_ids(base_currency, target_currency)
 
-            if not exchange_rate_data.empty:
-                exchange_rate_dict = exchange_rate_data.to_dict(orient="records")[0]
-                er_id = exchange_rate_dict["id"]
-                er_rate = exchange_rate_dict["rate"]
+        if exchange_rate_dto is None:
+            raise ExchangeRateNotFoundError
 
-                exchange_rate_dto = ExchangeRateDTO(er_id,
-                                                    base_currency,
-                                                    target_currency,
-                                                    er_rate)
-                return exchange_rate_dto
+        return exchange_rate_dto
 
-        except CurrencyNotFoundError:
-            pass
+    def _get_by_ids(self, base_currency: CurrencyDTO,
+                    target_currency: CurrencyDTO) -> Optional[ExchangeRateDTO]:
+        pair = (base_currency.id, target_currency.id)
 
-        raise ExchangeRateNotFoundError
+        exchange_rate_dto = self._by_pair.get(pair)
+        if exchange_rate_dto is not NOT_CACHED:
+            return exchange_rate_dto
 
-    def get_all(self) -> ExchangeRatesDTO:
-        exchange_rates_data: pd.DataFrame = self._DAO.get_all()
-        exchange_rates_list: list[dict[str, Any]] = exchange_rates_data.to_dict(orient="records")
+        # A write between the read and the set must not leave this load,
+        # or a None for a pair it just added, in the cache.
+        version = self._by_pair.version
+        exchange_rate_dict = self._DAO.get_one(*pair)
 
-        exchange_rates_dto = ExchangeRatesDTO()
+        exchange_rate_dto = None
+        if exchange_rate_dict is not None:
+            exchange_rate_dto = ExchangeRateDTO(exchange_rate_dict["id"],
+                                                base_currency,
+                                                target_currency,
+                                                exchange_rate_dict["rate"])
+        self._by_pair.set(pair, exchange_rate_dto, version)
 
-        for er_dict in exchange_rates_list:
-            base_id = er_dict["base_currency_id"]
-            target_id = er_dict["target_currency_id"]
+        return exchange_rate_dto
 
-            base_currency_dto = self._currencies_service.get_one(currency_id=base_id)
-            target_currency_dto = self._currencies_service.get_one(currency_id=target_id)
+    def get_all(self) -> ExchangeRatesDTO:
+        exchange_rates_dto: ExchangeRatesDTO = self._all.get("all")
+        if exchange_rates_dto is not NOT_CACHED:
+            return exchange_rates_dto
+
+        version = self._all.version
+        exchange_rates: list[ExchangeRateDTO] = list(self._iter_from_db())
+        exchange_rates_dto = ExchangeRatesDTO(exchange_rates)
 
-            exchange_rate_dto = ExchangeRateDTO(id=er_dict["id"],
-                                                baseCurrency=base_currency_dto,
-                                                targetCurrency=target_currency_dto,
-                                                rate=er_dict["rate"])
-            exchange_rates_dto.append(exchange_rate_dto)
+        if len(exchange_rates) <= settings.CACHE_COLLECTION_MAX_ROWS:
+            self._all.set("all", exchange_rates_dto, version)
 
         return exchange_rates_dto
 
+    def iter_all(self, base_currency_code: Optional[str] = None,
+                 target_currency_code: Optional[str] = None,
+                 after_id: Optional[int] = None,
+                 limit: Optional[int] = None) -> Iterator[ExchangeRateDTO]:
+        if base_currency_code is None and target_currency_code is None \
+                and after_id is None and limit is None:
+            exchange_rates_dto: ExchangeRatesDTO = self._all.get("all")
+            if exchange_rates_dto is not NOT_CACHED:
+                return iter(exchange_rates_dto)
+            return self._iter_and_cache()
+
+        # Codes are resolved here rather than joined on in SQL, so unknown
+        # currencies fail before the response starts and the query can use
+        # the BaseCurrencyID / TargetCurrencyID indexes.
+        base_currency_id = target_currency_id = None
+        if base_currency_code is not None:
+            base_currency_id = self._currencies_service.get_one(currency_code=base_currency_code).id
+        if target_currency_code is not None:
+            target_currency_id = self._currencies_service.get_one(currency_code=target_currency_code).id
+
+        return self._iter_from_db(base_currency_id, target_currency_id, after_id, limit)
+
+    def get_page(self, limit: int, cursor: Optional[str] = None,
+                 base_currency_code: Optional[str] = None,
+                 target_currency_code: Optional[str] = None) -> ExchangeRatesDTO:
+        after_id = decode_cursor(cursor) if cursor else None
+        exchange_rates, next_cursor = take_page(
+            self.iter_all(base_currency_code, target_currency_code, after_id, limit + 1),
+            limit, key=lambda exchange_rate: exchange_rate.id)
+
+        return ExchangeRatesDTO(exchange_rates, next_cursor)
+
+    def _iter_and_cache(self) -> Iterator[ExchangeRateDTO]:
+        # Streams all rates and, when the stream runs to the end with no more
+        # than CACHE_COLLECTION_MAX_ROWS, caches them for the next request.
+        version = self._all.version
+        exchange_rates: Optional[list[ExchangeRateDTO]] = []
+
+        for exchange_rate in self._iter_from_db():
+            if exchange_rates is not None:
+                exchange_rates.append(exchange_rate)
+                if len(exchange_rates) > settings.CACHE_COLLECTION_MAX_ROWS:
+                    exchange_rates = None
+            yield exchange_rate
+
+        if exchange_rates is not None:
+            self._all.set("all", ExchangeRatesDTO(exchange_rates), version)
+
+    def _iter_from_db(self, base_currency_id: Optional[int] = None,
+                      target_currency_id: Optional[int] = None,
+                      after_id: Optional[int] = None,
+                      limit: Optional[int] = None) -> Iterator[ExchangeRateDTO]:
+        currencies: dict[int, CurrencyDTO] = {}
+
+        for er_dict in self._DAO.iter_all_with_currencies(base_currency_id, target_currency_id,
+                                                          after_id, limit):
+            base_currency_dto = currencies.get(er_dict["base_id"])
+            if base_currency_dto is None:
+                base_currency_dto = self._get_currency_dto(er_dict, "base")
+                currencies[base_currency_dto.id] = base_currency_dto
+
+            target_currency_dto = currencies.get(er_dict["target_id"])
+            if target_currency_dto is None:
+                target_currency_dto = self._get_currency_dto(er_dict, "target")
+                currencies[target_currency_dto.id] = target_currency_dto
+
+            yield ExchangeRateDTO(id=er_dict["id"],
+                                  baseCurrency=base_currency_dto,
+                                  targetCurrency=target_currency_dto,
+                                  rate=er_dict["rate"])
+
     def add(self, base_currency_code: str, target_currency_code: str, rate: float):
         base_currency: CurrencyDTO = self._currencies_service.get_one(currency_code=base_currency_code)
         target_currency: CurrencyDTO = self._currencies_service.get_one(currency_code=target_currency_code)
@@ -69,8 +169,44 @@ class ExchangeRatesService(DAOService):
             raise ExchangeRateAlreadyExistsError
 
         self._DAO.insert(base_currency.id, target_currency.id, rate)
+        self.invalidate(base_currency.id, target_currency.id)
+
+        for listener in self._listeners:
+            listener.rate_changed(base_currency.id, target_currency.id, rate)
 
         return self.get_one(base_currency_code, target_currency_code)
 
+    def update_many(self, rates: list[tuple[int, int, float]]) -> None:
+        # Upserts (base id, target id, rate) triples in one transaction, then
+        # refreshes the caches and hands the whole batch to the listeners.
+        self._DAO.upsert_batch([list(rate) for rate in rates])
+        self.refresh(rates)
+
+    def refresh(self, rates: list[tuple[int, int, float]]) -> None:
+        # Rates that were just written, here or by another worker process:
+        # drops their cached entries and hands them to the listeners.
+        for base_currency_id, target_currency_id, _ in rates:
+            self._by_pair.invalidate((base_currency_id, target_currency_id))
+        self._all.invalidate()
+
+        for listener in self._listeners:
+            listener.rates_changed(rates)
+
     def exchange_rate_exists(self, base_currency_id, target_currency_id):
-        return not self._DAO.get_one(base_currency_id, target_currency_id).empty
+        try:
+            base_currency = self._currencies_service.get_one(currency_id=base_currency_id)
+            target_currency = self._currencies_service.get_one(currency_id=target_currency_id)
+        except CurrencyNotFoundError:
+            return False
+
+        return self._get_by_ids(base_currency, target_currency) is not None
+
+    def invalidate(self, base_currency_id: Optional[int] = None,
+                   target_currency_id: Optional[int] = None) -> None:
+        if base_currency_id is None or target_currency_id is None:
+            self._by_pair.invalidate()
+            for listener in self._listeners:
+                listener.rates_reset()
+        else:
+            self._by_pair.invalidate((base_currency_id, target_currency_id))
+        self._all.invalidate()
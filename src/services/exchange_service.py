@@ -1,110 +1,188 @@
-from src.dto.currencies import CurrencyDTO
-from src.dto.exchange import ExchangeDTO
-from src.dto.exchange_rates import ExchangeRateDTO
-from src.services.base_service import Service
-from src.services.exchange_rates_service import ExchangeRatesService
-from src.utils.exceptions import ExchangeUnavailableError, ExchangeRateNotFoundError
+from decimal import Decimal
+from typing import Any, Optional
 
+import numpy as np
 
-class ExchangeService(Service):
+from src.dto.currencies import CurrencyDTO
+from src.dto.exchange import ExchangeDTO, ExchangeBatchDTO
+from src.model.dao import ExchangeRatesDAO
+from src.services.base_service import Service, ExchangeRatesListener
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.rate_graph import RateGraph
+from src.services.rate_history_service import RateHistoryService
+from src.utils import money, settings
+from src.utils.cache import Cache
+from src.utils.exceptions import (RequestException,
+                                  CurrencyNotFoundError,
+                                  ExchangeUnavailableError,
+                                  QueryFieldNotSpecifiedError,
+                                  InvalidCurrencyCodeError,
+                                  BatchTooLargeError)
+
+
+class ExchangeService(Service, ExchangeRatesListener):
     _cross_currency = "USD"
     _exchange_rates_service = ExchangeRatesService()
+    _currencies_service = CurrenciesService()
+    _rates_DAO = ExchangeRatesDAO()
+    _rate_history_service = RateHistoryService()
 
-    def __init__(self):
-        self._exchange_ways = (self._get_fb, self._get_cross)
+    def init(self) -> None:
+        self._graph = RateGraph(max_hops=settings.EXCHANGE_MAX_HOPS,
+                                strategy=settings.EXCHANGE_STRATEGY,
+                                routes=Cache("exchange_routes",
+                                             max_entries=settings.EXCHANGE_ROUTE_CACHE_ENTRIES))
+        self._exchange_rates_service.subscribe(self)
 
     def get(self, base_currency_code: str,
             target_currency_code: str,
-            amount: float) -> ExchangeDTO:
+            amount: Decimal | float,
+            at: Optional[int] = None) -> ExchangeDTO:
+        base_currency, target_currency, rate = self._resolve(base_currency_code,
+                                                             target_currency_code,
+                                                             at)
+        conversion = self._conversion(base_currency, target_currency, rate)
 
-        for exchange_way in self._exchange_ways:
-            try:
-                exchange_dto: ExchangeDTO = exchange_way(base_currency_code,
-                                                         target_currency_code, amount)
-                return exchange_dto
+        amount_minor: int = money.to_minor(money.parse_amount(amount), conversion.base_digits)
+        converted_minor: int = conversion.apply(amount_minor)
+
+        exchange_dto: ExchangeDTO = ExchangeDTO(base_currency,
+                                                target_currency,
+                                                conversion.rate,
+                                                money.from_minor(amount_minor, conversion.base_digits),
+                                                money.from_minor(converted_minor, conversion.target_digits))
+        return exchange_dto
 
-            except ExchangeUnavailableError:
-                pass
+    def convert_many(self, base_currency_code: str,
+                     target_currency_code: str,
+                     amounts: np.ndarray,
+                     at: Optional[int] = None) -> np.ndarray:
+        # Bulk conversion for batch jobs: int64 amounts in the base
+        # currency's minor units to the target's, without a Python loop.
+        base_currency, target_currency, rate = self._resolve(base_currency_code,
+                                                             target_currency_code,
+                                                             at)
+        return self._conversion(base_currency, target_currency, rate).apply_array(amounts)
+
+    def get_batch(self, items: list[Any]) -> ExchangeBatchDTO:
+        if len(items) > settings.EXCHANGE_BATCH_MAX_ITEMS:
+            raise BatchTooLargeError
+
+        results: list[Optional[ExchangeDTO | RequestException]] = [None] * len(items)
+        pairs: dict[tuple[str, str], list[tuple[int, int]]] = {}
+
+        for i, item in enumerate(items):
+            try:
+                base_currency_code, target_currency_code, amount = self._parse_batch_item(item)
+            except RequestException as err:
+                results[i] = err
+                continue
+            pairs.setdefault((base_currency_code, target_currency_code), []).append((i, amount))
+
+        for (base_currency_code, target_currency_code), entries in pairs.items():
+            indices, amounts_minor = zip(*entries)
+            amounts_minor = np.fromiter(amounts_minor, dtype=np.int64, count=len(entries))
+            try:
+                base_currency, target_currency, rate = self._resolve(base_currency_code,
+                                                                     target_currency_code)
+                conversion = self._conversion(base_currency, target_currency, rate)
+                converted_minor = conversion.apply_array(amounts_minor)
+            except RequestException as err:
+                for i in indices:
+                    results[i] = err
+                continue
+
+            amounts = money.from_minor_array(amounts_minor, conversion.base_digits)
+            converted_amounts = money.from_minor_array(converted_minor, conversion.target_digits)
+            applied_rate = conversion.rate
+
+            for i, amount, converted_amount in zip(indices, amounts, converted_amounts):
+                results[i] = ExchangeDTO(base_currency,
+                                         target_currency,
+                                         applied_rate,
+                                         amount,
+                                         converted_amount)
+
+        return ExchangeBatchDTO(results)
+
+    @staticmethod
+    def _parse_batch_item(item: Any) -> tuple[str, str, int]:
+        # The amount comes back in the base currency's minor units.
+        try:
+            base_currency_code = item["from"]
+            target_currency_code = item["to"]
+            amount = item["amount"]
+        except (KeyError, TypeError):
+            raise QueryFieldNotSpecifiedError
 
-        raise ExchangeUnavailableError
+        amount = money.parse_amount(amount)
 
+        if (not isinstance(base_currency_code, str) or len(base_currency_code) != 3
+                or not isinstance(target_currency_code, str) or len(target_currency_code) != 3):
+            raise InvalidCurrencyCodeError
 
+        return (base_currency_code, target_currency_code,
+                money.to_minor(amount, money.minor_units(base_currency_code)))
 
-    def _get_cross(self, base_currency_code: str,
-                   target_currency_code: str,
-                   amount: float) -> ExchangeDTO:
+    @staticmethod
+    def _conversion(base_currency: CurrencyDTO, target_currency: CurrencyDTO, rate: float) -> money.Conversion:
         try:
-            base_usd_exchange: ExchangeDTO = self._get_fb(base_currency_code, self._cross_currency, amount)
-            usd_target_exchange: ExchangeDTO = self._get_fb(self._cross_currency, target_currency_code, amount)
+            return money.conversion(rate,
+                                    money.minor_units(base_currency.code),
+                                    money.minor_units(target_currency.code))
+        except ValueError:
+            # A stored rate of zero converts nothing to anything.
+            raise ExchangeUnavailableError
 
-        except ExchangeRateNotFoundError:
+    def _resolve(self, base_currency_code: str,
+                 target_currency_code: str,
+                 at: Optional[int] = None) -> tuple[CurrencyDTO, CurrencyDTO, float]:
+        try:
+            base_currency: CurrencyDTO = self._currencies_service.get_one(currency_code=base_currency_code)
+            target_currency: CurrencyDTO = self._currencies_service.get_one(currency_code=target_currency_code)
+        except CurrencyNotFoundError:
             raise ExchangeUnavailableError
 
-        base_currency: CurrencyDTO = base_usd_exchange.base_currency
-        target_currency: CurrencyDTO = usd_target_exchange.target_currency
-        rate: float = base_usd_exchange.rate * usd_target_exchange.rate
-        converted_amount = amount * rate
+        if at is None:
+            rate: Optional[float] = self.get_rate(base_currency.id, target_currency.id)
+        else:
+            if not self._graph.loaded:
+                self._load_graph()
+            rate = self._rate_history_service.get_rate(base_currency.id, target_currency.id, at, self._graph)
 
-        exchange_dto: ExchangeDTO = ExchangeDTO(base_currency,
-                                                target_currency,
-                                                rate,
-                                                amount,
-                                                converted_amount)
+        if rate is None:
+            raise ExchangeUnavailableError
 
-        return exchange_dto
+        return base_currency, target_currency, rate
 
-    def _get_fb(self, base_currency_code: str,
-                target_currency_code:str,
-                amount:float):
-        try:
-            exchange_dto = self._get_forward(base_currency_code,
-                                             target_currency_code,
-                                             amount)
-            return exchange_dto
-
-        except ExchangeUnavailableError:
-            exchange_dto = self._get_backward(base_currency_code,
-                                              target_currency_code,
-                                              amount)
-            return exchange_dto
-
-    def _get_forward(self, base_currency_code: str,
-                     target_currency_code: str,
-                     amount: float) -> ExchangeDTO:
+    def get_rate(self, base_currency_id: int, target_currency_id: int) -> Optional[float]:
+        if not self._graph.loaded:
+            self._load_graph()
 
-        try:
-            exchange_rate: ExchangeRateDTO = self._exchange_rates_service.get_one(base_currency_code,
-                                                                                  target_currency_code)
-        except ExchangeRateNotFoundError:
-            raise ExchangeUnavailableError
+        return self._graph.rate(base_currency_id, target_currency_id)
 
-        converted_amount: float = amount * exchange_rate.rate
+    def warm_up(self) -> None:
+        if not self._graph.loaded:
+            self._load_graph()
 
-        exchange_dto: ExchangeDTO = ExchangeDTO(exchange_rate.baseCurrency,
-                                                exchange_rate.targetCurrency,
-                                                exchange_rate.rate,
-                                                amount,
-                                                converted_amount)
-        return exchange_dto
-
-    def _get_backward(self, base_currency_code: str,
-                      target_currency_code: str,
-                      amount: float) -> ExchangeDTO:
+    def _load_graph(self) -> None:
+        rates = ((er_dict["base_currency_id"], er_dict["target_currency_id"], er_dict["rate"])
+                 for er_dict in self._rates_DAO.get_all())
 
+        pivots: list[int] = []
         try:
-            exchange_rate = self._exchange_rates_service.get_one(target_currency_code,
-                                                                 base_currency_code)
-        except ExchangeRateNotFoundError:
-            raise ExchangeUnavailableError
+            pivots.append(self._currencies_service.get_one(currency_code=self._cross_currency).id)
+        except CurrencyNotFoundError:
+            pass
 
-        base_currency: CurrencyDTO = exchange_rate.targetCurrency
-        target_currency: CurrencyDTO = exchange_rate.baseCurrency
-        rate = 1/exchange_rate.rate
-        converted_amount: float = amount * rate
+        self._graph.load(rates, pivots)
 
-        exchange_dto: ExchangeDTO = ExchangeDTO(base_currency,
-                                                target_currency,
-                                                rate,
-                                                amount,
-                                                converted_amount)
-        return exchange_dto
+    def rate_changed(self, base_currency_id: int, target_currency_id: int, rate: float) -> None:
+        self._graph.add_rate(base_currency_id, target_currency_id, rate)
+
+    def rates_changed(self, rates: list[tuple[int, int, float]]) -> None:
+        self._graph.add_rates(rates)
+
+    def rates_reset(self) -> None:
+        self._graph.reset()
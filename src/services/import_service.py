@@ -0,0 +1,203 @@
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from src.dto.imports import ImportReportDTO, ImportRowErrorDTO
+from src.model.dao import CurrenciesDAO, ExchangeRateHistoryDAO, ExchangeRatesDAO
+from src.services.base_service import Service
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.rate_history_service import RateHistoryService
+from src.utils import settings
+from src.utils.exceptions import ForeignKeyError, InvalidTimestampError
+from src.utils.parse import parse_timestamp
+
+Record = tuple[int, Any]
+
+
+class RowError(Exception):
+    pass
+
+
+def read_records(path: Path) -> Iterator[Record]:
+    # Yields (line number, record) pairs. CSV and NDJSON files are streamed
+    # row by row; a JSON array is parsed as a whole.
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if suffix == ".csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+
+        elif suffix in (".ndjson", ".jsonl"):
+            for line_num, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_num, json.loads(line)
+                except json.JSONDecodeError as err:
+                    yield line_num, RowError(f"invalid JSON: {err.msg}")
+
+        elif suffix == ".json":
+            records = json.load(file)
+            if not isinstance(records, list):
+                raise ValueError(f"{path} must contain a JSON array")
+            yield from enumerate(records, start=1)
+
+        else:
+            raise ValueError(f"unsupported file type {suffix!r}, expected .csv, .json or .ndjson")
+
+
+def _field(record: Any, name: str) -> str:
+    if isinstance(record, RowError):
+        raise record
+    if not isinstance(record, dict):
+        raise RowError("record must be an object")
+
+    value = record.get(name)
+    if value is None or str(value).strip() == "":
+        raise RowError(f"missing field {name!r}")
+
+    return str(value).strip()
+
+
+class ImportService(Service):
+    _currencies_DAO = CurrenciesDAO()
+    _exchange_rates_DAO = ExchangeRatesDAO()
+    _rate_history_DAO = ExchangeRateHistoryDAO()
+    _currencies_service = CurrenciesService()
+    _exchange_rates_service = ExchangeRatesService()
+    _rate_history_service = RateHistoryService()
+
+    def import_currencies(self, records: Iterable[Record],
+                          chunk_size: int = settings.IMPORT_CHUNK_SIZE) -> ImportReportDTO:
+
+        def parse(record: Any) -> list:
+            code = _field(record, "code")
+            if len(code) != 3:
+                raise RowError(f"currency code {code!r} must be 3 characters long")
+            return [_field(record, "name"), code, _field(record, "sign")]
+
+        report = self._import("currencies", records, parse,
+                              self._currencies_DAO.upsert_many, chunk_size)
+        self._currencies_service.invalidate()
+        self._exchange_rates_service.invalidate()
+
+        return report
+
+    def import_rates(self, records: Iterable[Record],
+                     chunk_size: int = settings.IMPORT_CHUNK_SIZE) -> ImportReportDTO:
+        report = self._import("rates", records, self._rate_parser(),
+                              self._exchange_rates_DAO.upsert_many, chunk_size)
+        self._exchange_rates_service.invalidate()
+
+        return report
+
+    def import_history(self, records: Iterable[Record],
+                       chunk_size: int = settings.IMPORT_CHUNK_SIZE) -> ImportReportDTO:
+        # Past rates, each with the time it took effect; the current rates
+        # in ExchangeRates are left as they are.
+        parse_rate = self._rate_parser()
+
+        def parse(record: Any) -> list:
+            base_currency_id, target_currency_id, rate = parse_rate(record)
+            try:
+                valid_from = parse_timestamp(_field(record, "at"))
+            except InvalidTimestampError:
+                raise RowError("at must be Unix seconds or an ISO 8601 date or date-time")
+
+            return [base_currency_id, target_currency_id, valid_from, rate]
+
+        report = self._import("history", records, parse,
+                              self._rate_history_DAO.insert_many, chunk_size)
+        self._rate_history_service.invalidate()
+
+        return report
+
+    def _rate_parser(self) -> Callable[[Any], list]:
+        currency_ids: dict[str, int] = {currency_dict["code"]: currency_dict["id"]
+                                        for currency_dict in self._currencies_DAO.get_all()}
+
+        def currency_id(record: Any, name: str) -> int:
+            code = _field(record, name)
+            try:
+                return currency_ids[code]
+            except KeyError:
+                raise RowError(f"unknown currency {code!r}")
+
+        def parse(record: Any) -> list:
+            base_currency_id = currency_id(record, "base")
+            target_currency_id = currency_id(record, "target")
+            if base_currency_id == target_currency_id:
+                raise RowError("base and target currencies must differ")
+
+            try:
+                rate = float(_field(record, "rate"))
+            except ValueError:
+                raise RowError("rate must be a number")
+            if not rate > 0:
+                raise RowError("rate must be positive")
+
+            return [base_currency_id, target_currency_id, rate]
+
+        return parse
+
+    @staticmethod
+    def _import(kind: str,
+                records: Iterable[Record],
+                parse: Callable[[Any], list],
+                upsert_many: Callable[[list[list]], int],
+                chunk_size: int) -> ImportReportDTO:
+        report = ImportReportDTO(kind)
+        started = time.perf_counter()
+
+        chunk: list[list] = []
+        chunk_lines: list[int] = []
+
+        def write(rows: list[list], lines: list[int]) -> None:
+            try:
+                upsert_many(rows)
+                report.rows_imported += len(rows)
+            except ForeignKeyError:
+                # The failed transaction wrote nothing: the halves are retried
+                # on their own until the rows the database rejects are found.
+                if len(rows) == 1:
+                    report.errors.append(ImportRowErrorDTO(lines[0], "rejected by the database"))
+                    return
+                middle = len(rows) // 2
+                write(rows[:middle], lines[:middle])
+                write(rows[middle:], lines[middle:])
+
+        def flush() -> None:
+            write(chunk, chunk_lines)
+            chunk.clear()
+            chunk_lines.clear()
+
+        for line, record in records:
+            report.rows_read += 1
+            try:
+                chunk.append(parse(record))
+                chunk_lines.append(line)
+            except RowError as err:
+                report.errors.append(ImportRowErrorDTO(line, str(err)))
+                continue
+
+            if len(chunk) >= chunk_size:
+                flush()
+
+        if chunk:
+            flush()
+
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def import_file(self, kind: str, path: Path,
+                    chunk_size: Optional[int] = None) -> ImportReportDTO:
+        importers = {"currencies": self.import_currencies,
+                     "rates": self.import_rates,
+                     "history": self.import_history}
+        return importers[kind](read_records(path), chunk_size or settings.IMPORT_CHUNK_SIZE)
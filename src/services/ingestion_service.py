@@ -0,0 +1,265 @@
+import threading
+import time
+from collections import deque
+from typing import Iterable, Optional
+
+from src.dto.ingestion import IngestionStatsDTO
+from src.model.dbmanager import DBManager
+from src.services.base_service import Service
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.rate_sources import (RateSource, RateUpdate, DirectoryRateSource,
+                                       HTTPRateSource, GeneratedRateSource)
+from src.utils import metrics, settings
+from src.utils.exceptions import CurrencyNotFoundError, ForeignKeyError
+
+Pair = tuple[str, str]
+
+# Batches from this many seconds back count towards updates per second.
+THROUGHPUT_WINDOW = 60.0
+
+
+def create_source(name: str = settings.INGEST_SOURCE) -> RateSource:
+    if name == DirectoryRateSource.NAME:
+        return DirectoryRateSource(settings.INGEST_DIRECTORY, settings.INGEST_POLL_INTERVAL)
+    if name == HTTPRateSource.NAME:
+        return HTTPRateSource(settings.INGEST_URL, settings.INGEST_POLL_INTERVAL)
+    if name == GeneratedRateSource.NAME:
+        rates = [(exchange_rate.baseCurrency.code, exchange_rate.targetCurrency.code, exchange_rate.rate)
+                 for exchange_rate in ExchangeRatesService().iter_all()]
+        return GeneratedRateSource(rates, settings.INGEST_GENERATED_RATE)
+
+    raise ValueError(f"unknown rate source {name!r}")
+
+
+class IngestionService(Service):
+    # Two background threads: a reader polls the source and coalesces updates
+    # by pair, so only the latest rate of a pair waits for the next batch; a
+    # writer applies a batch once INGEST_BATCH_SIZE pairs are pending or the
+    # oldest has waited INGEST_FLUSH_INTERVAL. Request threads never wait on
+    # either: they only see the committed rates and refreshed caches.
+    _currencies_service = CurrenciesService()
+    _exchange_rates_service = ExchangeRatesService()
+
+    def init(self) -> None:
+        self._db_manager = DBManager()
+        self.source: Optional[RateSource] = None
+
+        self._pending: dict[Pair, RateUpdate] = {}
+        self._first_pending: Optional[float] = None
+        self._condition = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._apply_lock = threading.Lock()
+        # Separate from the apply lock, so reading stats never waits on a batch.
+        self._stats_lock = threading.Lock()
+
+        self._received: int = 0
+        self._coalesced: int = 0
+        self._rejected: int = 0
+        self._applied: int = 0
+        self._failed: int = 0
+        self._batches: int = 0
+        self._last_batch_size: int = 0
+        self._last_batch_seconds: float = 0.0
+        self._last_lag_seconds: float = 0.0
+        self._recent: deque[tuple[float, int]] = deque()
+        self._started_at: float = time.monotonic()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self, source: RateSource) -> None:
+        if self._threads:
+            raise RuntimeError("ingestion is already running")
+
+        self.source = source
+        self._started_at = time.monotonic()
+        self._stopping.clear()
+        self._threads = [threading.Thread(target=self._read_loop, name="ingest-reader", daemon=True),
+                         threading.Thread(target=self._write_loop, name="ingest-writer", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        # Applies whatever is still pending before returning.
+        self._stopping.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        self.flush()
+        if self.source is not None:
+            self.source.close()
+
+    def submit(self, updates: Iterable[RateUpdate]) -> None:
+        received = coalesced = 0
+        with self._condition:
+            was_empty = not self._pending
+            for update in updates:
+                received += 1
+                pair = (update.base_currency_code, update.target_currency_code)
+                previous = self._pending.get(pair)
+                if previous is not None:
+                    coalesced += 1
+                    if previous.observed_at > update.observed_at:
+                        continue
+                self._pending[pair] = update
+
+            if self._pending and was_empty:
+                self._first_pending = time.monotonic()
+            if was_empty or len(self._pending) >= settings.INGEST_BATCH_SIZE:
+                self._condition.notify_all()
+
+            self._received += received
+            self._coalesced += coalesced
+            pending = len(self._pending)
+
+        metrics.INGEST_UPDATES.inc(("received",), received)
+        metrics.INGEST_UPDATES.inc(("coalesced",), coalesced)
+        metrics.INGEST_PENDING.set(pending)
+
+    def flush(self) -> int:
+        # Writes the pending updates as one batch; returns how many were applied.
+        with self._condition:
+            batch, self._pending = self._pending, {}
+            self._first_pending = None
+        metrics.INGEST_PENDING.set(0)
+        if not batch:
+            return 0
+
+        with self._apply_lock:
+            started = time.perf_counter()
+            rows: list[tuple[int, int, float]] = []
+            applied: list[RateUpdate] = []
+            rejected = 0
+            currency_ids: dict[str, Optional[int]] = {}
+
+            def currency_id(code: str) -> Optional[int]:
+                if code not in currency_ids:
+                    try:
+                        currency_ids[code] = self._currencies_service.get_one(currency_code=code).id
+                    except CurrencyNotFoundError:
+                        currency_ids[code] = None
+                return currency_ids[code]
+
+            try:
+                for update in batch.values():
+                    base_currency_id = currency_id(update.base_currency_code)
+                    target_currency_id = currency_id(update.target_currency_code)
+                    if base_currency_id is None or target_currency_id is None:
+                        rejected += 1
+                        continue
+                    rows.append((base_currency_id, target_currency_id, update.rate))
+                    applied.append(update)
+
+                if rows:
+                    self._exchange_rates_service.update_many(rows)
+                    # The commit bumped the generation before the caches were
+                    # refreshed; bump again so no ETag covers stale data.
+                    self._db_manager.bump_generation()
+            except ForeignKeyError:
+                # Rejected by a constraint: retrying would fail the same way.
+                self._count_failed(len(batch))
+                return 0
+            except Exception:
+                self._requeue(batch)
+                self._count_failed(len(batch))
+                raise
+
+            committed = time.time()
+            elapsed = time.perf_counter() - started
+            lags = [max(0.0, committed - update.observed_at) for update in applied]
+
+        with self._stats_lock:
+            self._rejected += rejected
+            self._applied += len(applied)
+            self._batches += 1
+            self._last_batch_size = len(applied)
+            self._last_batch_seconds = elapsed
+            self._last_lag_seconds = max(lags, default=0.0)
+            self._recent.append((time.monotonic(), len(applied)))
+
+        metrics.INGEST_UPDATES.inc(("rejected",), rejected)
+        metrics.INGEST_UPDATES.inc(("applied",), len(applied))
+        metrics.INGEST_BATCH_SECONDS.observe(elapsed)
+        for lag in lags:
+            metrics.INGEST_LAG_SECONDS.observe(lag)
+
+        return len(applied)
+
+    def stats(self) -> IngestionStatsDTO:
+        now = time.monotonic()
+        with self._stats_lock:
+            while self._recent and self._recent[0][0] < now - THROUGHPUT_WINDOW:
+                self._recent.popleft()
+            recent_updates = sum(count for _, count in self._recent)
+            window = min(THROUGHPUT_WINDOW, now - self._started_at)
+
+            return IngestionStatsDTO(source=self.source.NAME if self.source is not None else "",
+                                     running=self.running,
+                                     received=self._received,
+                                     coalesced=self._coalesced,
+                                     rejected=self._rejected + (self.source.rejected if self.source else 0),
+                                     applied=self._applied,
+                                     failed=self._failed,
+                                     batches=self._batches,
+                                     pending=len(self._pending),
+                                     last_batch_size=self._last_batch_size,
+                                     last_batch_seconds=self._last_batch_seconds,
+                                     last_lag_seconds=self._last_lag_seconds,
+                                     updates_per_second=recent_updates / window if window else 0.0)
+
+    def _count_failed(self, count: int) -> None:
+        with self._stats_lock:
+            self._failed += count
+        metrics.INGEST_UPDATES.inc(("failed",), count)
+
+    def _requeue(self, batch: dict[Pair, RateUpdate]) -> None:
+        # A failed batch goes back in, behind anything newer for the same pair.
+        with self._condition:
+            for pair, update in batch.items():
+                self._pending.setdefault(pair, update)
+            if self._pending and self._first_pending is None:
+                self._first_pending = time.monotonic()
+
+    def _read_loop(self) -> None:
+        source = self.source
+        while not self._stopping.is_set():
+            rejected_before = source.rejected
+            try:
+                updates = source.poll()
+            except Exception:
+                # A broken feed must not take the worker down; try again later.
+                updates = []
+            metrics.INGEST_UPDATES.inc(("rejected",), source.rejected - rejected_before)
+
+            self.submit(updates)
+            if len(updates) < settings.INGEST_BATCH_SIZE:
+                self._stopping.wait(source.interval)
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopping.is_set():
+                    if self._pending:
+                        if len(self._pending) >= settings.INGEST_BATCH_SIZE:
+                            break
+                        waited = time.monotonic() - self._first_pending
+                        if waited >= settings.INGEST_FLUSH_INTERVAL:
+                            break
+                        self._condition.wait(settings.INGEST_FLUSH_INTERVAL - waited)
+                    else:
+                        self._condition.wait()
+                if self._stopping.is_set():
+                    return
+
+            try:
+                self.flush()
+            except Exception:
+                # e.g. the database stayed locked past the pool timeout. The
+                # batch was requeued, so back off and retry.
+                self._stopping.wait(settings.INGEST_FLUSH_INTERVAL)
@@ -0,0 +1,306 @@
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.utils.cache import Cache, NOT_CACHED
+
+FEWEST_HOPS = "fewest_hops"
+BEST_RATE = "best_rate"
+
+# The rate a stored (base id, target id) pair had at some other time, or
+# None if it had none yet.
+RateResolver = Callable[[int, int], Optional[float]]
+
+
+@dataclass(frozen=True)
+class RateEdge:
+    base_id: int
+    target_id: int
+    rate: float
+    inverse: bool
+
+
+class RateGraph:
+    # Adjacency index over currency ids. Every stored rate adds a forward edge
+    # and, unless an explicit rate exists for the opposite direction, an
+    # inverse edge. Found routes are memoized in `routes` until the graph
+    # changes, so a repeated lookup only walks the cached path; give the
+    # cache max_entries, there are up to N squared pairs. Without one every
+    # lookup searches.
+
+    def __init__(self, max_hops: int = 2, strategy: str = FEWEST_HOPS,
+                 routes: Optional[Cache[tuple[int, int], Optional[tuple[RateEdge, ...]]]] = None) -> None:
+        if strategy not in (FEWEST_HOPS, BEST_RATE):
+            raise ValueError(f"unknown strategy {strategy!r}")
+
+        self.max_hops: int = max_hops
+        self.strategy: str = strategy
+
+        self._adjacency: dict[int, dict[int, RateEdge]] = {}
+        self._routes = routes
+        # Edges out of each currency, pivots first, built on first use.
+        self._neighbour_lists: dict[int, list[RateEdge]] = {}
+        # The same with each edge's target and log rate, for BEST_RATE.
+        self._weighted_lists: dict[int, list[tuple[int, float, RateEdge]]] = {}
+        self._pivots: tuple[int, ...] = ()
+        self._loaded: bool = False
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, rates: Iterable[tuple[int, int, float]],
+             pivots: Iterable[int] = ()) -> None:
+        with self._lock:
+            self._adjacency = {}
+            self._changed()
+            self._pivots = tuple(pivots)
+            for base_id, target_id, rate in rates:
+                self._add_edges(base_id, target_id, rate)
+            self._loaded = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._adjacency = {}
+            self._changed()
+            self._loaded = False
+
+    def add_rate(self, base_id: int, target_id: int, rate: float) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            self._add_edges(base_id, target_id, rate)
+            self._changed()
+
+    def add_rates(self, rates: Iterable[tuple[int, int, float]]) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            for base_id, target_id, rate in rates:
+                self._add_edges(base_id, target_id, rate)
+            self._changed()
+
+    def _changed(self) -> None:
+        self._neighbour_lists = {}
+        self._weighted_lists = {}
+        if self._routes is not None:
+            self._routes.invalidate()
+
+    def _add_edges(self, base_id: int, target_id: int, rate: float) -> None:
+        self._adjacency.setdefault(base_id, {})[target_id] = RateEdge(base_id, target_id, rate, False)
+
+        backward = self._adjacency.setdefault(target_id, {})
+        existing = backward.get(base_id)
+        if (existing is None or existing.inverse) and rate:
+            backward[base_id] = RateEdge(target_id, base_id, 1 / rate, True)
+
+    def find_path(self, base_id: int, target_id: int) -> Optional[tuple[RateEdge, ...]]:
+        key = (base_id, target_id)
+        with self._lock:
+            if self._routes is not None:
+                path = self._routes.get(key)
+                if path is not NOT_CACHED:
+                    return path
+
+            if self.strategy == BEST_RATE:
+                path = self._best_rate_path(base_id, target_id)
+            else:
+                path = self._fewest_hops_path(base_id, target_id)
+
+            if self._routes is not None:
+                self._routes.set(key, path)
+            return path
+
+    def rate(self, base_id: int, target_id: int) -> Optional[float]:
+        if base_id == target_id:
+            return 1.0
+
+        path = self.find_path(base_id, target_id)
+        if path is None:
+            return None
+
+        rate = 1.0
+        for edge in path:
+            rate *= edge.rate
+        return rate
+
+    def rate_at(self, base_id: int, target_id: int, resolve: RateResolver) -> Optional[float]:
+        # Like rate(), over the same currencies, pivots and rules, but with
+        # every edge's rate taken from resolve(). Only the edges the search
+        # reaches are resolved, each once, and the routes are not memoized:
+        # they are those of another time.
+        if base_id == target_id:
+            return 1.0
+
+        with self._lock:
+            resolved: dict[int, list[RateEdge]] = {}
+
+            def neighbours(currency_id: int) -> list[RateEdge]:
+                edges = resolved.get(currency_id)
+                if edges is None:
+                    edges = resolved[currency_id] = list(self._resolved_neighbours(currency_id, resolve))
+                return edges
+
+            if self.strategy == BEST_RATE:
+                def weighted(currency_id: int) -> Iterator[tuple[int, float, RateEdge]]:
+                    return ((edge.target_id, math.log(edge.rate), edge)
+                            for edge in neighbours(currency_id) if edge.rate > 0)
+
+                rounds = self._best_rate_rounds(base_id, weighted)
+                if target_id not in rounds[-1]:
+                    return None
+                path = self._best_rate_unwind(rounds, target_id)
+            else:
+                came_by = self._fewest_hops_tree(base_id, target_id, neighbours)
+                if came_by.get(target_id) is None:
+                    return None
+                path = self._unwind(came_by, target_id)
+
+        rate = 1.0
+        for edge in path:
+            rate *= edge.rate
+        return rate
+
+    def rates_from(self, base_id: int) -> dict[int, float]:
+        # Rates from base_id to every currency it reaches, over the routes
+        # find_path would pick, with the same rounding as rate().
+        with self._lock:
+            rates: dict[int, float] = {base_id: 1.0}
+            if self.strategy == BEST_RATE:
+                rounds = self._best_rate_rounds(base_id)
+                for target_id in rounds[-1]:
+                    if target_id != base_id:
+                        rate = 1.0
+                        for edge in self._best_rate_unwind(rounds, target_id):
+                            rate *= edge.rate
+                        rates[target_id] = rate
+            else:
+                # Currencies come in the order found, each after the one it
+                # was reached from.
+                for currency_id, edge in self._fewest_hops_tree(base_id).items():
+                    if edge is not None:
+                        rates[currency_id] = rates[edge.base_id] * edge.rate
+            return rates
+
+    def _neighbours(self, currency_id: int) -> list[RateEdge]:
+        neighbours = self._neighbour_lists.get(currency_id)
+        if neighbours is None:
+            edges = self._adjacency.get(currency_id, {})
+            preferred = [edges[pivot] for pivot in self._pivots if pivot in edges]
+            neighbours = preferred + [edge for target, edge in edges.items() if target not in self._pivots]
+            self._neighbour_lists[currency_id] = neighbours
+        return neighbours
+
+    def _resolved_neighbours(self, currency_id: int, resolve: RateResolver) -> Iterator[RateEdge]:
+        # The edges out of currency_id with resolved rates, in the same
+        # order. As in load(), a pair's inverse stands in only where the
+        # opposite pair has no rate of its own.
+        for edge in self._neighbours(currency_id):
+            rate = None if edge.inverse else resolve(edge.base_id, edge.target_id)
+            if rate is not None:
+                yield RateEdge(edge.base_id, edge.target_id, rate, False)
+                continue
+
+            stored = self._adjacency[edge.target_id].get(edge.base_id)
+            if stored is not None and not stored.inverse:
+                reverse = resolve(edge.target_id, edge.base_id)
+                if reverse:
+                    yield RateEdge(edge.base_id, edge.target_id, 1 / reverse, True)
+
+    def _weighted_neighbours(self, currency_id: int) -> list[tuple[int, float, RateEdge]]:
+        weighted = self._weighted_lists.get(currency_id)
+        if weighted is None:
+            weighted = [(edge.target_id, math.log(edge.rate), edge)
+                        for edge in self._neighbours(currency_id) if edge.rate > 0]
+            self._weighted_lists[currency_id] = weighted
+        return weighted
+
+    def _fewest_hops_path(self, base_id: int, target_id: int) -> Optional[tuple[RateEdge, ...]]:
+        came_by = self._fewest_hops_tree(base_id, target_id)
+        if came_by.get(target_id) is None:
+            return None
+        return self._unwind(came_by, target_id)
+
+    def _fewest_hops_tree(self, base_id: int, target_id: Optional[int] = None,
+                          neighbours: Optional[Callable[[int], Iterable[RateEdge]]] = None
+                          ) -> dict[int, Optional[RateEdge]]:
+        # Breadth-first search up to max_hops, stopping early once target_id
+        # is found: maps each currency reached to the edge it was reached by.
+        came_by: dict[int, Optional[RateEdge]] = {base_id: None}
+        if base_id not in self._adjacency:
+            return came_by
+
+        neighbours = neighbours or self._neighbours
+        frontier: deque[tuple[int, int]] = deque([(base_id, 0)])
+
+        while frontier and len(came_by) < len(self._adjacency):
+            currency_id, hops = frontier.popleft()
+            if hops == self.max_hops:
+                continue
+
+            for edge in neighbours(currency_id):
+                if edge.target_id in came_by:
+                    continue
+                came_by[edge.target_id] = edge
+                if edge.target_id == target_id:
+                    return came_by
+                frontier.append((edge.target_id, hops + 1))
+
+        return came_by
+
+    def _best_rate_path(self, base_id: int, target_id: int) -> Optional[tuple[RateEdge, ...]]:
+        rounds = self._best_rate_rounds(base_id)
+        if target_id == base_id or target_id not in rounds[-1]:
+            return None
+        return self._best_rate_unwind(rounds, target_id)
+
+    def _best_rate_rounds(self, base_id: int,
+                          weighted: Optional[Callable[[int], Iterable[tuple[int, float, RateEdge]]]] = None
+                          ) -> list[dict[int, tuple[float, Optional[RateEdge], int]]]:
+        # Hop-bounded Bellman-Ford over log rates: after k rounds best[v] holds
+        # the largest log product reachable from base_id in at most k hops,
+        # the edge it ends with and the round that edge was taken in. Each
+        # round's table is kept to follow the path back.
+        weighted = weighted or self._weighted_neighbours
+        best: dict[int, tuple[float, Optional[RateEdge], int]] = {base_id: (0.0, None, 0)}
+        rounds = [best]
+
+        for hops in range(1, self.max_hops + 1):
+            improved = dict(best)
+            for currency_id, (weight, _, taken) in best.items():
+                # A currency not improved last round was relaxed already.
+                if taken != hops - 1:
+                    continue
+                for target_id, log_rate, edge in weighted(currency_id):
+                    if target_id == base_id:
+                        continue
+                    candidate = weight + log_rate
+                    current = improved.get(target_id)
+                    if current is None or candidate > current[0] + 1e-12:
+                        improved[target_id] = (candidate, edge, hops)
+            best = improved
+            rounds.append(best)
+
+        return rounds
+
+    @staticmethod
+    def _best_rate_unwind(rounds: list[dict[int, tuple[float, Optional[RateEdge], int]]],
+                          target_id: int) -> tuple[RateEdge, ...]:
+        path: list[RateEdge] = []
+        _, edge, taken = rounds[-1][target_id]
+        while edge is not None:
+            path.append(edge)
+            _, edge, taken = rounds[taken - 1][edge.base_id]
+        return tuple(reversed(path))
+
+    @staticmethod
+    def _unwind(came_by: dict[int, Optional[RateEdge]], target_id: int) -> tuple[RateEdge, ...]:
+        path: list[RateEdge] = []
+        edge = came_by[target_id]
+        while edge is not None:
+            path.append(edge)
+            edge = came_by[edge.base_id]
+        return tuple(reversed(path))
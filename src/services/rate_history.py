@@ -0,0 +1,22 @@
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Optional
+
+
+class RateSeries:
+    # The rates of one currency pair in the order they took effect, kept as
+    # two parallel packed arrays (8 bytes per value, no per-item objects), so
+    # a point-in-time lookup is a single bisect over the timestamps.
+    __slots__ = ("timestamps", "rates")
+
+    def __init__(self, timestamps: Iterable[int] = (), rates: Iterable[float] = ()) -> None:
+        self.timestamps: array = array("q", timestamps)
+        self.rates: array = array("d", rates)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def at(self, timestamp: int) -> Optional[float]:
+        # The last rate that took effect at or before timestamp.
+        i = bisect_right(self.timestamps, timestamp)
+        return self.rates[i - 1] if i else None
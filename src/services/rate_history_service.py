@@ -0,0 +1,74 @@
+from itertools import islice
+from typing import Optional
+
+from src.dto.exchange_rates import ExchangeRateDTO
+from src.model.dao import ExchangeRateHistoryDAO
+from src.services.base_service import Service, ExchangeRatesListener
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.rate_graph import RateGraph
+from src.services.rate_history import RateSeries
+from src.utils import settings
+from src.utils.cache import Cache, NOT_CACHED
+from src.utils.exceptions import ExchangeRateNotFoundError
+
+
+class RateHistoryService(Service, ExchangeRatesListener):
+    _DAO = ExchangeRateHistoryDAO()
+    _exchange_rates_service = ExchangeRatesService()
+    # Loaded per pair on first use; pairs without history are cached as
+    # empty series, so repeated misses stay in memory too.
+    _series: Cache[tuple[int, int], RateSeries] = Cache("rate_history", settings.CACHE_TTL,
+                                                        settings.RATE_HISTORY_CACHE_PAIRS)
+
+    def init(self) -> None:
+        self._exchange_rates_service.subscribe(self)
+
+    def get_series(self, base_currency_id: int, target_currency_id: int) -> RateSeries:
+        pair = (base_currency_id, target_currency_id)
+
+        series = self._series.get(pair)
+        if series is not NOT_CACHED:
+            return series
+
+        rows = self._DAO.get_pair(*pair)
+        series = RateSeries((row["valid_from"] for row in rows), (row["rate"] for row in rows))
+        self._series.set(pair, series)
+
+        return series
+
+    def get_one(self, base_currency_code: str, target_currency_code: str,
+                at: int) -> ExchangeRateDTO:
+        exchange_rate = self._exchange_rates_service.get_one(base_currency_code, target_currency_code)
+
+        rate = self.get_series(exchange_rate.baseCurrency.id, exchange_rate.targetCurrency.id).at(at)
+        if rate is None:
+            raise ExchangeRateNotFoundError
+
+        return ExchangeRateDTO(exchange_rate.id,
+                               exchange_rate.baseCurrency,
+                               exchange_rate.targetCurrency,
+                               rate)
+
+    def get_rate(self, base_currency_id: int, target_currency_id: int, at: int,
+                 graph: RateGraph) -> Optional[float]:
+        # Routed over the given graph of the current rates, with its hop
+        # limit, strategy and pivots, each edge taking the rate its pair had
+        # at `at`. Pairs are never deleted, so every pair with history is an
+        # edge of the current graph; one without a rate yet is no edge.
+        return graph.rate_at(base_currency_id, target_currency_id,
+                             lambda base_id, target_id: self.get_series(base_id, target_id).at(at))
+
+    def warm_up(self) -> None:
+        # Loads the series of the current pairs, as many as the cache holds,
+        # so point-in-time conversions do not query on first use.
+        for exchange_rate in islice(self._exchange_rates_service.get_all(), settings.RATE_HISTORY_CACHE_PAIRS):
+            self.get_series(exchange_rate.baseCurrency.id, exchange_rate.targetCurrency.id)
+
+    def invalidate(self) -> None:
+        self._series.invalidate()
+
+    def rate_changed(self, base_currency_id: int, target_currency_id: int, rate: float) -> None:
+        self._series.invalidate((base_currency_id, target_currency_id))
+
+    def rates_reset(self) -> None:
+        self.invalidate()
@@ -0,0 +1,184 @@
+import json
+import math
+import random
+import shutil
+import time
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from src.services.import_service import read_records
+from src.utils.exceptions import InvalidTimestampError
+from src.utils.parse import parse_timestamp
+
+
+@dataclass(frozen=True)
+class RateUpdate:
+    base_currency_code: str
+    target_currency_code: str
+    rate: float
+    # When the rate was published, or first seen if the feed does not say;
+    # ingest lag is measured from here.
+    observed_at: float
+
+
+def parse_update(record: Any, observed_at: float) -> Optional[RateUpdate]:
+    # None for records that are not a valid rate, which sources count as
+    # rejected instead of failing the whole feed.
+    if not isinstance(record, dict):
+        return None
+
+    try:
+        base_currency_code = str(record["base"]).strip()
+        target_currency_code = str(record["target"]).strip()
+        rate = float(record["rate"])
+        if record.get("at") not in (None, ""):
+            observed_at = float(parse_timestamp(str(record["at"])))
+    except (KeyError, TypeError, ValueError, InvalidTimestampError):
+        return None
+
+    if (len(base_currency_code) != 3 or len(target_currency_code) != 3
+            or base_currency_code == target_currency_code
+            or not rate > 0 or math.isinf(rate)):
+        return None
+
+    return RateUpdate(base_currency_code, target_currency_code, rate, observed_at)
+
+
+class RateSource(ABC):
+    NAME: str
+    # Seconds the ingestion worker waits between polls that found nothing.
+    interval: float = 1.0
+
+    def __init__(self) -> None:
+        self.rejected: int = 0
+
+    @abstractmethod
+    def poll(self) -> list[RateUpdate]:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _parse(self, records, observed_at: float) -> list[RateUpdate]:
+        updates = []
+        for record in records:
+            update = parse_update(record, observed_at)
+            if update is None:
+                self.rejected += 1
+            else:
+                updates.append(update)
+        return updates
+
+
+class DirectoryRateSource(RateSource):
+    # Picks up .csv, .json and .ndjson files (base, target, rate and an
+    # optional at) dropped into a directory, oldest first, and moves them to
+    # processed/ or failed/. Writers should create files under a name
+    # starting with "." and rename them when complete.
+    NAME = "directory"
+    SUFFIXES = (".csv", ".json", ".ndjson", ".jsonl")
+
+    def __init__(self, directory: Path, interval: float = 1.0) -> None:
+        super().__init__()
+        self.directory: Path = Path(directory)
+        self.interval = interval
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def poll(self) -> list[RateUpdate]:
+        files = sorted((path for path in self.directory.iterdir()
+                        if path.is_file() and not path.name.startswith(".")
+                        and path.suffix.lower() in self.SUFFIXES),
+                       key=lambda path: path.stat().st_mtime)
+
+        updates: list[RateUpdate] = []
+        for path in files:
+            observed_at = path.stat().st_mtime
+            try:
+                updates += self._parse((record for _, record in read_records(path)), observed_at)
+                self._move(path, "processed")
+            except (OSError, ValueError):
+                self._move(path, "failed")
+        return updates
+
+    def _move(self, path: Path, folder: str) -> None:
+        destination = self.directory / folder
+        destination.mkdir(exist_ok=True)
+        shutil.move(path, destination / path.name)
+
+
+class HTTPRateSource(RateSource):
+    # Polls a URL serving a JSON array of rates (or {"rates": [...]}),
+    # skipping unchanged feeds through ETag / If-None-Match.
+    NAME = "http"
+
+    def __init__(self, url: str, interval: float = 1.0, timeout: float = 10.0) -> None:
+        super().__init__()
+        self.url: str = url
+        self.interval = interval
+        self.timeout: float = timeout
+        self.errors: int = 0
+        self._etag: Optional[str] = None
+
+    def poll(self) -> list[RateUpdate]:
+        request = urllib.request.Request(self.url, headers={"Accept": "application/json"})
+        if self._etag is not None:
+            request.add_header("If-None-Match", self._etag)
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                self._etag = response.headers.get("ETag")
+                records = json.loads(response.read())
+        except urllib.error.HTTPError as err:
+            if err.code != 304:
+                self.errors += 1
+            return []
+        except (OSError, ValueError):
+            self.errors += 1
+            return []
+
+        if isinstance(records, dict):
+            records = records.get("rates")
+        if not isinstance(records, list):
+            self.errors += 1
+            return []
+
+        return self._parse(records, time.time())
+
+
+class GeneratedRateSource(RateSource):
+    # A random walk over the given rates at a steady number of updates per
+    # second, for load testing without a real feed.
+    NAME = "generated"
+
+    def __init__(self, rates: list[tuple[str, str, float]], updates_per_second: float,
+                 interval: float = 0.05, seed: Optional[int] = None) -> None:
+        super().__init__()
+        if not rates:
+            raise ValueError("a generated feed needs at least one rate to walk")
+
+        self.interval = interval
+        self.updates_per_second: float = updates_per_second
+        self._pairs: list[tuple[str, str]] = [(base, target) for base, target, _ in rates]
+        self._rates: list[float] = [rate for _, _, rate in rates]
+        self._random = random.Random(seed)
+        self._last_poll: float = time.monotonic()
+        self._carry: float = 0.0
+
+    def poll(self) -> list[RateUpdate]:
+        now = time.monotonic()
+        due = (now - self._last_poll) * self.updates_per_second + self._carry
+        self._last_poll = now
+        count = int(due)
+        self._carry = due - count
+
+        observed_at = time.time()
+        updates = []
+        for _ in range(count):
+            i = self._random.randrange(len(self._pairs))
+            self._rates[i] *= self._random.uniform(0.999, 1.001)
+            updates.append(RateUpdate(*self._pairs[i], self._rates[i], observed_at))
+        return updates
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from src.dto.rate_events import RateChangeDTO
+from src.services.base_service import Service, ExchangeRatesListener
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.utils import metrics, settings
+from src.utils.exceptions import CurrencyNotFoundError
+from src.utils.serializer import get_serializer
+
+
+@dataclass(frozen=True)
+class RateEvent:
+    seq: int
+    # The currencies the event is about; empty when it concerns every client.
+    currencies: tuple[str, ...]
+    # The complete SSE frame, encoded once for every subscriber.
+    frame: bytes
+
+
+Subscriber = Callable[[list[RateEvent]], None]
+
+
+class RateStreamService(Service, ExchangeRatesListener):
+    # In-process pub/sub of rate changes. Every change ExchangeRatesService
+    # reports becomes a numbered event, handed to the subscribers in order
+    # and kept in a bounded ring, so a reconnecting client can catch up from
+    # its Last-Event-ID.
+    _currencies_service = CurrenciesService()
+    _exchange_rates_service = ExchangeRatesService()
+
+    def init(self) -> None:
+        self._serializer = get_serializer()
+        # Event ids are "<epoch>-<seq>", so ids from before a restart are
+        # recognised instead of matching unrelated events.
+        self._epoch: str = f"{time.time_ns():x}"
+        self._seq: int = 0
+        self._recent: deque[RateEvent] = deque(maxlen=settings.STREAM_REPLAY_EVENTS)
+        self._subscribers: list[Subscriber] = []
+        self._lock = threading.Lock()
+        self._exchange_rates_service.subscribe(self)
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            if subscriber not in self._subscribers:
+                self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def events_after(self, last_event_id: str) -> Optional[list[RateEvent]]:
+        # None when the client has missed events that are no longer kept, or
+        # its id is from before a restart: it has to refetch the rates.
+        epoch, _, seq = last_event_id.strip().partition("-")
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+
+        seq = int(seq)
+        with self._lock:
+            if seq > self._seq:
+                return None
+            if seq < self._seq and (not self._recent or self._recent[0].seq > seq + 1):
+                return None
+            return [event for event in self._recent if event.seq > seq]
+
+    def reset_frame(self) -> bytes:
+        return b"event: reset\ndata: {}\n\n"
+
+    def rate_changed(self, base_currency_id: int, target_currency_id: int, rate: float) -> None:
+        self.rates_changed([(base_currency_id, target_currency_id, rate)])
+
+    def rates_changed(self, rates: list[tuple[int, int, float]]) -> None:
+        published = time.time()
+        changes = []
+        for base_currency_id, target_currency_id, rate in rates:
+            try:
+                base_currency = self._currencies_service.get_one(currency_id=base_currency_id)
+                target_currency = self._currencies_service.get_one(currency_id=target_currency_id)
+            except CurrencyNotFoundError:
+                continue
+            changes.append(RateChangeDTO(base_currency, target_currency, rate, published))
+
+        self._publish([((change.baseCurrency.code, change.targetCurrency.code),
+                        b"rate", change.encode(self._serializer))
+                       for change in changes])
+
+    def rates_reset(self) -> None:
+        # Rates were replaced wholesale (e.g. by an import): clients refetch.
+        self._publish([((), b"reset", b"{}")])
+
+    def _publish(self, messages: list[tuple[tuple[str, ...], bytes, bytes]]) -> None:
+        if not messages:
+            return
+
+        epoch = self._epoch.encode()
+        with self._lock:
+            events = []
+            for currencies, kind, data in messages:
+                self._seq += 1
+                frame = b"id: %b-%d\nevent: %b\ndata: %b\n\n" % (epoch, self._seq, kind, data)
+                events.append(RateEvent(self._seq, currencies, frame))
+            self._recent.extend(events)
+
+            # Called under the lock, so every subscriber sees events in order;
+            # subscribers must only queue them.
+            for subscriber in self._subscribers:
+                subscriber(events)
+
+        metrics.STREAM_EVENTS.inc(amount=len(events))
@@ -0,0 +1,180 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.model.dao import CurrenciesDAO, ExchangeRatesDAO
+from src.model.dbmanager import DBManager, Row
+from src.model.snapshot import RateSnapshot, SnapshotStore
+from src.services.base_service import Service
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.rate_history_service import RateHistoryService
+from src.utils import metrics, settings
+
+
+class SnapshotService(Service):
+    # Keeps the shared snapshot in step with SQLite when the server runs as
+    # several worker processes. A commit in this process returns only once
+    # a snapshot that includes it is published, so the writer's next read
+    # sees its own write; commits that land while one is being written
+    # share the next. Snapshots published by the other workers become the
+    # same cache invalidations and listener calls a local write causes.
+    # The watching worker also publishes what other processes, such as
+    # bulk_import, commit to SQLite directly.
+    _currencies_DAO = CurrenciesDAO()
+    _exchange_rates_DAO = ExchangeRatesDAO()
+    _currencies_service = CurrenciesService()
+    _exchange_rates_service = ExchangeRatesService()
+    _rate_history_service = RateHistoryService()
+
+    def init(self) -> None:
+        self._db_manager = DBManager()
+        self._store = SnapshotStore()
+        self._condition = threading.Condition()
+        self._requested: int = 0
+        self._published: int = 0
+        self._stopping: bool = False
+        self._thread: Optional[threading.Thread] = None
+        # PRAGMA data_version as of the last publish, on a connection only
+        # the publisher thread uses.
+        self._watch: Optional[sqlite3.Connection] = None
+        self._data_version: int = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def generation(self) -> int:
+        snapshot = self._store.current()
+        return 0 if snapshot is None else snapshot.generation
+
+    def start(self, directory: Path, watch_database: bool = True) -> None:
+        # One worker per server watches the database, so a write from
+        # outside costs one load rather than one per worker.
+        if self._thread is not None:
+            raise RuntimeError("snapshots are already running")
+
+        if watch_database:
+            self._watch = self._db_manager.watch()
+            self._data_version = self._read_data_version()
+        self._store.open(directory)
+        if self._store.generation == 0:
+            self._store.publish(self._load)
+        else:
+            # Whatever is published now is the starting point, not a change.
+            self._store.poll()
+        self._store.subscribe(self._on_published)
+        self._db_manager.add_commit_listener(self.changed)
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="snapshot-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._watch is not None:
+            self._watch.close()
+            self._watch = None
+        self._store.close()
+
+    def poll(self) -> None:
+        self._store.poll()
+
+    def changed(self) -> None:
+        # Commit listener: waits for a snapshot taken after the commit.
+        with self._condition:
+            self._requested += 1
+            requested = self._requested
+            self._condition.notify_all()
+            while self._published < requested and self._thread is not None:
+                self._condition.wait()
+
+    def _load(self) -> tuple[list[Row], list[Row]]:
+        return (self._currencies_DAO.get_all(snapshot=False),
+                self._exchange_rates_DAO.get_all(snapshot=False))
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._requested == self._published and not self._stopping:
+                    self._condition.wait(settings.SNAPSHOT_POLL_INTERVAL)
+                if self._stopping:
+                    # Writers still waiting keep the snapshot they had.
+                    self._published = self._requested
+                    self._condition.notify_all()
+                    return
+                requested = self._requested
+
+            if requested > self._published:
+                self._publish()
+            else:
+                # Workers with only stream clients serve no requests that
+                # would notice the other workers' writes.
+                try:
+                    self._store.poll()
+                    self._check_database()
+                except Exception:
+                    pass
+
+            with self._condition:
+                self._published = max(self._published, requested)
+                self._condition.notify_all()
+
+    def _read_data_version(self) -> int:
+        return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_database(self) -> None:
+        # Any commit but this connection's moves data_version, this
+        # process's own too; those are published already and compare equal.
+        # Imported history is not in the snapshot: it only drops this
+        # worker's history caches, the others' expire after CACHE_TTL.
+        if self._watch is None:
+            return
+        data_version = self._read_data_version()
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        self._rate_history_service.invalidate()
+        previous = self._store.current()
+        if self._publish(if_changed=True) is not None:
+            # Marked as seen by publish(), so applied here as another
+            # worker's would be.
+            self._on_published(previous, self._store.current())
+
+    def _publish(self, if_changed: bool = False) -> Optional[int]:
+        # Read first: a commit landing during the load is seen next time.
+        if self._watch is not None:
+            self._data_version = self._read_data_version()
+
+        started = time.perf_counter()
+        try:
+            generation = self._store.publish(self._load, if_changed)
+        except Exception:
+            # Readers keep the previous snapshot; the next commit retries.
+            metrics.SNAPSHOT_PUBLISHES.inc(("failed",))
+            return None
+        if generation is not None:
+            metrics.SNAPSHOT_PUBLISHES.inc(("published",))
+            metrics.SNAPSHOT_PUBLISH_SECONDS.observe(time.perf_counter() - started)
+        return generation
+
+    def _on_published(self, previous: Optional[RateSnapshot], snapshot: RateSnapshot) -> None:
+        changed = None if previous is None else snapshot.changed_rates(previous)
+        if changed is None:
+            self._currencies_service.invalidate()
+            self._exchange_rates_service.invalidate()
+        elif changed:
+            self._exchange_rates_service.refresh(changed)
+
+        # Retires ETags handed out for the data from before.
+        self._db_manager.bump_generation()
+        metrics.SNAPSHOT_REMOTE_CHANGES.inc()
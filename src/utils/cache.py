@@ -0,0 +1,92 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+NOT_CACHED = object()
+
+
+@dataclass
+class CacheStats:
+    name: str
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class Cache(Generic[K, V]):
+    _registry: dict[str, "Cache"] = {}
+
+    def __init__(self, name: str, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None) -> None:
+        self.name: str = name
+        self._ttl: Optional[float] = ttl
+        # With max_entries set the least recently used entry is evicted first.
+        self._max_entries: Optional[int] = max_entries
+        self._entries: dict[K, tuple[V, float]] = {}
+        self._lock = threading.Lock()
+        self._hits: int = 0
+        self._misses: int = 0
+        # Bumped by every invalidation. A value loaded while one ran may be
+        # stale, so set() drops it when the version taken before the load
+        # no longer matches.
+        self._version: int = 0
+
+        Cache._registry[name] = self
+
+    def get(self, key: K, default: Any = NOT_CACHED) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self._ttl is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                return default
+
+            self._hits += 1
+            if self._max_entries is not None:
+                self._entries[key] = self._entries.pop(key)
+            return entry[0]
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def set(self, key: K, value: V, version: Optional[int] = None) -> bool:
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None else 0.0
+        with self._lock:
+            if version is not None and version != self._version:
+                return False
+            self._entries.pop(key, None)
+            if self._max_entries is not None:
+                while len(self._entries) >= self._max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (value, expires_at)
+            return True
+
+    def invalidate(self, key: Optional[K] = None) -> None:
+        with self._lock:
+            self._version += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.name, self._hits, self._misses, len(self._entries))
+
+    @classmethod
+    def all_stats(cls) -> list[CacheStats]:
+        return [cache.stats() for cache in cls._registry.values()]
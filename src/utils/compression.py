@@ -0,0 +1,97 @@
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Optional
+
+from src.utils import settings
+
+
+class Codec(ABC):
+    name: str
+
+    @abstractmethod
+    def compressor(self) -> Any:
+        # An object with compress(bytes) -> bytes and flush() -> bytes.
+        pass
+
+    def compress(self, chunks: Iterable[bytes]) -> bytes:
+        compressor = self.compressor()
+        parts: list[bytes] = [compressor.compress(chunk) for chunk in chunks]
+        parts.append(compressor.flush())
+        return b"".join(parts)
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+
+    def __init__(self, level: int = settings.COMPRESSION_GZIP_LEVEL) -> None:
+        self._level = level
+
+    def compressor(self) -> Any:
+        # wbits=31: deflate with a gzip header and trailer.
+        return zlib.compressobj(self._level, zlib.DEFLATED, 31)
+
+
+class _BrotliCompressor:
+    def __init__(self, compressor: Any) -> None:
+        self._compressor = compressor
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class BrotliCodec(Codec):
+    name = "br"
+
+    def __init__(self, quality: int = settings.COMPRESSION_BROTLI_QUALITY) -> None:
+        import brotli
+        self._brotli = brotli
+        self._quality = quality
+
+    def compressor(self) -> Any:
+        return _BrotliCompressor(self._brotli.Compressor(mode=self._brotli.MODE_TEXT,
+                                                         quality=self._quality))
+
+
+def available_codecs() -> list[Codec]:
+    # In order of preference when the client weighs several equally.
+    codecs: list[Codec] = []
+    try:
+        codecs.append(BrotliCodec())
+    except ImportError:
+        pass
+    codecs.append(GzipCodec())
+
+    return codecs
+
+
+def negotiate(accept_encoding: Optional[str], codecs: list[Codec]) -> Optional[Codec]:
+    # Picks the codec with the highest q-value in Accept-Encoding; None means
+    # the identity encoding.
+    if not accept_encoding or not codecs:
+        return None
+
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.strip().split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best: Optional[Codec] = None
+    best_weight = 0.0
+    for codec in codecs:
+        weight = weights.get(codec.name, wildcard)
+        if weight > best_weight:
+            best, best_weight = codec, weight
+
+    return best
@@ -0,0 +1,46 @@
+import base64
+import binascii
+from itertools import islice
+from typing import Callable, Iterator, Optional, TypeVar
+
+from src.utils.exceptions import InvalidCursorError
+
+T = TypeVar('T')
+
+_PREFIX = "id:"
+
+
+def encode_cursor(last_id: int) -> str:
+    token = base64.urlsafe_b64encode(f"{_PREFIX}{last_id}".encode("ascii"))
+    return token.rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str) -> int:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursorError
+
+    if not value.startswith(_PREFIX) or not value[len(_PREFIX):].isdigit():
+        raise InvalidCursorError
+
+    return int(value[len(_PREFIX):])
+
+
+def take_page(items: Iterator[T], limit: int,
+              key: Callable[[T], int]) -> tuple[list[T], Optional[str]]:
+    # items should hold at most limit + 1 entries: the extra one only tells
+    # whether there is a next page, the cursor points at the last one kept.
+    try:
+        page = list(islice(items, limit + 1))
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+    if len(page) <= limit:
+        return page, None
+
+    page.pop()
+    return page, encode_cursor(key(page[-1]))
@@ -64,9 +64,38 @@ class InvalidAmountError(RequestException):
     RESPONSE_CODE = 400
     MESSAGE = "Amount have to be a number"
 
+class DatabaseBusyError(RequestException):
+    RESPONSE_CODE = 503
+    MESSAGE = "Database is busy, try again later"
 
+class InvalidBatchError(RequestException):
+    RESPONSE_CODE = 400
+    MESSAGE = "Batch must be a JSON array or NDJSON"
+
+class BatchTooLargeError(RequestException):
+    RESPONSE_CODE = 413
+    MESSAGE = "Batch is too large"
+
+class InvalidCursorError(RequestException):
+    RESPONSE_CODE = 400
+    MESSAGE = "Invalid cursor"
 
+class InvalidLimitError(RequestException):
+    RESPONSE_CODE = 400
+    MESSAGE = "Limit must be a positive integer within the maximum page size"
 
+class InvalidCodePrefixError(RequestException):
+    RESPONSE_CODE = 400
+    MESSAGE = "Currency code prefix must be 1 to 3 characters long"
 
+class ExchangeMatrixTooLargeError(RequestException):
+    RESPONSE_CODE = 503
+    MESSAGE = "Too many currencies for an exchange matrix"
 
+class InvalidTimestampError(RequestException):
+    RESPONSE_CODE = 400
+    MESSAGE = "Time must be Unix seconds or an ISO 8601 date or date-time"
 
+class AmountOutOfRangeError(RequestException):
+    RESPONSE_CODE = 400
+    MESSAGE = "Amount is out of range"
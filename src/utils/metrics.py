@@ -0,0 +1,287 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from src.utils import settings
+from src.utils.cache import Cache
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                                      0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    _registry: list["Metric"] = []
+    TYPE: str
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> None:
+        self.name: str = name
+        self.help: str = help
+        self.label_names: tuple[str, ...] = label_names
+        self._lock = threading.Lock()
+        Metric._registry.append(self)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} "
+                             f"{_format_value(value)}")
+        return lines
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} "
+                             f"{_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, label_names)
+        self.buckets: tuple[float, ...] = buckets
+        # Per label set: per-bucket (non-cumulative) counts, +Inf last, then sum.
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total[0])
+                              for labels, (counts, total) in self._series.items())
+
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("currencies_request_duration_seconds",
+                            "Time from reading a request to writing the last byte of its response.",
+                            ("method", "route", "status"))
+REQUEST_SQL_QUERIES = Histogram("currencies_request_sql_queries",
+                                "SQL statements executed per request.",
+                                ("route",), buckets=COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram("currencies_request_sql_seconds",
+                                "Time spent in SQLite per request.", ("route",))
+REQUEST_SERIALIZATION_SECONDS = Histogram("currencies_request_serialization_seconds",
+                                          "Time spent encoding the response body per request, "
+                                          "excluding SQL.", ("route",))
+SQL_SECONDS = Histogram("currencies_sql_statement_duration_seconds",
+                        "Duration of single SQL statements.", ("kind",))
+
+INGEST_UPDATES = Counter("currencies_ingest_updates_total",
+                         "Rate updates read by the ingestion worker, by what became of them.",
+                         ("outcome",))
+INGEST_LAG_SECONDS = Histogram("currencies_ingest_lag_seconds",
+                               "Time from a rate being published to it being committed.",
+                               buckets=LATENCY_BUCKETS + (30.0, 60.0, 300.0))
+INGEST_BATCH_SECONDS = Histogram("currencies_ingest_batch_duration_seconds",
+                                 "Time to write one batch of rates and notify caches.")
+INGEST_PENDING = Gauge("currencies_ingest_pending_updates",
+                       "Coalesced rate updates waiting for the next batch.")
+
+STREAM_CLIENTS = Gauge("currencies_stream_clients",
+                       "Open /exchangeRates/stream connections.")
+STREAM_EVENTS = Counter("currencies_stream_events_total",
+                        "Rate events published to stream subscribers.")
+STREAM_DISCONNECTS = Counter("currencies_stream_disconnects_total",
+                             "Stream connections closed, by reason.", ("reason",))
+
+SNAPSHOT_PUBLISHES = Counter("currencies_snapshot_publishes_total",
+                             "Shared rate snapshots written by this worker, by outcome.", ("outcome",))
+SNAPSHOT_PUBLISH_SECONDS = Histogram("currencies_snapshot_publish_duration_seconds",
+                                     "Time to read the rates and write one shared snapshot.")
+SNAPSHOT_REMOTE_CHANGES = Counter("currencies_snapshot_remote_changes_total",
+                                  "Snapshots published by other workers that this one applied.")
+
+
+@dataclass
+class RequestStats:
+    method: str
+    route: str = "unmatched"
+    status: int = 500
+    sql_queries: int = 0
+    sql_seconds: float = 0.0
+    serialization_seconds: float = 0.0
+
+
+_local = threading.local()
+
+
+def current_request() -> Optional[RequestStats]:
+    return getattr(_local, "stats", None)
+
+
+@contextmanager
+def track_request(method: str) -> Iterator[Optional[RequestStats]]:
+    if not settings.METRICS:
+        yield None
+        return
+
+    stats = RequestStats(method)
+    _local.stats = stats
+    started = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        elapsed = time.perf_counter() - started
+        _local.stats = None
+
+        REQUEST_SECONDS.observe(elapsed, (stats.method, stats.route, str(stats.status)))
+        REQUEST_SQL_QUERIES.observe(stats.sql_queries, (stats.route,))
+        REQUEST_SQL_SECONDS.observe(stats.sql_seconds, (stats.route,))
+        REQUEST_SERIALIZATION_SECONDS.observe(stats.serialization_seconds, (stats.route,))
+
+
+def set_route(route: str) -> None:
+    stats = current_request()
+    if stats is not None:
+        stats.route = route
+
+
+def record_sql_time(seconds: float) -> None:
+    # Time spent in SQLite on behalf of the current request, possibly only
+    # part of a statement (a fetchmany batch of a streamed query).
+    stats = current_request()
+    if stats is not None:
+        stats.sql_seconds += seconds
+
+
+def record_sql_statement(kind: str, seconds: float) -> None:
+    if not settings.METRICS:
+        return
+    SQL_SECONDS.observe(seconds, (kind,))
+    stats = current_request()
+    if stats is not None:
+        stats.sql_queries += 1
+
+
+def record_sql(kind: str, seconds: float) -> None:
+    record_sql_time(seconds)
+    record_sql_statement(kind, seconds)
+
+
+def record_serialization(seconds: float) -> None:
+    stats = current_request()
+    if stats is not None:
+        stats.serialization_seconds += seconds
+
+
+def timed_body(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # Charges the time spent producing each chunk to serialization, minus
+    # what SQLite took meanwhile: streamed bodies fetch rows lazily.
+    stats = current_request()
+    try:
+        while True:
+            if stats is None:
+                chunk = next(chunks, None)
+            else:
+                started, sql_before = time.perf_counter(), stats.sql_seconds
+                chunk = next(chunks, None)
+                stats.serialization_seconds += (time.perf_counter() - started
+                                                - (stats.sql_seconds - sql_before))
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _render_caches() -> list[str]:
+    stats = Cache.all_stats()
+    families = (
+        ("currencies_cache_hits_total", "counter", "Cache lookups that found an entry.",
+         lambda cache: cache.hits),
+        ("currencies_cache_misses_total", "counter", "Cache lookups that found nothing.",
+         lambda cache: cache.misses),
+        ("currencies_cache_entries", "gauge", "Entries currently cached.",
+         lambda cache: cache.size),
+        ("currencies_cache_hit_ratio", "gauge", "Hits over lookups since start.",
+         lambda cache: cache.hit_ratio),
+    )
+
+    lines: list[str] = []
+    for name, kind, help, value in families:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{_escape(cache.name)}"}} {_format_value(value(cache))}'
+                  for cache in stats]
+    return lines
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in Metric._registry:
+        lines += metric.render()
+    lines += _render_caches()
+
+    return "\n".join(lines) + "\n"
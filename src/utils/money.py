@@ -0,0 +1,203 @@
+import math
+from decimal import (Decimal, InvalidOperation, ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR,
+                     ROUND_HALF_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_UP)
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from src.utils import settings
+from src.utils.exceptions import AmountOutOfRangeError, InvalidAmountError
+
+# Fixed-point money: an amount is an integer count of its currency's minor
+# units and a rate the exact decimal it prints as, an integer over a power
+# of ten, so a conversion is one exact integer multiply and divide with a
+# single, explicit rounding.
+
+HALF_EVEN = "half_even"
+HALF_UP = "half_up"
+HALF_DOWN = "half_down"
+UP = "up"
+DOWN = "down"
+CEILING = "ceiling"
+FLOOR = "floor"
+
+_DECIMAL_ROUNDING: dict[str, str] = {
+    HALF_EVEN: ROUND_HALF_EVEN,
+    HALF_UP: ROUND_HALF_UP,
+    HALF_DOWN: ROUND_HALF_DOWN,
+    UP: ROUND_UP,
+    DOWN: ROUND_DOWN,
+    CEILING: ROUND_CEILING,
+    FLOOR: ROUND_FLOOR,
+}
+
+INT64_MAX: int = 2**63 - 1
+
+# ISO 4217 exponents other than 2.
+_ISO_MINOR_UNITS: dict[str, int] = {
+    **dict.fromkeys(("BIF", "CLP", "DJF", "GNF", "ISK", "JPY", "KMF", "KRW", "PYG",
+                     "RWF", "UGX", "UYI", "VND", "VUV", "XAF", "XOF", "XPF"), 0),
+    **dict.fromkeys(("BHD", "IQD", "JOD", "KWD", "LYD", "OMR", "TND"), 3),
+    **dict.fromkeys(("CLF", "UYW"), 4),
+}
+DEFAULT_MINOR_UNITS: int = 2
+
+# Array conversions split amounts into limbs below this, so every partial
+# product stays inside int64.
+_LIMB: int = 10**9
+
+
+def check_rounding(rounding: str) -> str:
+    if rounding not in _DECIMAL_ROUNDING:
+        raise ValueError(f"unknown rounding {rounding!r}")
+    return rounding
+
+
+def minor_units(currency_code: str) -> int:
+    override = settings.MONEY_MINOR_UNITS.get(currency_code)
+    if override is not None:
+        return override
+    return _ISO_MINOR_UNITS.get(currency_code, DEFAULT_MINOR_UNITS)
+
+
+def parse_amount(value: Any) -> Decimal:
+    # Strings and ints are taken exactly; floats by their shortest repr, so
+    # 0.1 is 0.1 and not the binary value nearest to it.
+    if isinstance(value, bool):
+        raise InvalidAmountError
+    try:
+        amount = Decimal(repr(value) if isinstance(value, float) else value)
+    except (InvalidOperation, TypeError, ValueError):
+        raise InvalidAmountError
+
+    if not amount.is_finite():
+        raise InvalidAmountError
+    return amount
+
+
+def to_minor(amount: Decimal, digits: int, rounding: str = settings.MONEY_ROUNDING) -> int:
+    # Amounts finer than the currency's minor unit are rounded once, here.
+    minor = int(amount.scaleb(digits).to_integral_value(rounding=_DECIMAL_ROUNDING[rounding]))
+    if abs(minor) > INT64_MAX:
+        raise AmountOutOfRangeError
+    return minor
+
+
+def from_minor(minor: int, digits: int) -> Decimal:
+    # Exact, with all of the currency's minor digits: 150 cents is 1.50.
+    return Decimal(minor).scaleb(-digits)
+
+
+def from_minor_array(minor: np.ndarray, digits: int) -> list[Decimal]:
+    return [Decimal(value).scaleb(-digits) for value in minor.tolist()]
+
+
+def rate_to_fixed(rate: float) -> tuple[int, int]:
+    # The rate's shortest repr as an integer and a power of ten to divide it
+    # by: 4e-10 is (4, 10), 1/3 is (3333333333333333, 16) and 2e20 is
+    # (2, -20). Nothing is cut off, so tiny rates do not become zero.
+    if not math.isfinite(rate) or rate <= 0:
+        raise ValueError(f"invalid rate {rate!r}")
+    _, digits, exponent = Decimal(repr(rate)).as_tuple()
+    return int("".join(map(str, digits))), -exponent
+
+
+def _round_quotient(quotient, remainder, divisor: int, rounding: str):
+    # Rounds quotient + remainder / divisor, with 0 <= remainder < divisor
+    # (floor division), to an integer. Written with operators only, so it
+    # works on Python ints and on int64 arrays alike.
+    if rounding == FLOOR:
+        return quotient
+    if rounding == CEILING:
+        return quotient + (remainder > 0)
+    if rounding == DOWN:
+        return quotient + ((remainder > 0) & (quotient < 0))
+    if rounding == UP:
+        return quotient + ((remainder > 0) & (quotient >= 0))
+
+    twice = remainder * 2
+    if rounding == HALF_UP:
+        tie_up = quotient >= 0
+    elif rounding == HALF_DOWN:
+        tie_up = quotient < 0
+    else:
+        tie_up = quotient % 2 == 1
+    return quotient + ((twice > divisor) | ((twice == divisor) & tie_up))
+
+
+def _floor_muldiv(amounts: np.ndarray, numerator: int, divisor: int) -> tuple[np.ndarray, np.ndarray]:
+    # floor(amounts * numerator / divisor) and its remainder, exactly, in
+    # int64. divisor is a power of ten.
+    if divisor > _LIMB:
+        # Divide by the limb first, then by the rest; the remainders combine.
+        quotient, remainder = _floor_muldiv(amounts, numerator, _LIMB)
+        quotient, high = np.divmod(quotient, divisor // _LIMB)
+        return quotient, high * _LIMB + remainder
+
+    # amounts * numerator = amounts * (nq * divisor + nr)
+    #                     = (amounts * nq + high * nr) * divisor + low * nr
+    # with amounts = high * divisor + low, and low * nr < divisor**2.
+    nq, nr = divmod(numerator, divisor)
+    high, low = np.divmod(amounts, divisor)
+    carry, remainder = np.divmod(low * nr, divisor)
+    return amounts * nq + high * nr + carry, remainder
+
+
+class Conversion:
+    # A rate between two currencies as the exact fraction that takes base
+    # minor units to target minor units: numerator / divisor, where the
+    # numerator is the rate's digits and the divisor, a power of ten,
+    # absorbs both the rate's scale and the difference in minor units.
+
+    __slots__ = ("rate", "rate_fixed", "rate_scale", "base_digits", "target_digits", "rounding",
+                 "numerator", "divisor")
+
+    def __init__(self, rate: float, base_digits: int, target_digits: int,
+                 rounding: str = settings.MONEY_ROUNDING) -> None:
+        self.rate_fixed, self.rate_scale = rate_to_fixed(rate)
+        # Applied exactly as given.
+        self.rate: float = rate
+        self.base_digits: int = base_digits
+        self.target_digits: int = target_digits
+        self.rounding: str = check_rounding(rounding)
+
+        shift = self.rate_scale + base_digits - target_digits
+        if shift >= 0:
+            self.numerator: int = self.rate_fixed
+            self.divisor: int = 10**shift
+        else:
+            self.numerator = self.rate_fixed * 10**-shift
+            self.divisor = 1
+
+    def apply(self, amount: int) -> int:
+        quotient, remainder = divmod(amount * self.numerator, self.divisor)
+        return _round_quotient(quotient, remainder, self.divisor, self.rounding)
+
+    def apply_array(self, amounts: np.ndarray) -> np.ndarray:
+        # Vectorized apply() over int64 minor units, with the same results.
+        amounts = np.asarray(amounts, dtype=np.int64)
+        if amounts.size == 0:
+            return amounts.copy()
+
+        # The largest intermediate is amounts * numerator over the first
+        # stage's divisor; refuse inputs that would wrap around.
+        largest = max(int(amounts.max()), -int(amounts.min()))
+        stage_divisor = min(self.divisor, _LIMB)
+        if largest * self.numerator // stage_divisor + largest + stage_divisor > INT64_MAX:
+            # Rates with many digits leave less room: these go through
+            # Python integers one at a time instead.
+            converted = [self.apply(amount) for amount in amounts.tolist()]
+            if max(map(abs, converted)) > INT64_MAX:
+                raise AmountOutOfRangeError
+            return np.array(converted, dtype=np.int64)
+
+        quotient, remainder = _floor_muldiv(amounts, self.numerator, self.divisor)
+        return _round_quotient(quotient, remainder, self.divisor, self.rounding)
+
+
+@lru_cache(maxsize=4096)
+def conversion(rate: float, base_digits: int, target_digits: int,
+               rounding: str = settings.MONEY_ROUNDING) -> Conversion:
+    # Conversions are immutable, and the same few rates serve most requests.
+    return Conversion(rate, base_digits, target_digits, rounding)
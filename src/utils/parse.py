@@ -1,7 +1,57 @@
+import json
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Any
 from urllib.parse import parse_qs
 
+from src.utils.exceptions import InvalidBatchError, InvalidTimestampError
+
 def parse_query(query):
     qr = parse_qs(query)
     query_dict = {k: qr[k][0] for k in qr}
 
     return query_dict
+
+def parse_batch(body: str) -> list[Any]:
+    body = body.strip()
+    if not body:
+        raise InvalidBatchError
+
+    # Decimals, so amounts reach the money arithmetic exactly as written.
+    try:
+        batch = json.loads(body, parse_float=Decimal)
+    except json.JSONDecodeError:
+        try:
+            batch = [json.loads(line, parse_float=Decimal) for line in body.splitlines() if line.strip()]
+        except json.JSONDecodeError:
+            raise InvalidBatchError
+
+    if isinstance(batch, dict):
+        batch = [batch]
+
+    if not isinstance(batch, list):
+        raise InvalidBatchError
+
+    return batch
+
+def parse_timestamp(value: str) -> int:
+    # Unix seconds, or an ISO 8601 date or date-time, UTC unless it carries
+    # an offset. A bare date means the end of that day, so it picks the last
+    # rate set on it.
+    value = value.strip()
+    try:
+        return int(value)
+    except ValueError:
+        pass
+
+    try:
+        if len(value) == 10:
+            moment = datetime.combine(date.fromisoformat(value), time.max, timezone.utc)
+        else:
+            moment = datetime.fromisoformat(value)
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise InvalidTimestampError
+
+    return int(moment.timestamp())
@@ -8,6 +8,7 @@ DB_DIR = SRC / "db"
 
 DB = DB_DIR / "currency_exchange.db"
 TABLES_CONFIG = DB_DIR / "tables_config.json"
+MIGRATIONS = DB_DIR / "migrations.json"
 
 
 
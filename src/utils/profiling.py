@@ -0,0 +1,183 @@
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Optional
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+from src.dto.profiles import ProfileCaptureDTO, StatementDTO
+from src.utils import settings
+
+REQUESTED = "requested"
+SAMPLED = "sampled"
+
+CALL_TREE_MAX_DEPTH = 30
+CALL_TREE_MAX_CHILDREN = 15
+# Calls cheaper than this fraction of the request are left out of the tree.
+CALL_TREE_MIN_FRACTION = 0.01
+TOP_FUNCTIONS = 25
+
+Function = tuple[str, int, str]
+
+
+class CaptureStore:
+    # The most recent captures in memory and, with a directory, one JSON file
+    # per capture on disk.
+
+    def __init__(self, size: int, directory: Optional[Path] = None) -> None:
+        self._captures: deque[ProfileCaptureDTO] = deque(maxlen=size)
+        self._directory: Optional[Path] = directory
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def add(self, capture: ProfileCaptureDTO) -> None:
+        with self._lock:
+            self._captures.append(capture)
+
+        if self._directory is not None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            path = self._directory / f"profile-{os.getpid()}-{capture.id:06d}.json"
+            path.write_text(json.dumps(capture.tojson(), indent=1), encoding="utf-8")
+
+    def recent(self) -> list[ProfileCaptureDTO]:
+        with self._lock:
+            return list(reversed(self._captures))
+
+    def get(self, capture_id: int) -> Optional[ProfileCaptureDTO]:
+        with self._lock:
+            for capture in self._captures:
+                if capture.id == capture_id:
+                    return capture
+        return None
+
+
+CAPTURES = CaptureStore(settings.PROFILE_CAPTURES, settings.PROFILE_DIR)
+
+# cProfile cannot run in several threads at once on every Python version, so
+# one request is profiled at a time and the others simply run unprofiled.
+_profiler_lock = threading.Lock()
+_local = threading.local()
+
+
+def _truthy(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def profile_reason(headers: Mapping[str, str], urlpath: str) -> tuple[Optional[str], str]:
+    # Returns why this request should be profiled, if at all, and the path
+    # with the profiling query flag removed so handlers never see it.
+    if not settings.PROFILING:
+        return None, urlpath
+
+    requested = _truthy(headers.get(settings.PROFILE_HEADER, ""))
+
+    if settings.PROFILE_QUERY_FLAG in urlpath:
+        path = urlparse(urlpath)
+        query = parse_qsl(path.query, keep_blank_values=True)
+        remaining = [(key, value) for key, value in query if key != settings.PROFILE_QUERY_FLAG]
+        if len(remaining) != len(query):
+            # Removed whatever its value, but only a true one asks for a profile.
+            requested = requested or any(_truthy(value) for key, value in query
+                                         if key == settings.PROFILE_QUERY_FLAG)
+            urlpath = path.path + (f"?{urlencode(remaining)}" if remaining else "")
+
+    if requested:
+        return REQUESTED, urlpath
+    if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return SAMPLED, urlpath
+
+    return None, urlpath
+
+
+def record_statement(sql: str, params: Optional[list[Any]], seconds: float) -> None:
+    capture: Optional[ProfileCaptureDTO] = getattr(_local, "capture", None)
+    if capture is not None:
+        capture.statements.append(StatementDTO(" ".join(sql.split()), list(params or []), seconds))
+
+
+@contextmanager
+def profile_request(method: str, urlpath: str,
+                    reason: Optional[str]) -> Iterator[Optional[ProfileCaptureDTO]]:
+    if reason is None or not _profiler_lock.acquire(blocking=False):
+        yield None
+        return
+
+    capture = ProfileCaptureDTO(CAPTURES.next_id(), time.time(), method, urlpath, reason)
+    _local.capture = capture
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        capture.seconds = time.perf_counter() - started
+        _local.capture = None
+        _profiler_lock.release()
+
+        # Explicitly requested profiles are always kept, sampled ones only
+        # when they turn out slow.
+        if reason == REQUESTED or capture.seconds * 1000 >= settings.PROFILE_SLOW_MS:
+            stats = pstats.Stats(profiler).stats
+            capture.call_tree = _call_tree(stats, capture.seconds)
+            capture.top_functions = _top_functions(stats)
+            CAPTURES.add(capture)
+
+
+def _label(function: Function) -> str:
+    filename, line, name = function
+    if filename == "~":
+        return name
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def _call_tree(stats: dict, total_seconds: float) -> list[dict]:
+    # pstats keeps, per function, the callers with the time spent per call
+    # edge; inverting that gives each function's callees.
+    callees: dict[Function, list[tuple[Function, int, float]]] = defaultdict(list)
+    roots: list[tuple[Function, int, float]] = []
+    for function, (_, calls, _, cumulative, callers) in stats.items():
+        if not callers:
+            roots.append((function, calls, cumulative))
+        for caller, edge in callers.items():
+            callees[caller].append((function, edge[1], edge[3]))
+
+    min_seconds = total_seconds * CALL_TREE_MIN_FRACTION
+
+    def node(function: Function, calls: int, seconds: float,
+             depth: int, path: frozenset) -> dict:
+        children: list[dict] = []
+        if depth < CALL_TREE_MAX_DEPTH:
+            ranked = sorted(callees.get(function, ()), key=lambda edge: -edge[2])
+            children = [node(callee, callee_calls, callee_seconds, depth + 1, path | {callee})
+                        for callee, callee_calls, callee_seconds in ranked[:CALL_TREE_MAX_CHILDREN]
+                        if callee_seconds >= min_seconds and callee not in path]
+
+        return {"function" : _label(function),
+                "calls" : calls,
+                "seconds" : seconds,
+                "children" : children}
+
+    return [node(function, calls, seconds, 0, frozenset({function}))
+            for function, calls, seconds in sorted(roots, key=lambda root: -root[2])
+            if seconds >= min_seconds]
+
+
+def _top_functions(stats: dict) -> list[dict]:
+    ranked = sorted(stats.items(), key=lambda item: -item[1][2])[:TOP_FUNCTIONS]
+    return [{"function" : _label(function),
+             "calls" : calls,
+             "ownSeconds" : own_seconds,
+             "seconds" : cumulative}
+            for function, (_, calls, own_seconds, cumulative, _) in ranked]
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from src.utils.exceptions import InvalidPathError
+
+Converter = Callable[[str], Any]
+
+
+def split_path(path: str) -> list[str]:
+    return [i for i in path.split("/") if i.strip()]
+
+
+@dataclass(frozen=True)
+class PathParam:
+    name: str
+    converter: Converter
+
+
+@dataclass(frozen=True)
+class Route:
+    method: str
+    pattern: str
+    segments: tuple[str | PathParam, ...]
+    handler: Callable[..., Any]
+    # Whether a GET response depends on the path and the data alone, so the
+    # data version can serve as its ETag.
+    cacheable: bool = True
+
+    def match(self, segments: list[str]) -> Optional[dict[str, Any]]:
+        params: dict[str, Any] = {}
+        for segment, expected in zip(segments, self.segments):
+            if isinstance(expected, PathParam):
+                params[expected.name] = segment
+            elif segment != expected:
+                return None
+
+        for expected in self.segments:
+            if isinstance(expected, PathParam):
+                try:
+                    params[expected.name] = expected.converter(params[expected.name])
+                except ValueError:
+                    # "{id:int}" given "abc" is a different path, not a crash.
+                    return None
+
+        return params
+
+
+class Router:
+    # Patterns are compiled once into routes bucketed by method, segment count
+    # and literal first segment, so dispatch checks only the few routes that
+    # can possibly match. "{name}" and "{name:type}" segments are parameters.
+
+    def __init__(self, converters: Optional[dict[str, Converter]] = None) -> None:
+        self._converters: dict[str, Converter] = {"str": str, "int": int}
+        self._converters.update(converters or {})
+        self._routes: dict[tuple[str, int, Optional[str]], list[Route]] = {}
+
+    def add(self, method: str, pattern: str, handler: Callable[..., Any],
+            cacheable: bool = True) -> Route:
+        segments = tuple(self._compile_segment(segment) for segment in split_path(pattern))
+        route = Route(method, pattern, segments, handler, cacheable)
+
+        first = segments[0] if segments and isinstance(segments[0], str) else None
+        self._routes.setdefault((method, len(segments), first), []).append(route)
+
+        return route
+
+    def _compile_segment(self, segment: str) -> str | PathParam:
+        if not (segment.startswith("{") and segment.endswith("}")):
+            return segment
+
+        name, _, type_name = segment[1:-1].partition(":")
+        converter = self._converters.get(type_name or "str")
+        if converter is None:
+            raise ValueError(f"unknown path parameter type {type_name!r}")
+
+        return PathParam(name, converter)
+
+    def resolve(self, method: str, path: str) -> tuple[Route, dict[str, Any]]:
+        segments = split_path(path)
+        size = len(segments)
+        first = segments[0] if segments else None
+
+        for key in ((method, size, first), (method, size, None)):
+            for route in self._routes.get(key, ()):
+                params = route.match(segments)
+                if params is not None:
+                    return route, params
+
+        raise InvalidPathError
+
+    def __len__(self) -> int:
+        return sum(len(routes) for routes in self._routes.values())
@@ -0,0 +1,81 @@
+import json
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+from src.utils import settings
+
+
+class Serializer(ABC):
+    name: str
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        pass
+
+    def dumps_decimal(self, value: Decimal) -> bytes:
+        # An exact JSON number, written the same way by every backend: none
+        # of them can emit a Decimal without going through float or a string.
+        return format(value, "f").encode("ascii")
+
+
+class StdlibSerializer(Serializer):
+    name = "json"
+
+    def __init__(self) -> None:
+        # Same compact, UTF-8 output as the optional backends, so encoded
+        # fragments look alike whichever backend produced them.
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encode(obj).encode("utf-8")
+
+
+class OrjsonSerializer(Serializer):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self._dumps = orjson.dumps
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj)
+
+
+class MsgspecSerializer(Serializer):
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+        self._encode = msgspec.json.encode
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encode(obj)
+
+
+# In order of preference for "auto".
+SERIALIZERS: dict[str, type[Serializer]] = {
+    serializer_class.name: serializer_class
+    for serializer_class in (OrjsonSerializer, MsgspecSerializer, StdlibSerializer)
+}
+
+
+@lru_cache(maxsize=None)
+def get_serializer(name: str = settings.JSON_SERIALIZER) -> Serializer:
+    # "auto" picks the first backend that can be imported; naming a backend
+    # that is not installed is an error rather than a silent fallback.
+    if name != "auto":
+        try:
+            return SERIALIZERS[name]()
+        except KeyError:
+            raise ValueError(f"unknown JSON serializer {name!r}, "
+                             f"expected auto or one of {', '.join(SERIALIZERS)}")
+
+    for serializer_class in SERIALIZERS.values():
+        try:
+            return serializer_class()
+        except ImportError:
+            continue
+
+    return StdlibSerializer()
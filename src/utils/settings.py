@@ -0,0 +1,123 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from src.utils.paths import DB
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int_map(name: str) -> dict[str, int]:
+    # "BTC:8,XAU:4" -> {"BTC": 8, "XAU": 4}
+    mapping = {}
+    for item in os.environ.get(name, "").split(","):
+        key, _, value = item.partition(":")
+        if key.strip():
+            mapping[key.strip()] = int(value)
+    return mapping
+
+
+HOST: str = os.environ.get("CURRENCIES_HOST", "")
+PORT: int = int(os.environ.get("CURRENCIES_PORT", 8000))
+
+WORKERS: int = int(os.environ.get("CURRENCIES_WORKERS", 16))
+KEEP_ALIVE_TIMEOUT: float = float(os.environ.get("CURRENCIES_KEEP_ALIVE_TIMEOUT", 15))
+KEEP_ALIVE_MAX_REQUESTS: int = int(os.environ.get("CURRENCIES_KEEP_ALIVE_MAX_REQUESTS", 1000))
+ACCESS_LOG: bool = _env_bool("CURRENCIES_ACCESS_LOG", True)
+
+DB_PATH: Path = Path(os.environ.get("CURRENCIES_DB", DB))
+DB_POOL_SIZE: int = int(os.environ.get("CURRENCIES_DB_POOL_SIZE", 16))
+DB_POOL_TIMEOUT: float = float(os.environ.get("CURRENCIES_DB_POOL_TIMEOUT", 5))
+DB_JOURNAL_MODE: str = os.environ.get("CURRENCIES_DB_JOURNAL_MODE", "WAL")
+
+CACHE_TTL: Optional[float] = float(os.environ["CURRENCIES_CACHE_TTL"]) \
+    if os.environ.get("CURRENCIES_CACHE_TTL") else None
+
+EXCHANGE_MAX_HOPS: int = int(os.environ.get("CURRENCIES_EXCHANGE_MAX_HOPS", 2))
+EXCHANGE_STRATEGY: str = os.environ.get("CURRENCIES_EXCHANGE_STRATEGY", "fewest_hops")
+# Routes between currency pairs memoized by the rate graph.
+EXCHANGE_ROUTE_CACHE_ENTRIES: int = int(os.environ.get("CURRENCIES_EXCHANGE_ROUTE_CACHE_ENTRIES", 10_000))
+# The cross-rate matrix is dense, size squared floats.
+EXCHANGE_MATRIX_MAX_CURRENCIES: int = int(os.environ.get("CURRENCIES_EXCHANGE_MATRIX_MAX_CURRENCIES", 2000))
+# Pairs whose rate history is held in memory for point-in-time lookups.
+RATE_HISTORY_CACHE_PAIRS: int = int(os.environ.get("CURRENCIES_RATE_HISTORY_CACHE_PAIRS", 1000))
+EXCHANGE_BATCH_MAX_ITEMS: int = int(os.environ.get("CURRENCIES_EXCHANGE_BATCH_MAX_ITEMS", 100_000))
+WARM_CACHES: bool = _env_bool("CURRENCIES_WARM_CACHES", True)
+
+# Fixed-point money. Amounts are integers in each currency's minor units
+# (ISO 4217 exponents, overridden per code with "BTC:8,XAU:4"); rates are
+# taken as the exact decimal they print as. Rounding: "half_even",
+# "half_up", "half_down", "up", "down", "ceiling" or "floor".
+MONEY_ROUNDING: str = os.environ.get("CURRENCIES_MONEY_ROUNDING", "half_even")
+MONEY_MINOR_UNITS: dict[str, int] = _env_int_map("CURRENCIES_MONEY_MINOR_UNITS")
+
+# Background rate ingestion: "" (off), "directory", "http" or "generated".
+INGEST_SOURCE: str = os.environ.get("CURRENCIES_INGEST_SOURCE", "")
+INGEST_DIRECTORY: Path = Path(os.environ.get("CURRENCIES_INGEST_DIRECTORY", "rates-inbox"))
+INGEST_URL: str = os.environ.get("CURRENCIES_INGEST_URL", "http://127.0.0.1:9000/rates")
+INGEST_POLL_INTERVAL: float = float(os.environ.get("CURRENCIES_INGEST_POLL_INTERVAL", 1.0))
+INGEST_GENERATED_RATE: float = float(os.environ.get("CURRENCIES_INGEST_GENERATED_RATE", 100))
+INGEST_BATCH_SIZE: int = int(os.environ.get("CURRENCIES_INGEST_BATCH_SIZE", 5000))
+INGEST_FLUSH_INTERVAL: float = float(os.environ.get("CURRENCIES_INGEST_FLUSH_INTERVAL", 0.25))
+
+# Server-Sent Events at /exchangeRates/stream.
+STREAM_CLIENT_BUFFER: int = int(os.environ.get("CURRENCIES_STREAM_CLIENT_BUFFER", 256 * 1024))
+STREAM_HEARTBEAT: float = float(os.environ.get("CURRENCIES_STREAM_HEARTBEAT", 15))
+STREAM_REPLAY_EVENTS: int = int(os.environ.get("CURRENCIES_STREAM_REPLAY_EVENTS", 10_000))
+STREAM_RETRY_MS: int = int(os.environ.get("CURRENCIES_STREAM_RETRY_MS", 3000))
+
+# Multi-process serving. PROCESSES > 1 starts a supervisor that runs that
+# many worker processes on the same port (SO_REUSEPORT). Workers share the
+# currencies and rates through snapshot files in a run directory and
+# report their health to it. The supervisor sets RUN_DIR, WORKER_SLOT and
+# WORKER_INDEX for the workers it starts; a set RUN_DIR makes a worker.
+PROCESSES: int = int(os.environ.get("CURRENCIES_PROCESSES", 1))
+RUN_DIR: Optional[Path] = Path(os.environ["CURRENCIES_RUN_DIR"]) \
+    if os.environ.get("CURRENCIES_RUN_DIR") else None
+WORKER_SLOT: int = int(os.environ.get("CURRENCIES_WORKER_SLOT", 0))
+# Workers with index 0 run background ingestion; there is one per server.
+WORKER_INDEX: int = int(os.environ.get("CURRENCIES_WORKER_INDEX", 0))
+SNAPSHOT: bool = _env_bool("CURRENCIES_SNAPSHOT", True)
+SNAPSHOT_POLL_INTERVAL: float = float(os.environ.get("CURRENCIES_SNAPSHOT_POLL_INTERVAL", 0.1))
+WORKER_HEARTBEAT: float = float(os.environ.get("CURRENCIES_WORKER_HEARTBEAT", 1.0))
+WORKER_TIMEOUT: float = float(os.environ.get("CURRENCIES_WORKER_TIMEOUT", 10))
+WORKER_START_TIMEOUT: float = float(os.environ.get("CURRENCIES_WORKER_START_TIMEOUT", 30))
+WORKER_SHUTDOWN_TIMEOUT: float = float(os.environ.get("CURRENCIES_WORKER_SHUTDOWN_TIMEOUT", 30))
+
+IMPORT_CHUNK_SIZE: int = int(os.environ.get("CURRENCIES_IMPORT_CHUNK_SIZE", 5000))
+# How often a server without a snapshot publisher checks SQLite for commits
+# by other processes, e.g. bulk imports; 0 turns the check off.
+DB_WATCH_INTERVAL: float = float(os.environ.get("CURRENCIES_DB_WATCH_INTERVAL", 1.0))
+
+DB_FETCH_SIZE: int = int(os.environ.get("CURRENCIES_DB_FETCH_SIZE", 1000))
+CACHE_COLLECTION_MAX_ROWS: int = int(os.environ.get("CURRENCIES_CACHE_COLLECTION_MAX_ROWS", 10_000))
+STREAM_CHUNK_SIZE: int = int(os.environ.get("CURRENCIES_STREAM_CHUNK_SIZE", 64 * 1024))
+
+PAGE_DEFAULT_LIMIT: int = int(os.environ.get("CURRENCIES_PAGE_DEFAULT_LIMIT", 100))
+PAGE_MAX_LIMIT: int = int(os.environ.get("CURRENCIES_PAGE_MAX_LIMIT", 1000))
+
+JSON_SERIALIZER: str = os.environ.get("CURRENCIES_JSON_SERIALIZER", "auto")
+
+HTTP_CACHE_CONTROL: str = os.environ.get("CURRENCIES_HTTP_CACHE_CONTROL", "no-cache")
+
+COMPRESSION: bool = _env_bool("CURRENCIES_COMPRESSION", True)
+COMPRESSION_MIN_SIZE: int = int(os.environ.get("CURRENCIES_COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL: int = int(os.environ.get("CURRENCIES_COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY: int = int(os.environ.get("CURRENCIES_COMPRESSION_BROTLI_QUALITY", 5))
+COMPRESSION_CACHE_ENTRIES: int = int(os.environ.get("CURRENCIES_COMPRESSION_CACHE_ENTRIES", 64))
+
+METRICS: bool = _env_bool("CURRENCIES_METRICS", True)
+
+PROFILING: bool = _env_bool("CURRENCIES_PROFILING", False)
+PROFILE_HEADER: str = os.environ.get("CURRENCIES_PROFILE_HEADER", "X-Profile")
+PROFILE_QUERY_FLAG: str = os.environ.get("CURRENCIES_PROFILE_QUERY_FLAG", "_profile")
+PROFILE_SAMPLE_RATE: float = float(os.environ.get("CURRENCIES_PROFILE_SAMPLE_RATE", 0.0))
+PROFILE_SLOW_MS: float = float(os.environ.get("CURRENCIES_PROFILE_SLOW_MS", 100))
+PROFILE_CAPTURES: int = int(os.environ.get("CURRENCIES_PROFILE_CAPTURES", 50))
+PROFILE_DIR: Optional[Path] = Path(os.environ["CURRENCIES_PROFILE_DIR"]) \
+    if os.environ.get("CURRENCIES_PROFILE_DIR") else None
@@ -0,0 +1,9 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Settings read the environment when src is first imported: point them at a
+# database of their own, which DBManager creates, and keep the background
+# database watch out of the tests.
+os.environ["CURRENCIES_DB"] = str(Path(tempfile.mkdtemp()) / "currencies.db")
+os.environ["CURRENCIES_DB_WATCH_INTERVAL"] = "0"
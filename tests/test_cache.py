@@ -0,0 +1,81 @@
+import pytest
+
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.utils.cache import NOT_CACHED, Cache
+
+
+def test_get_and_set():
+    cache = Cache("test_get_and_set")
+    assert cache.get("a") is NOT_CACHED
+    assert cache.get("a", None) is None
+    assert cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 2, 1)
+
+
+def test_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.cache.time.monotonic", lambda: now[0])
+    cache = Cache("test_ttl", ttl=10)
+    cache.set("a", 1)
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is NOT_CACHED
+
+
+def test_least_recently_used_is_evicted():
+    cache = Cache("test_lru", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is NOT_CACHED
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_a_load_racing_an_invalidation_is_dropped():
+    cache = Cache("test_race")
+    version = cache.version
+    # The value is loaded here, while another thread writes and invalidates.
+    cache.invalidate("a")
+    assert not cache.set("a", "stale", version)
+    assert cache.get("a") is NOT_CACHED
+    assert cache.set("a", "fresh", cache.version)
+
+
+def test_invalidate_one_or_all():
+    cache = Cache("test_invalidate")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert (cache.get("a"), cache.get("b")) == (NOT_CACHED, 2)
+    cache.invalidate()
+    assert cache.get("b") is NOT_CACHED
+
+
+@pytest.fixture(scope="module")
+def services():
+    currencies = CurrenciesService()
+    for code in ("WTA", "WTB"):
+        currencies.add(f"Write-through {code}", code, "W")
+    return currencies, ExchangeRatesService()
+
+
+def test_writes_go_through_the_caches(services):
+    currencies, exchange_rates = services
+    codes = {currency.code for currency in currencies.get_all().currencies}
+    assert "WTC" not in codes
+    currencies.add("Write-through WTC", "WTC", "W")
+    assert "WTC" in {currency.code for currency in currencies.get_all().currencies}
+
+    assert all(rate.baseCurrency.code != "WTA" for rate in exchange_rates.get_all())
+    exchange_rates.add("WTA", "WTB", 2.0)
+    assert exchange_rates.get_one("WTA", "WTB").rate == 2.0
+
+    base, target = currencies.get_one(currency_code="WTA"), currencies.get_one(currency_code="WTB")
+    exchange_rates.update_many([(base.id, target.id, 3.0)])
+    assert exchange_rates.get_one("WTA", "WTB").rate == 3.0
+    assert [rate.rate for rate in exchange_rates.get_all() if rate.baseCurrency.code == "WTA"] == [3.0]
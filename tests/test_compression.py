@@ -0,0 +1,56 @@
+import gzip
+
+import pytest
+
+from src.utils.compression import BrotliCodec, GzipCodec, available_codecs, negotiate
+
+GZIP = GzipCodec()
+
+
+@pytest.fixture(scope="module")
+def codecs():
+    brotli = pytest.importorskip("brotli")
+    return [BrotliCodec(), GZIP], brotli
+
+
+def name(codec):
+    return codec.name if codec is not None else None
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("*", "br"),
+    ("*;q=0.5, br;q=0", "gzip"),
+    ("deflate, compress", None),
+])
+def test_negotiate(codecs, accept_encoding, expected):
+    available, _ = codecs
+    assert name(negotiate(accept_encoding, available)) == expected
+
+
+def test_negotiate_without_codecs():
+    assert negotiate("gzip", []) is None
+
+
+def test_gzip_round_trip():
+    chunks = [b"[", b'{"code": "USD"}', b",", b'{"code": "EUR"}', b"]"]
+    assert gzip.decompress(GZIP.compress(chunks)) == b"".join(chunks)
+
+
+def test_brotli_round_trip(codecs):
+    (brotli_codec, _), brotli = codecs
+    chunks = [b"[", b'{"code": "USD"}' * 100, b"]"]
+    assert brotli.decompress(brotli_codec.compress(chunks)) == b"".join(chunks)
+
+
+def test_available_codecs_end_with_gzip():
+    assert available_codecs()[-1].name == "gzip"
@@ -0,0 +1,93 @@
+import gzip
+from typing import Optional
+
+import pytest
+
+from src.controller.controller import Controller, etag_matches
+from src.dto.httpresponse import HTTPResponseData
+from src.services.currencies_service import CurrenciesService
+from src.utils import settings
+
+
+@pytest.fixture(scope="module")
+def controller() -> Controller:
+    CurrenciesService().add("Controller test", "CTA", "C")
+    return Controller()
+
+
+def header(response: HTTPResponseData, keyword: str) -> Optional[str]:
+    for item in response.headers:
+        if item.keyword == keyword:
+            return item.value
+    return None
+
+
+def body(response: HTTPResponseData) -> bytes:
+    return b"".join(response.body) if response.body is not None else response.message
+
+
+@pytest.mark.parametrize("if_none_match, wildcard, expected", [
+    ('"1-2"', True, True),
+    ('W/"1-2"', True, True),
+    ('"0-1", "1-2"', True, True),
+    ('"1-3"', True, False),
+    ("*", True, True),
+    ("*", False, False),
+])
+def test_etag_matches(if_none_match, wildcard, expected):
+    assert etag_matches(if_none_match, '"1-2"', wildcard) is expected
+
+
+def test_not_modified_skips_the_handler(controller, monkeypatch):
+    etag = header(controller.perform("GET", "/currency/CTA"), "ETag")
+    assert etag is not None
+
+    def handler(*args, **kwargs):
+        raise AssertionError("the handler ran")
+
+    monkeypatch.setattr(controller.dto_factory, "get", handler)
+    response = controller.perform("GET", "/currency/CTA", headers={"If-None-Match": etag})
+    assert response.code == 304
+    assert header(response, "ETag") == etag
+
+
+def test_wildcard_needs_an_existing_resource(controller):
+    assert controller.perform("GET", "/currency/CTA", headers={"If-None-Match": "*"}).code == 304
+    assert controller.perform("GET", "/currency/ZZZ", headers={"If-None-Match": "*"}).code == 404
+
+
+def test_uncacheable_routes_are_never_not_modified(controller):
+    etag = header(controller.perform("GET", "/currency/CTA"), "ETag")
+    response = controller.perform("GET", "/metrics", headers={"If-None-Match": etag})
+    assert response.code == 200
+    assert header(response, "ETag") is None
+    assert header(response, "Cache-Control") == "no-store"
+
+
+def test_a_write_retires_the_etag(controller):
+    etag = header(controller.perform("GET", "/currency/CTA"), "ETag")
+    CurrenciesService().add("Controller test", "CTB", "C")
+    response = controller.perform("GET", "/currency/CTA", headers={"If-None-Match": etag})
+    assert response.code == 200
+    assert header(response, "ETag") != etag
+
+
+def test_small_bodies_keep_the_plain_etag(controller, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 10**6)
+    response = controller.perform("GET", "/currencies", headers={"Accept-Encoding": "gzip"})
+    assert header(response, "Content-Encoding") is None
+    assert not header(response, "ETag").endswith('-gzip"')
+
+
+def test_compressed_bodies_carry_the_codec_in_the_etag(controller, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_MIN_SIZE", 1)
+    response = controller.perform("GET", "/currencies", headers={"Accept-Encoding": "gzip"})
+    assert header(response, "Content-Encoding") == "gzip"
+    etag = header(response, "ETag")
+    assert etag.endswith('-gzip"')
+    assert b'"CTA"' in gzip.decompress(body(response))
+
+    # The cached compressed body answers the same tag with a 304.
+    response = controller.perform("GET", "/currencies",
+                                  headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.code == 304
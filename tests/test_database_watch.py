@@ -0,0 +1,42 @@
+import sqlite3
+
+import pytest
+
+from src.model.dbmanager import DBManager
+from src.services.currencies_service import CurrenciesService
+from src.services.database_watch_service import DatabaseWatchService
+from src.utils import settings
+
+
+@pytest.fixture
+def watch(monkeypatch):
+    # The test calls check() itself; the thread only idles.
+    monkeypatch.setattr(settings, "DB_WATCH_INTERVAL", 3600)
+    service = DatabaseWatchService()
+    service.start()
+    yield service
+    service.stop()
+
+
+def codes() -> set[str]:
+    return {currency.code for currency in CurrenciesService().get_all().currencies}
+
+
+def test_own_commits_are_not_foreign(watch):
+    CurrenciesService().add("Watch own", "WOA", "W")
+    assert not watch.check()
+
+
+def test_another_connection_is_noticed(watch):
+    assert "WFA" not in codes()
+    generation = DBManager().generation
+
+    # As a src.bulk_import run in another process would write.
+    with sqlite3.connect(settings.DB_PATH) as connection:
+        connection.execute("insert into Currencies (Code, FullName, Sign) values ('WFA', 'Watch foreign', 'W')")
+    connection.close()
+
+    assert watch.check()
+    assert "WFA" in codes()
+    assert DBManager().generation > generation
+    assert not watch.check()
@@ -0,0 +1,62 @@
+import select
+import socket
+
+import pytest
+
+from src.controller.event_stream import EventStream
+from src.services.rate_stream_service import RateEvent, RateStreamService
+
+
+class RacingSocket:
+    # Stands in for the wakeup reader: the first recv lets another thread's
+    # wakeup land just before the selector thread reads the socket.
+    def __init__(self, sock: socket.socket, race) -> None:
+        self._sock = sock
+        self._race = race
+
+    def recv(self, size: int) -> bytes:
+        race, self._race = self._race, None
+        if race is not None:
+            race()
+        return self._sock.recv(size)
+
+
+@pytest.fixture
+def stream():
+    # Not started: the test plays the selector thread itself.
+    stream = EventStream(RateStreamService())
+    yield stream
+    stream._wakeup_reader.close()
+    stream._wakeup_writer.close()
+
+
+def readable(sock: socket.socket) -> bool:
+    return bool(select.select([sock], [], [], 0)[0])
+
+
+def event(seq: int) -> RateEvent:
+    return RateEvent(seq, (), b"id: %d\nevent: rate\ndata: {}\n\n" % seq)
+
+
+def test_wakeup_during_drain_is_not_lost(stream, monkeypatch):
+    reader = stream._wakeup_reader
+    stream._on_events([event(1)])
+    assert readable(reader)
+
+    monkeypatch.setattr(stream, "_wakeup_reader",
+                        RacingSocket(reader, lambda: stream._on_events([event(2)])))
+    stream._drain_wakeup()
+    stream._process_inbox()
+
+    assert not stream._inbox
+    assert not stream._wakeup_pending
+
+    # The next event still wakes the selector thread.
+    stream._on_events([event(3)])
+    assert readable(reader)
+
+
+def test_one_wakeup_byte_per_drain(stream):
+    for seq in range(1, 4):
+        stream._on_events([event(seq)])
+    assert stream._wakeup_reader.recv(4096) == b"\0"
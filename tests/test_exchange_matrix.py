@@ -0,0 +1,44 @@
+import pytest
+
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_matrix_service import ExchangeMatrixService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.services.exchange_service import ExchangeService
+
+
+@pytest.fixture(scope="module")
+def matrix_service() -> ExchangeMatrixService:
+    currencies = CurrenciesService()
+    for code in ("MXA", "MXB", "MXC"):
+        currencies.add(f"Matrix {code}", code, "M")
+    exchange_rates = ExchangeRatesService()
+    exchange_rates.add("MXA", "MXB", 2.0)
+    exchange_rates.add("MXB", "MXC", 4.0)
+    return ExchangeMatrixService()
+
+
+def test_matrix_quotes_what_exchange_converts_with(matrix_service):
+    exchange_service = ExchangeService()
+    currencies = CurrenciesService().get_all().currencies
+    for base in currencies:
+        for target in currencies:
+            if base.id != target.id:
+                assert (matrix_service.get_rate(base.code, target.code)
+                        == exchange_service.get_rate(base.id, target.id)), (base.code, target.code)
+
+    assert matrix_service.get_rate("MXA", "MXC") == 8.0
+    assert matrix_service.get_rate("MXC", "MXA") == pytest.approx(0.125)
+
+
+def test_a_new_currency_rebuilds_the_matrix(matrix_service):
+    matrix = matrix_service.get_matrix()
+    assert matrix_service.get_matrix() is matrix
+
+    CurrenciesService().add("Matrix MXD", "MXD", "M")
+    assert "MXD" in matrix_service.get_matrix().index
+    assert matrix_service.get_rate("MXA", "MXD") is None
+
+
+def test_a_rate_write_rebuilds_the_matrix(matrix_service):
+    ExchangeRatesService().add("MXC", "MXD", 0.5)
+    assert matrix_service.get_rate("MXB", "MXD") == 2.0
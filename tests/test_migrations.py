@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from src.db.config_loader import load_migrations, load_tables_config
+from src.db.table_config import Migration
+from src.model.dbmanager import apply_migrations
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = sqlite3.connect(tmp_path / "migrations.db")
+    for table_config in load_tables_config():
+        connection.execute(f"create table {table_config.name} ({table_config.columns_data})")
+    connection.executemany("insert into Currencies (Code, FullName, Sign) values (?, ?, ?)",
+                           [("EUR", "Euro", "€"), ("USD", "United States dollar", "$")])
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def user_version(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_migrations_are_loaded_in_version_order():
+    versions = [migration.version for migration in load_migrations()]
+    assert versions == sorted(versions)
+    assert len(set(versions)) == len(versions)
+
+
+def test_applied_in_order_and_only_once(connection):
+    migrations = [Migration(1, "first", ["create table Log (Entry text)",
+                                         "insert into Log values ('first')"]),
+                  Migration(2, "second", ["insert into Log values ('second')"])]
+
+    assert apply_migrations(connection, migrations) == [1, 2]
+    assert apply_migrations(connection, migrations) == []
+    assert user_version(connection) == 2
+    assert [row[0] for row in connection.execute("select Entry from Log")] == ["first", "second"]
+
+
+def test_a_failed_migration_leaves_the_schema_untouched(connection):
+    migrations = [Migration(1, "first", ["create table Log (Entry text)"]),
+                  Migration(2, "broken", ["create table Other (Entry text)", "not sql"])]
+
+    with pytest.raises(sqlite3.Error):
+        apply_migrations(connection, migrations)
+
+    assert user_version(connection) == 1
+    tables = {row[0] for row in connection.execute("select name from sqlite_master where type = 'table'")}
+    assert "Log" in tables and "Other" not in tables
+
+
+def test_repo_migrations(connection):
+    applied = apply_migrations(connection, load_migrations())
+    assert applied == [migration.version for migration in load_migrations()]
+    assert user_version(connection) == applied[-1]
+
+    # Writes to ExchangeRates are recorded in the history.
+    connection.execute("insert into ExchangeRates (BaseCurrencyID, TargetCurrencyID, Rate) values (1, 2, 1.1)")
+    connection.execute("update ExchangeRates set Rate = 1.2")
+    history = connection.execute("select BaseCurrencyID, TargetCurrencyID, Rate from ExchangeRateHistory "
+                                 "order by ValidFrom desc limit 1")
+    assert history.fetchone() == (1, 2, 1.2)
+
+
+def test_duplicate_pairs_are_reported(connection, capsys):
+    connection.executemany("insert into ExchangeRates (BaseCurrencyID, TargetCurrencyID, Rate) values (?, ?, ?)",
+                           [(1, 2, 1.0), (1, 2, 1.1), (1, 2, 1.2), (2, 1, 0.9)])
+    connection.commit()
+
+    apply_migrations(connection, load_migrations()[:1])
+
+    rates = connection.execute("select BaseCurrencyID, TargetCurrencyID, Rate from ExchangeRates order by ID")
+    assert rates.fetchall() == [(1, 2, 1.2), (2, 1, 0.9)]
+    err = capsys.readouterr().err
+    assert "migration 1" in err and "deleted 2 rows" in err
@@ -0,0 +1,95 @@
+import itertools
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from src.utils import money
+from src.utils.exceptions import InvalidAmountError
+
+ROUNDINGS = [money.HALF_EVEN, money.HALF_UP, money.HALF_DOWN,
+             money.UP, money.DOWN, money.CEILING, money.FLOOR]
+
+
+def decimal_round(numerator: int, divisor: int, rounding: str) -> int:
+    return int((Decimal(numerator) / Decimal(divisor)).to_integral_value(
+        rounding=money._DECIMAL_ROUNDING[rounding]))
+
+
+@pytest.mark.parametrize("rounding", ROUNDINGS)
+def test_round_quotient_matches_decimal(rounding):
+    # Every remainder of a small divisor, ties included, on both signs.
+    divisor = 10
+    for numerator in range(-45, 46):
+        quotient, remainder = divmod(numerator, divisor)
+        assert (money._round_quotient(quotient, remainder, divisor, rounding)
+                == decimal_round(numerator, divisor, rounding)), numerator
+
+
+@pytest.mark.parametrize("rounding", ROUNDINGS)
+def test_round_quotient_on_arrays(rounding):
+    numerators = np.arange(-45, 46, dtype=np.int64)
+    quotient, remainder = np.divmod(numerators, 10)
+    rounded = money._round_quotient(quotient, remainder, 10, rounding)
+    assert rounded.tolist() == [decimal_round(n, 10, rounding) for n in numerators.tolist()]
+
+
+@pytest.mark.parametrize("numerator, divisor", [(7, 10), (123_456_789, 10**6),
+                                                (3_333_333_333_333_333, 10**16), (5, 10**12)])
+def test_floor_muldiv_is_exact(numerator, divisor):
+    rng = random.Random(0)
+    amounts = [0, 1, -1, 10**12, -(10**12)] + [rng.randint(-10**12, 10**12) for _ in range(200)]
+    quotient, remainder = money._floor_muldiv(np.array(amounts, dtype=np.int64), numerator, divisor)
+    expected = [divmod(amount * numerator, divisor) for amount in amounts]
+    assert list(zip(quotient.tolist(), remainder.tolist())) == expected
+
+
+@pytest.mark.parametrize("rate, rounding", list(itertools.product([0.5, 1 / 3, 4e-10, 92.1234, 200.0],
+                                                                  ROUNDINGS)))
+def test_apply_array_matches_apply(rate, rounding):
+    conversion = money.Conversion(rate, 2, 2, rounding)
+    rng = random.Random(1)
+    amounts = [0, 1, -1, 5, -5, 50, -50] + [rng.randint(-10**9, 10**9) for _ in range(200)]
+    converted = conversion.apply_array(np.array(amounts, dtype=np.int64))
+    assert converted.tolist() == [conversion.apply(amount) for amount in amounts]
+
+
+def test_apply_array_falls_back_near_int64():
+    conversion = money.Conversion(1 / 3, 2, 2)
+    amounts = [money.INT64_MAX // 2, -(money.INT64_MAX // 2)]
+    converted = conversion.apply_array(np.array(amounts, dtype=np.int64))
+    assert converted.tolist() == [conversion.apply(amount) for amount in amounts]
+
+
+def test_conversion_across_minor_units():
+    # 1.50 of a 2-digit currency at 150 is 225 of a 0-digit one.
+    assert money.Conversion(150.0, 2, 0).apply(150) == 225
+    # 225 of a 0-digit currency at 1/150 is 1.50, rounded once.
+    assert money.Conversion(1 / 150, 0, 2).apply(225) == 150
+
+
+@pytest.mark.parametrize("rate, fixed", [(4e-10, (4, 10)), (1 / 3, (3333333333333333, 16)),
+                                         (2e20, (2, -20)), (0.5, (5, 1)), (25.0, (250, 1))])
+def test_rate_to_fixed(rate, fixed):
+    assert money.rate_to_fixed(rate) == fixed
+
+
+@pytest.mark.parametrize("rate", [0.0, -1.0, float("inf"), float("nan")])
+def test_rate_to_fixed_rejects(rate):
+    with pytest.raises(ValueError):
+        money.rate_to_fixed(rate)
+
+
+def test_parse_amount():
+    assert money.parse_amount(0.1) == Decimal("0.1")
+    assert money.parse_amount("10.005") == Decimal("10.005")
+    for value in (True, "abc", "nan", "inf", None):
+        with pytest.raises(InvalidAmountError):
+            money.parse_amount(value)
+
+
+def test_minor_units():
+    assert money.minor_units("JPY") == 0
+    assert money.minor_units("KWD") == 3
+    assert money.minor_units("USD") == 2
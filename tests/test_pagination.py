@@ -0,0 +1,93 @@
+import pytest
+
+from src.controller.controller import parse_limit
+from src.services.currencies_service import CurrenciesService
+from src.services.exchange_rates_service import ExchangeRatesService
+from src.utils import settings
+from src.utils.cursor import decode_cursor, encode_cursor, take_page
+from src.utils.exceptions import InvalidCursorError, InvalidLimitError
+
+CODES = ["PGA", "PGB", "PGC", "PGD", "PGE"]
+
+
+@pytest.fixture(scope="module")
+def currencies() -> CurrenciesService:
+    service = CurrenciesService()
+    for code in CODES:
+        service.add(f"Paged {code}", code, "P")
+    return service
+
+
+@pytest.fixture(scope="module")
+def exchange_rates(currencies) -> ExchangeRatesService:
+    service = ExchangeRatesService()
+    for target in CODES[1:]:
+        service.add("PGA", target, 2.0)
+    service.add("PGB", "PGC", 3.0)
+    return service
+
+
+def test_cursor_round_trip():
+    for last_id in (0, 1, 12345, 2**40):
+        assert decode_cursor(encode_cursor(last_id)) == last_id
+
+
+@pytest.mark.parametrize("token", ["", "!!", "aWQ6", "aWQ6YWJj", "eDox"])
+def test_invalid_cursors(token):
+    # "aWQ6" is "id:", "aWQ6YWJj" is "id:abc" and "eDox" is "x:1".
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+def test_take_page():
+    items = iter([{"id": 3}, {"id": 5}, {"id": 8}])
+    page, cursor = take_page(items, 2, key=lambda item: item["id"])
+    assert page == [{"id": 3}, {"id": 5}]
+    assert decode_cursor(cursor) == 5
+
+    page, cursor = take_page(iter([{"id": 3}]), 2, key=lambda item: item["id"])
+    assert (page, cursor) == ([{"id": 3}], None)
+
+
+def test_take_page_closes_the_source():
+    closed = []
+
+    def rows():
+        try:
+            yield from range(1, 10)
+        finally:
+            closed.append(True)
+
+    take_page(rows(), 2, key=lambda item: item)
+    assert closed == [True]
+
+
+def test_parse_limit():
+    assert parse_limit({}) is None
+    assert parse_limit({"after": "x"}) == settings.PAGE_DEFAULT_LIMIT
+    assert parse_limit({"limit": "5"}) == 5
+    for limit in ("0", "-1", "abc", str(settings.PAGE_MAX_LIMIT + 1)):
+        with pytest.raises(InvalidLimitError):
+            parse_limit({"limit": limit})
+
+
+def test_currencies_pages(currencies):
+    codes, cursor = [], None
+    while True:
+        page = currencies.get_page(2, cursor, code_prefix="PG")
+        codes += [currency.code for currency in page.currencies]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert codes == CODES
+
+
+def test_exchange_rates_pages_with_filters(exchange_rates):
+    first = exchange_rates.get_page(3, base_currency_code="PGA")
+    assert [rate.targetCurrency.code for rate in first] == ["PGB", "PGC", "PGD"]
+    rest = exchange_rates.get_page(3, first.next_cursor, base_currency_code="PGA")
+    assert [rate.targetCurrency.code for rate in rest] == ["PGE"]
+    assert rest.next_cursor is None
+
+    by_target = exchange_rates.get_page(10, target_currency_code="PGC")
+    assert [rate.baseCurrency.code for rate in by_target] == ["PGA", "PGB"]
@@ -0,0 +1,132 @@
+import pytest
+
+from src.services.rate_graph import BEST_RATE, FEWEST_HOPS, RateGraph
+from src.utils.cache import Cache
+
+EUR, USD, GBP, JPY, CHF = 1, 2, 3, 4, 5
+
+
+def graph(rates, pivots=(), max_hops=2, strategy=FEWEST_HOPS, routes=None) -> RateGraph:
+    graph = RateGraph(max_hops=max_hops, strategy=strategy, routes=routes)
+    graph.load(rates, pivots)
+    return graph
+
+
+def path(graph: RateGraph, base_id: int, target_id: int) -> list[int]:
+    edges = graph.find_path(base_id, target_id)
+    return [edges[0].base_id] + [edge.target_id for edge in edges]
+
+
+def test_direct_and_inverse_rates():
+    rates = graph([(EUR, USD, 2.0)])
+    assert rates.rate(EUR, USD) == 2.0
+    assert rates.rate(USD, EUR) == 0.5
+    assert rates.rate(EUR, EUR) == 1.0
+    assert rates.rate(EUR, GBP) is None
+
+
+def test_explicit_reverse_rate_wins_over_the_inverse():
+    rates = graph([(EUR, USD, 2.0), (USD, EUR, 0.4)])
+    assert rates.rate(USD, EUR) == 0.4
+    # Loaded in the other order, the explicit rate still replaces the inverse.
+    rates = graph([(USD, EUR, 0.4), (EUR, USD, 2.0)])
+    assert rates.rate(USD, EUR) == 0.4
+    assert rates.rate(EUR, USD) == 2.0
+
+
+def test_fewest_hops_goes_through_pivots_first():
+    rates = [(EUR, GBP, 0.9), (GBP, JPY, 180.0), (EUR, USD, 1.1), (USD, JPY, 150.0)]
+    # Two routes of two hops: without pivots the first stored edge is taken.
+    assert path(graph(rates), EUR, JPY) == [EUR, GBP, JPY]
+    assert path(graph(rates, pivots=[USD]), EUR, JPY) == [EUR, USD, JPY]
+    assert graph(rates, pivots=[USD]).rate(EUR, JPY) == pytest.approx(165.0)
+
+
+def test_fewest_hops_prefers_a_direct_rate_over_the_pivot():
+    rates = graph([(EUR, USD, 1.1), (USD, JPY, 150.0), (EUR, JPY, 160.0)], pivots=[USD])
+    assert path(rates, EUR, JPY) == [EUR, JPY]
+
+
+def test_max_hops_bounds_the_route():
+    chain = [(EUR, USD, 2.0), (USD, GBP, 2.0), (GBP, JPY, 2.0)]
+    assert graph(chain, max_hops=2).rate(EUR, JPY) is None
+    assert graph(chain, max_hops=3).rate(EUR, JPY) == 8.0
+
+
+def test_best_rate_picks_the_largest_product():
+    rates = [(EUR, JPY, 160.0), (EUR, USD, 1.1), (USD, JPY, 150.0)]
+    assert path(graph(rates, strategy=FEWEST_HOPS), EUR, JPY) == [EUR, JPY]
+    assert path(graph(rates, strategy=BEST_RATE), EUR, JPY) == [EUR, USD, JPY]
+    assert graph(rates, strategy=BEST_RATE).rate(EUR, JPY) == pytest.approx(165.0)
+
+
+def test_best_rate_is_hop_bounded():
+    # The three-hop route is better, but only two hops are allowed.
+    rates = [(EUR, JPY, 100.0), (EUR, USD, 2.0), (USD, GBP, 2.0), (GBP, JPY, 100.0)]
+    assert path(graph(rates, strategy=BEST_RATE, max_hops=2), EUR, JPY) == [EUR, JPY]
+    assert path(graph(rates, strategy=BEST_RATE, max_hops=3), EUR, JPY) == [EUR, USD, GBP, JPY]
+
+
+def test_best_rate_does_not_loop_through_the_base():
+    # A profitable cycle back to EUR must not be taken.
+    rates = [(EUR, USD, 2.0), (USD, EUR, 1.0), (USD, JPY, 100.0)]
+    assert path(graph(rates, strategy=BEST_RATE, max_hops=4), EUR, JPY) == [EUR, USD, JPY]
+
+
+@pytest.mark.parametrize("strategy", [FEWEST_HOPS, BEST_RATE])
+def test_rates_from_agrees_with_rate(strategy):
+    rates = graph([(EUR, USD, 1.1), (USD, JPY, 150.0), (GBP, EUR, 1.2), (JPY, CHF, 0.006)],
+                  pivots=[USD], max_hops=3, strategy=strategy)
+    for base_id in (EUR, USD, GBP, JPY, CHF):
+        reached = rates.rates_from(base_id)
+        for target_id in (EUR, USD, GBP, JPY, CHF):
+            if target_id != base_id:
+                assert reached.get(target_id) == rates.rate(base_id, target_id)
+
+
+def test_memoized_routes_follow_changes():
+    routes = Cache("test_routes", 60, 100)
+    rates = graph([(EUR, USD, 2.0)], routes=routes)
+    assert rates.rate(EUR, USD) == 2.0
+    rates.add_rate(EUR, USD, 3.0)
+    assert rates.rate(EUR, USD) == 3.0
+    rates.add_rates([(USD, JPY, 100.0)])
+    assert rates.rate(EUR, JPY) == 300.0
+
+
+def test_updates_before_load_are_ignored():
+    rates = RateGraph()
+    rates.add_rate(EUR, USD, 2.0)
+    assert not rates.loaded
+    assert rates.rate(EUR, USD) is None
+
+
+@pytest.mark.parametrize("strategy", [FEWEST_HOPS, BEST_RATE])
+def test_rate_at_uses_the_resolved_rates(strategy):
+    current = graph([(EUR, USD, 1.1), (USD, JPY, 150.0), (JPY, EUR, 0.006)],
+                    pivots=[USD], strategy=strategy)
+    past = {(EUR, USD): 1.2, (USD, JPY): 100.0}
+
+    def at(base_id, target_id):
+        return current.rate_at(base_id, target_id, lambda b, t: past.get((b, t)))
+
+    # JPY->EUR had no rate yet: neither it nor its inverse is an edge, and
+    # the routes go through USD instead.
+    assert at(EUR, JPY) == pytest.approx(120.0)
+    assert at(JPY, EUR) == pytest.approx(1 / 120.0)
+    assert at(JPY, USD) == pytest.approx(0.01)
+    assert at(EUR, EUR) == 1.0
+    # The current rates are untouched.
+    assert current.rate(EUR, JPY) == pytest.approx(1 / 0.006)
+
+
+def test_rate_at_falls_back_to_the_opposite_pair():
+    current = graph([(EUR, USD, 1.1), (USD, EUR, 0.9)])
+    past = {(EUR, USD): 1.25}
+    assert current.rate_at(USD, EUR, lambda b, t: past.get((b, t))) == pytest.approx(0.8)
+
+
+def test_rate_at_without_a_rate_at_the_time():
+    current = graph([(EUR, USD, 1.1)])
+    assert current.rate_at(EUR, USD, lambda b, t: None) is None
+    assert current.rate_at(USD, EUR, lambda b, t: None) is None
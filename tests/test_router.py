@@ -0,0 +1,71 @@
+import pytest
+
+from src.utils.exceptions import InvalidPathError
+from src.utils.router import Router, split_path
+
+
+def handler(*args, **kwargs):
+    return None
+
+
+@pytest.fixture
+def router() -> Router:
+    router = Router(converters={"upper": str.upper})
+    router.add("GET", "/currencies", handler)
+    router.add("GET", "/currency/{code}", handler)
+    router.add("GET", "/currency/{code:upper}/history", handler)
+    router.add("GET", "/admin/profiles/{capture_id:int}", handler, cacheable=False)
+    router.add("GET", "/{anything}/stats", handler)
+    router.add("POST", "/currencies", handler)
+    return router
+
+
+def test_split_path():
+    assert split_path("/currency//USD/") == ["currency", "USD"]
+    assert split_path("/") == []
+
+
+def test_literal_routes_by_method(router):
+    route, params = router.resolve("GET", "/currencies")
+    assert (route.method, route.pattern, params) == ("GET", "/currencies", {})
+    route, _ = router.resolve("POST", "/currencies/")
+    assert route.method == "POST"
+
+
+def test_parameters_are_converted(router):
+    assert router.resolve("GET", "/currency/usd")[1] == {"code": "usd"}
+    assert router.resolve("GET", "/currency/usd/history")[1] == {"code": "USD"}
+    assert router.resolve("GET", "/admin/profiles/42")[1] == {"capture_id": 42}
+
+
+def test_a_failed_conversion_is_no_match(router):
+    with pytest.raises(InvalidPathError):
+        router.resolve("GET", "/admin/profiles/abc")
+
+
+def test_parameter_first_segment_is_found_after_literals(router):
+    route, params = router.resolve("GET", "/rates/stats")
+    assert (route.pattern, params) == ("/{anything}/stats", {"anything": "rates"})
+    # A route with a matching literal first segment is tried first.
+    assert router.resolve("GET", "/currency/stats")[0].pattern == "/currency/{code}"
+
+
+@pytest.mark.parametrize("method, path", [("GET", "/currency"), ("GET", "/currency/usd/history/x"),
+                                          ("DELETE", "/currencies"), ("GET", "/")])
+def test_unknown_paths(router, method, path):
+    with pytest.raises(InvalidPathError):
+        router.resolve(method, path)
+
+
+def test_cacheable(router):
+    assert router.resolve("GET", "/currencies")[0].cacheable
+    assert not router.resolve("GET", "/admin/profiles/1")[0].cacheable
+
+
+def test_unknown_converter():
+    with pytest.raises(ValueError):
+        Router().add("GET", "/currency/{code:decimal}", handler)
+
+
+def test_len(router):
+    assert len(router) == 6
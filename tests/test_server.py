@@ -0,0 +1,93 @@
+import http.client
+import socket
+import threading
+
+import pytest
+
+from src.controller.HTTPRequestHandler import HTTPRequestHandler
+from src.controller.application import Application
+from src.controller.server import PooledHTTPServer
+from src.services.currencies_service import CurrenciesService
+from src.utils import settings
+
+
+@pytest.fixture(scope="module")
+def app() -> Application:
+    CurrenciesService().add("Server test", "SVA", "S")
+    return Application()
+
+
+@pytest.fixture
+def server(app):
+    # Two workers, so a test can occupy the whole pool.
+    httpd = PooledHTTPServer(("127.0.0.1", 0), HTTPRequestHandler, app, workers=2)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    thread.join()
+    httpd.server_close()
+
+
+def connect(server) -> http.client.HTTPConnection:
+    return http.client.HTTPConnection(*server.server_address, timeout=5)
+
+
+def get(connection: http.client.HTTPConnection, path: str) -> http.client.HTTPResponse:
+    connection.request("GET", path)
+    response = connection.getresponse()
+    response.read()
+    return response
+
+
+def test_requests_share_a_kept_alive_connection(server):
+    connection = connect(server)
+    try:
+        assert get(connection, "/currency/SVA").status == 200
+        sock = connection.sock
+        # A plain body, a chunked one and an error, all on the same socket.
+        assert get(connection, "/currencies").getheader("Transfer-Encoding") == "chunked"
+        assert get(connection, "/currency/ZZZ").status == 404
+        assert get(connection, "/currency/SVA").status == 200
+        assert connection.sock is sock
+    finally:
+        connection.close()
+
+
+def test_http_1_0_is_closed_after_the_response(server):
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(b"GET /currency/SVA HTTP/1.0\r\n\r\n")
+        received = b""
+        while chunk := sock.recv(65536):
+            received += chunk
+    assert received.startswith(b"HTTP/1.1 200")
+
+
+def test_connection_closes_after_max_requests(server, monkeypatch):
+    monkeypatch.setattr(settings, "KEEP_ALIVE_MAX_REQUESTS", 2)
+    connection = connect(server)
+    try:
+        assert get(connection, "/currency/SVA").getheader("Connection") is None
+        assert get(connection, "/currency/SVA").getheader("Connection") == "close"
+    finally:
+        connection.close()
+
+
+def test_the_worker_pool_is_bounded(server):
+    # Two idle kept-alive connections hold both workers.
+    held = [connect(server), connect(server)]
+    for connection in held:
+        get(connection, "/currency/SVA")
+
+    with socket.create_connection(server.server_address, timeout=0.5) as sock:
+        sock.sendall(b"GET /currency/SVA HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n")
+        with pytest.raises(socket.timeout):
+            sock.recv(65536)
+
+        # Freeing a worker lets the waiting connection through.
+        held.pop().close()
+        sock.settimeout(5)
+        assert sock.recv(65536).startswith(b"HTTP/1.1 200")
+
+    for connection in held:
+        connection.close()
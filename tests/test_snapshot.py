@@ -0,0 +1,67 @@
+import pytest
+
+from src.model.snapshot import RateSnapshot, snapshot_path, write_snapshot
+
+CURRENCIES = [{"id": 1, "name": "Euro", "code": "EUR", "sign": "€"},
+              {"id": 2, "name": "United States dollar", "code": "USD", "sign": "$"},
+              {"id": 3, "name": "Yen", "code": "JPY", "sign": "¥"}]
+
+
+def rate(rate_id: int, base: int, target: int, value: float) -> dict:
+    return {"id": rate_id, "base_currency_id": base, "target_currency_id": target, "rate": value}
+
+
+RATES = [rate(1, 1, 2, 1.1), rate(2, 2, 3, 150.0), rate(3, 3, 1, 0.006)]
+
+
+@pytest.fixture
+def publish(tmp_path):
+    def publish(generation, currencies=CURRENCIES, rates=RATES) -> RateSnapshot:
+        path = snapshot_path(tmp_path, generation)
+        write_snapshot(path, generation, currencies, rates)
+        return RateSnapshot(path)
+    return publish
+
+
+def test_round_trip(publish):
+    snapshot = publish(7)
+    assert snapshot.generation == 7
+    assert snapshot.currencies() == CURRENCIES
+    assert snapshot.rates() == RATES
+    assert snapshot.currency(code="USD") == CURRENCIES[1]
+    assert snapshot.currency(currency_id=3) == CURRENCIES[2]
+    assert snapshot.currency(currency_id=3, code="EUR") is None
+    assert snapshot.currency(code="GBP") is None
+    assert snapshot.rate(2, 3) == RATES[1]
+    assert snapshot.rate(3, 2) is None
+
+
+def test_rows_are_written_in_id_order(publish):
+    snapshot = publish(1, list(reversed(CURRENCIES)), list(reversed(RATES)))
+    assert snapshot.currencies() == CURRENCIES
+    assert snapshot.rates() == RATES
+
+
+def test_unchanged_rates(publish):
+    assert publish(2).changed_rates(publish(1)) == []
+
+
+def test_changed_and_added_rates(publish):
+    previous = publish(1)
+    current = publish(2, rates=[rate(1, 1, 2, 1.2), RATES[1], RATES[2], rate(4, 1, 3, 160.0)])
+    assert sorted(current.changed_rates(previous)) == [(1, 2, 1.2), (1, 3, 160.0)]
+
+
+def test_removed_rates_need_a_reset(publish):
+    previous = publish(1)
+    assert publish(2, rates=RATES[:2]).changed_rates(previous) is None
+
+
+@pytest.mark.parametrize("currencies, rates", [
+    (CURRENCIES[:2], RATES[:1]),
+    (CURRENCIES + [{"id": 4, "name": "Pound sterling", "code": "GBP", "sign": "£"}], RATES),
+    ([CURRENCIES[0], {**CURRENCIES[1], "name": "US dollar"}, CURRENCIES[2]], RATES),
+])
+def test_changed_currencies_need_a_reset(publish, currencies, rates):
+    previous = publish(1)
+    assert publish(2, currencies, rates).changed_rates(previous) is None